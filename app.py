@@ -1,4 +1,6 @@
 import streamlit as st
+import time
+APP_STARTED_AT = time.perf_counter()  # 첫 화면 렌더링 시간 측정 기준
 import json
 import random
 import os
@@ -8,13 +10,11 @@ from datetime import datetime
 # 프로젝트 루트 경로 추가 (src 모듈 임포트용)
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from src.planner import SmishingPlanner
-from src.generator import SmishingGenerator
-from src.intent_analyzer import IntentAnalyzer
-from src.detector import SmishingDetector
-from src.trainer import SmishingTrainer
-from src.utils import load_jsonl
-from src.report_generator import SecurityReportGenerator
+# torch/transformers/openai를 불러오는 에이전트 모듈은 필요할 때 임포트 (아래 팩토리 함수 참고)
+from src.corpus_index import get_corpus
+from src.startup import StartupTimer, BackgroundLoader
+from src.tracing import TRACER, configure_from_env
+from src.scenario_store import ScenarioBankStore
 from database_manager import DBManager
 
 # --- 유효성 검사 함수 ---
@@ -29,6 +29,81 @@ def validate_attack_message(message):
         return False, "Too Short (정보량 부족)"
     return True, "Valid"
 
+# 단계별 지연 시간 추적 (기본값: 메모리 집계, TRACE_EXPORTER로 jsonl/prometheus 선택)
+configure_from_env(default="memory")
+
+# --- 지연 로딩 에이전트 ---
+def _create_planner():
+    from src.planner import SmishingPlanner
+    return SmishingPlanner()
+
+def _create_generator():
+    from src.generator import SmishingGenerator
+    return SmishingGenerator()
+
+def _create_reporter():
+    from src.report_generator import SecurityReportGenerator
+    return SecurityReportGenerator()
+
+def _create_trainer():
+    from src.trainer import SmishingTrainer
+    detector = get_defense()["detector"]
+    # 어댑터가 적용된 모델은 어댑터 모드로만 진화 (TRAINER_MODE=adapter로 처음부터 어댑터 사용 가능)
+    mode = "adapter" if detector.adapters is not None else os.getenv("TRAINER_MODE", "full")
+    return SmishingTrainer(detector, mode=mode)
+
+AGENT_FACTORIES = {
+    "planner": _create_planner,
+    "generator": _create_generator,
+    "reporter": _create_reporter,
+    "trainer": _create_trainer,
+}
+
+def get_agent(name):
+    """에이전트를 처음 사용할 때 생성하여 세션에 보관합니다."""
+    if name not in st.session_state:
+        with st.session_state.startup_timer.phase(f"lazy_{name}"):
+            st.session_state[name] = AGENT_FACTORIES[name]()
+    return st.session_state[name]
+
+def load_defense_stack(bank_store):
+    """탐지 모델과 의도 분석기를 생성합니다. (백그라운드 스레드에서 실행, st.* 호출 금지)"""
+    from src.detector import SmishingDetector
+    from src.intent_analyzer import IntentAnalyzer
+    from src.campaign_cluster import CampaignDetector
+    from src.indicators import IndicatorGuard, ReputationIndex, DEFAULT_INDEX_PATH
+
+    # [변경] 학습 모델의 특성(Spam avg=0.72)을 고려하여 임계값을 0.5로 조정
+    detector = SmishingDetector(threshold=0.5,
+                                adapter_path=os.getenv("DETECTOR_ADAPTER", "models/adapters/evolved.pt"))
+    analyzer = IntentAnalyzer(bank_store=bank_store)
+    # 탐지 모델의 인코더를 재사용하여 로컬 의도 매칭 단계 활성화 (GPT 호출 절감)
+    analyzer.attach_local_matcher(detector)
+    # 변형 캠페인 문자는 군집 판정을 재사용하여 모델 호출 절감
+    campaigns = CampaignDetector(detector)
+    # 그 앞에서 URL/번호 지표를 평판 색인과 대조 (차단 목록 적중 시 모델 호출 생략)
+    reputation = ReputationIndex.load_if_exists(os.getenv("REPUTATION_INDEX", DEFAULT_INDEX_PATH))
+    return {"detector": detector, "analyzer": analyzer, "campaigns": campaigns,
+            "pipeline": IndicatorGuard(campaigns, reputation)}
+
+@st.cache_resource
+def get_burst_detector():
+    """
+    같은 문구/지표의 대량 유입은 문자별 점수와 별도로 급증 경보로 기록합니다.
+    세션 간 유입을 함께 세어야 하므로 프로세스에 하나만 두며 (스케치 테이블 약 15MB),
+    경보 저장은 각 세션의 DB 연결로 합니다.
+    """
+    from src.burst_detector import BurstDetector
+    return BurstDetector()
+
+def get_defense():
+    """방어 패널에서 처음 필요할 때 백그라운드 로딩이 끝나기를 기다립니다."""
+    warmup = st.session_state.warmup
+    if not warmup.ready():
+        with st.spinner("탐지 모델을 불러오는 중입니다..."):
+            return warmup.result()
+    return warmup.result()
+
 # --- 페이지 설정 ---
 st.set_page_config(page_title="Adversarial Smishing Defense AI", layout="wide")
 
@@ -71,49 +146,62 @@ st.markdown("---")
 
 # --- 세션 상태 초기화 ---
 if 'initialized' not in st.session_state:
-    with st.spinner("AI 에이전트 군단을 소집하고 있습니다..."):
-        st.session_state.planner = SmishingPlanner()
-        st.session_state.generator = SmishingGenerator()
-        st.session_state.analyzer = IntentAnalyzer()
-        # [변경] 학습 모델의 특성(Spam avg=0.72)을 고려하여 임계값을 0.5로 조정
-        st.session_state.detector = SmishingDetector(threshold=0.5)
-        st.session_state.reporter = SecurityReportGenerator()
-        
-        # [DB 연동] 데이터베이스 매니저 초기화
+    timer = StartupTimer(started_at=APP_STARTED_AT)
+    st.session_state.startup_timer = timer
+
+    # [DB 연동] 데이터베이스 매니저 초기화
+    with timer.phase("db"):
         st.session_state.db = DBManager()
-        
-        st.session_state.initialized = True
-    
-    # [수정] 코드가 변경되었을 때 최신 로직을 반영하기 위해 Trainer는 매번 새로 생성
-    st.session_state.trainer = SmishingTrainer(st.session_state.detector)
-    
-    st.success("시스템 준비 완료!")
+        st.session_state.bank_store = ScenarioBankStore()
 
-# --- 사이드바: 데이터 로드 ---
-from email.utils import parsedate_to_datetime
+    # 탐지 모델/의도 분석기는 첫 화면을 막지 않도록 백그라운드에서 미리 로드
+    bank_store = st.session_state.bank_store
+    st.session_state.warmup = BackgroundLoader(lambda: load_defense_stack(bank_store), name="defense_models", timer=timer)
+    # 기획/생성/리포트 에이전트는 처음 사용할 때 생성 (get_agent)
 
-# ... (imports)
+    st.session_state.initialized = True
+    st.success("시스템 준비 완료! (탐지 모델은 백그라운드에서 불러오는 중)")
 
 # --- 사이드바: 데이터 로드 ---
+NEWS_PAGE_SIZE = 50
+
+@st.cache_resource
+def _news_sync_state():
+    """프로세스 단위로 DB에 동기화한 기사 수 (재실행마다 전체 기사를 다시 저장하지 않도록)"""
+    return {"path": None, "generation": None, "synced": 0}
+
 st.sidebar.header("📂 Data Source")
 data_path = "data/smishing_context_data.jsonl"
-news_data = load_jsonl(data_path)
+# 바이트 오프셋 색인 (파일이 바뀌었을 때만 갱신, 기사 본문은 선택 시에만 읽음)
+news_corpus = get_corpus(data_path)
 
-if news_data:
-    # 날짜 기준 내림차순 정렬 (최신 기사가 상단에 오도록)
-    try:
-        news_data.sort(key=lambda x: parsedate_to_datetime(x['context']['source_date']), reverse=True)
-    except Exception as e:
-        st.sidebar.warning(f"날짜 정렬 중 오류가 발생했습니다: {e}")
-
-    # [DB Sync] 로드된 뉴스 데이터를 DB에 저장 (중복 자동 무시)
+if len(news_corpus):
+    # [DB Sync] 새로 추가된 기사만 DB에 저장 (중복 자동 무시)
     if 'db' in st.session_state:
-        for news in news_data:
+        sync = _news_sync_state()
+        # 파일이 새로 쓰였으면(색인 세대 변경) 줄 번호가 달라지므로 처음부터 다시 동기화 (DB는 중복 무시)
+        if sync["path"] != news_corpus.path or sync["generation"] != news_corpus.generation:
+            sync.update(path=news_corpus.path, generation=news_corpus.generation, synced=0)
+        for index, news in news_corpus.iter_items(sync["synced"]):
             st.session_state.db.insert_news(news)
+            sync["synced"] = index + 1
+
+    st.sidebar.success(f"{len(news_corpus)}개의 뉴스 데이터를 로드했습니다.")
+    news_query = st.sidebar.text_input("뉴스 검색 (제목/카테고리)")
+    if news_query:
+        news_options = news_corpus.search(news_query, limit=NEWS_PAGE_SIZE)
+    else:
+        # 날짜 기준 내림차순 (최신 기사가 상단에 오도록), 페이지 단위로 표시
+        page_count = (len(news_corpus) - 1) // NEWS_PAGE_SIZE + 1
+        page_no = st.sidebar.number_input(f"페이지 (1~{page_count})", min_value=1, max_value=page_count, value=1)
+        news_options = news_corpus.page(page_no - 1, NEWS_PAGE_SIZE)
 
-    st.sidebar.success(f"{len(news_data)}개의 뉴스 데이터를 로드했습니다.")
-    selected_news = st.sidebar.selectbox("분석할 뉴스를 선택하세요 (최신순)", news_data, 
-                                        format_func=lambda x: f"[{x['context']['category']}] {x['context']['news_title']}")
+    if not news_options:
+        st.sidebar.warning("검색 결과가 없습니다.")
+        st.stop()
+    selected_index = st.sidebar.selectbox("분석할 뉴스를 선택하세요 (최신순)", news_options,
+                                          format_func=news_corpus.label)
+    selected_news = news_corpus.get(selected_index)
 else:
     st.sidebar.error("데이터 파일을 찾을 수 없습니다.")
     st.stop()
@@ -132,7 +220,7 @@ with col1:
             history = st.session_state.get('generated_history', [])
             
             # 1. 3가지 시나리오 기획
-            strategies = st.session_state.planner.plan_multiple_scenarios(
+            strategies = get_agent("planner").plan_multiple_scenarios(
                 selected_news, 
                 count=3,
                 used_patterns=history
@@ -181,7 +269,7 @@ with col1:
         # 3. 실제 공격 문구 생성 버튼
         if st.button("⚡ 이 전략으로 공격 문자 생성", type="primary", use_container_width=True):
             with st.spinner("AI가 실제 공격 문구를 생성하고 있습니다..."):
-                attack_msg = st.session_state.generator.generate_attack_message(selected_strategy)
+                attack_msg = get_agent("generator").generate_attack_message(selected_strategy)
                 
                 # 생성 결과 검증
                 is_valid, reason = validate_attack_message(attack_msg)
@@ -241,12 +329,13 @@ with col2:
     # 유효한 공격일 때만 분석 진행
     if 'current_attack' in st.session_state and st.session_state.current_attack['is_valid']:
         attack_msg = st.session_state.current_attack['message']
+        defense = get_defense()
         
         # 1. Intent Analyzer
         st.subheader("🔍 의도 분석 (Intent Analysis)")
         with st.spinner("공격자의 의도를 파고드는 중..."):
             if 'last_analysis_msg' not in st.session_state or st.session_state.last_analysis_msg != attack_msg:
-                st.session_state.intent_res = st.session_state.analyzer.analyze_intent(attack_msg)
+                st.session_state.intent_res = defense["analyzer"].analyze_intent(attack_msg)
                 st.session_state.last_analysis_msg = attack_msg
             
             intent_res = st.session_state.intent_res
@@ -259,6 +348,14 @@ with col2:
         
         st.write(f"**수법 분류:** {intent_res['intent_name']}")
         st.caption(f"**법적 위반 소지:** {', '.join(intent_res.get('legal_risks', []))}")
+        ANALYSIS_SOURCES = {"local": "로컬 매칭", "llm_cache": "응답 캐시", "llm": "GPT 분석"}
+        stage = defense["analyzer"].get_stage_report()
+        st.caption(
+            f"분석 경로: {ANALYSIS_SOURCES.get(intent_res.get('match_source'), 'GPT 분석')} | "
+            f"로컬 적중률 {stage['local_hit_rate']*100:.0f}% (평균 {stage['local_avg_ms']:.0f}ms) | "
+            f"캐시 적중 {stage['cache_hits']}회 | "
+            f"GPT 호출 {stage['llm_calls']}회 (평균 {stage['llm_avg_ms']:.0f}ms)"
+        )
         
         st.divider()
 
@@ -281,11 +378,30 @@ with col2:
                     delta_color="inverse"
                 )
                 st.progress(prob, text=f"Model Confidence: {prob:.4f}")
+                campaign = result.get("campaign")
+                if campaign:
+                    st.caption(f"캠페인 군집 #{campaign['cluster_id']} (구성원 {campaign['size']}건, "
+                               f"{'군집 판정 재사용' if campaign['reused_verdict'] else '모델 채점'})")
+                indicators = result.get("indicators")
+                if indicators:
+                    listed = ", ".join(f"{i['type']}:{i['value']} ({i['risk']})" for i in indicators)
+                    st.caption(f"{'🚫 차단 목록 적중' if result.get('short_circuit') else '지표 위험도'} "
+                               f"{result['indicator_risk']} — {listed}")
 
         # 초기 상태 렌더링
         INIT_TEMP = 2.5
-        res_v1 = st.session_state.detector.predict(attack_msg)
+        res_v1 = defense["pipeline"].predict(attack_msg)
         render_detection_ui(res_v1)
+        # 재실행(위젯 조작, 진화 버튼 등)마다 같은 문자를 다시 세지 않도록 새 문자일 때만 반영
+        if st.session_state.get('last_burst_msg') != attack_msg:
+            st.session_state.burst_alerts = get_burst_detector().observe(attack_msg, res_v1.get("indicators"))
+            st.session_state.last_burst_msg = attack_msg
+            if 'db' in st.session_state:
+                for alert in st.session_state.burst_alerts:
+                    st.session_state.db.insert_campaign_alert(alert)
+        for alert in st.session_state.burst_alerts:
+            st.warning(f"📈 캠페인 급증 경보: {alert['key_type']} `{alert['key_value'][:40]}` "
+                       f"({alert['window_count']}건/{alert['window_sec'] // 60}분)")
         
         # [DB] 1차 공격 시도 및 탐지 결과 저장
         if 'db' in st.session_state:
@@ -293,11 +409,15 @@ with col2:
                 "scenario_name": st.session_state.current_attack['strategy']['strategy_name'],
                 "generated_msg": attack_msg,
                 "score": res_v1['smishing_score'],
-                "model_used": "RoBERTa-Base (Initial)"
+                "model_used": "RoBERTa-Base (Initial)",
+                "indicators": res_v1.get('indicators'),
+                "model_score": None if res_v1.get('short_circuit') else res_v1.get('model_score', res_v1['smishing_score']),
+                "short_circuit": res_v1.get('short_circuit', False)
             })
 
         EVOLUTION_THRESHOLD = 0.95
-        if res_v1['smishing_score'] < EVOLUTION_THRESHOLD:
+        # 진화 여부는 지표 가중 전 모델 자체 점수로 판단 (차단 목록 적중 시에는 진화 불필요)
+        if not res_v1.get('short_circuit') and res_v1.get('model_score', res_v1['smishing_score']) < EVOLUTION_THRESHOLD:
             st.error(f"🚨 방어 보강 필요 (신뢰도 부족)")
             if st.button("⚙️ 자가 진화 (적대적 학습) 시작"):
                 with st.spinner("가중치 업데이트 중..."):
@@ -305,10 +425,11 @@ with col2:
                     temp_path = "data/temp_app_train.json"
                     with open(temp_path, "w", encoding="utf-8") as f:
                         json.dump(train_data, f, indent=4, ensure_ascii=False)
-                    st.session_state.trainer.train_on_vulnerabilities(temp_path)
+                    get_agent("trainer").train_on_vulnerabilities(temp_path)
                     os.remove(temp_path)
                 
-                res_v2 = st.session_state.detector.predict(attack_msg)
+                # 진화 후에는 가중치 버전이 바뀌어 군집 판정도 다시 채점됨
+                res_v2 = defense["pipeline"].predict(attack_msg)
                 
                 # [핵심] 진화 완료 후 UI 즉시 갱신
                 render_detection_ui(res_v2) 
@@ -319,7 +440,10 @@ with col2:
                         "scenario_name": st.session_state.current_attack['strategy']['strategy_name'],
                         "generated_msg": attack_msg,
                         "score": res_v2['smishing_score'],
-                        "model_used": "RoBERTa-Base (Evolved)"
+                        "model_used": "RoBERTa-Base (Evolved)",
+                        "indicators": res_v2.get('indicators'),
+                        "model_score": None if res_v2.get('short_circuit') else res_v2.get('model_score', res_v2['smishing_score']),
+                        "short_circuit": res_v2.get('short_circuit', False)
                     })
                 
                 st.success(f"🛡️ 진화 완료! 확률 인지력이 `{res_v1['smishing_score']:.4f}` → `{res_v2['smishing_score']:.4f}`로 향상되었습니다.")
@@ -332,13 +456,13 @@ with col2:
         if st.button("📝 리포트 생성 하기", type="primary", use_container_width=True):
             with st.spinner("보고서 분석 및 PDF 생성 중..."):
                 # 1. 텍스트 내용 생성
-                text_content = st.session_state.reporter.generate_report_content(
+                text_content = get_agent("reporter").generate_report_content(
                     st.session_state.current_news,
                     st.session_state.current_attack,
                     st.session_state.intent_res
                 )
                 # 2. PDF 변환
-                pdf_bytes = st.session_state.reporter.create_pdf_report(text_content)
+                pdf_bytes = get_agent("reporter").create_pdf_report(text_content)
                 st.session_state.report_pdf = pdf_bytes
                 # 미리보기용 텍스트 저장
                 st.session_state.report_preview = text_content
@@ -372,4 +496,44 @@ with col2:
 # --- 하단 로그 ---
 st.divider()
 with st.expander("📊 시스템 인지 수법 도감 (Scenario Bank)"):
-    st.table(st.session_state.analyzer.scenario_bank)
\ No newline at end of file
+    st.table(st.session_state.bank_store.all())
+
+# --- 시작 시간 리포트 ---
+timer = st.session_state.startup_timer
+timer.mark("first_render")
+with st.sidebar.expander("⏱️ 시작 시간 (Startup Timing)"):
+    startup = timer.report()
+    st.write(f"첫 화면 렌더링: {startup['marks_ms']['first_render']:.0f}ms")
+    for name, elapsed_ms in startup['phases_ms'].items():
+        st.write(f"- {name}: {elapsed_ms:.0f}ms")
+    if not st.session_state.warmup.ready():
+        st.caption("탐지 모델 백그라운드 로딩 중...")
+
+# --- 캠페인 급증 경보 ---
+with st.sidebar.expander("📈 캠페인 급증 경보 (Burst Alerts)"):
+    alerts = st.session_state.db.fetch_campaign_alerts(limit=10)
+    if alerts:
+        st.table([
+            {"유형": a["key_type"], "키": a["key_value"][:30], "건수": a["window_count"], "탐지 시각": a["detected_at"][:19]}
+            for a in alerts
+        ])
+    else:
+        st.caption("아직 발생한 경보가 없습니다.")
+
+# --- 진단 패널 ---
+with st.sidebar.expander("🩺 단계별 지연 시간 (Diagnostics)"):
+    if not TRACER.enabled:
+        st.caption("추적이 꺼져 있습니다. (TRACE_EXPORTER=none)")
+    else:
+        stages = TRACER.stage_summary()
+        if stages:
+            st.table([
+                {"단계": name, "호출": s["count"], "평균(ms)": f"{s['mean_ms']:.1f}",
+                 "p95(ms)": f"{s['p95_ms']:.1f}", "최대(ms)": f"{s['max_ms']:.1f}"}
+                for name, s in stages.items()
+            ])
+        else:
+            st.caption("아직 기록된 구간이 없습니다.")
+        counters = TRACER.counter_summary()
+        if counters:
+            st.json(counters)
\ No newline at end of file
@@ -13,6 +13,9 @@ import json
 from datetime import datetime
 from dotenv import load_dotenv
 
+from src.tracing import traced
+from src.utils import dumps, loads
+
 # Supabase는 선택적 의존성 (없어도 SQLite 모드로 동작)
 try:
     from supabase import create_client, Client
@@ -82,9 +85,20 @@ class DBManager:
                 generated_msg TEXT,
                 score REAL,
                 model_used TEXT,
-                timestamp TEXT
+                timestamp TEXT,
+                indicators TEXT, -- 추출된 지표 목록 (JSON 문자열)
+                model_score REAL, -- 지표 가중 전 모델 자체 점수
+                short_circuit INTEGER -- 차단 목록 적중으로 모델을 건너뛰었는지 여부
             )
         ''')
+        # 기존 DB 마이그레이션: indicators 컬럼이 없으면 추가
+        columns = [r[1] for r in self.cursor.execute("PRAGMA table_info(attack_logs)").fetchall()]
+        if 'indicators' not in columns:
+            self.cursor.execute("ALTER TABLE attack_logs ADD COLUMN indicators TEXT")
+        if 'model_score' not in columns:
+            self.cursor.execute("ALTER TABLE attack_logs ADD COLUMN model_score REAL")
+        if 'short_circuit' not in columns:
+            self.cursor.execute("ALTER TABLE attack_logs ADD COLUMN short_circuit INTEGER")
 
         # 3. 원본 데이터셋(Raw Datasets) 테이블
         # 학습에 사용된 원본 데이터를 저장합니다.
@@ -124,29 +138,78 @@ class DBManager:
                 created_at TEXT
             )
         ''')
+
+        # 6. 의도 프로파일(Intent Profiles) 테이블
+        # 대량 의도 분석(백필) 결과를 문자 단위로 저장합니다.
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS intent_profiles (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                source TEXT, -- 문자 출처 (attack_logs, final_dataset 등)
+                message TEXT,
+                matched_intent_id TEXT,
+                intent_name TEXT,
+                severity_score INTEGER,
+                threat_level TEXT,
+                result_json TEXT, -- 분석 결과 전체 (JSON 문자열)
+                analyzed_at TEXT
+            )
+        ''')
+
+        # 7. 캠페인 급증 경보(Campaign Alerts) 테이블
+        # 같은 문구/지표가 짧은 시간에 대량 유입된 캠페인 경보를 저장합니다.
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS campaign_alerts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                key_type TEXT, -- template, url, domain, phone, account
+                key_value TEXT,
+                example_msg TEXT,
+                window_count INTEGER, -- 탐지 창 안의 추정 건수
+                expected_count REAL, -- 이전 기간 기준 예상 건수
+                window_sec INTEGER,
+                detected_at TEXT
+            )
+        ''')
         self.conn.commit()
 
     # --- Public Methods (Common Interface) ---
 
+    @traced("db.insert_log")
     def insert_log(self, log_data: dict):
         """
         [로그 저장]
         생성된 스미싱 문자와 탐지 결과를 저장합니다.
+        log_data['indicators']: 탐지 단계에서 추출한 지표 목록 [{'type', 'value', ...}] (선택)
+        log_data['model_score'], log_data['short_circuit']: 지표 가중 전 모델 점수, 차단 목록 적중 여부 (선택)
         """
         timestamp = datetime.now().isoformat()
+        indicators = log_data.get('indicators')
+        indicators_json = dumps(indicators) if indicators is not None else None
 
         if self.mode == 'supabase':
             # Supabase API 사용 (JSON 데이터 직접 전송)
             data = {**log_data, "timestamp": timestamp}
-            self.supabase.table('attack_logs').insert(data).execute()
+            if indicators is not None:
+                data["indicators"] = indicators_json
+            try:
+                self.supabase.table('attack_logs').insert(data).execute()
+            except Exception as e:
+                # model_score/short_circuit 컬럼을 아직 추가하지 않은 테이블이면 해당 항목 없이 다시 저장
+                optional = [key for key in ('model_score', 'short_circuit') if key in data]
+                if not optional or not any(key in str(e) for key in optional):
+                    raise
+                print(f"[Warning] Supabase attack_logs에 {optional} 컬럼이 없어 제외하고 저장합니다: {e}")
+                self.supabase.table('attack_logs').insert(
+                    {k: v for k, v in data.items() if k not in optional}).execute()
         else:
             # SQLite Query 실행
             self.cursor.execute(
-                "INSERT INTO attack_logs (scenario_name, generated_msg, score, model_used, timestamp) VALUES (?, ?, ?, ?, ?)",
-                (log_data.get('scenario_name'), log_data.get('generated_msg'), log_data.get('score'), log_data.get('model_used'), timestamp)
+                "INSERT INTO attack_logs (scenario_name, generated_msg, score, model_used, timestamp, indicators, model_score, short_circuit) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (log_data.get('scenario_name'), log_data.get('generated_msg'), log_data.get('score'), log_data.get('model_used'), timestamp, indicators_json,
+                 log_data.get('model_score'), None if log_data.get('short_circuit') is None else int(log_data['short_circuit']))
             )
             self.conn.commit()
 
+    @traced("db.upsert_intent")
     def upsert_intent(self, intent_data: dict):
         """
         [시나리오 동기화]
@@ -166,6 +229,7 @@ class DBManager:
             )
             self.conn.commit()
 
+    @traced("db.insert_dataset_bulk")
     def insert_dataset_bulk(self, data_list: list):
         """
         [대량 데이터 저장]
@@ -190,6 +254,7 @@ class DBManager:
             except Exception as e:
                 print(f"[DB Error] SQLite Bulk Insert Failed: {e}")
 
+    @traced("db.insert_news")
     def insert_news(self, news_item: dict):
         """
         [뉴스 기사 저장]
@@ -233,6 +298,7 @@ class DBManager:
             except Exception as e:
                 print(f"[DB Error] SQLite News Insert Failed: {e}")
 
+    @traced("db.insert_report")
     def insert_report(self, report_data: dict):
         """
         [보안 리포트 저장]
@@ -284,6 +350,201 @@ class DBManager:
             except Exception as e:
                 print(f"[DB Error] SQLite Report Insert Failed: {e}")
 
+    @traced("db.insert_intent_profiles_bulk")
+    def insert_intent_profiles_bulk(self, profiles: list):
+        """
+        [의도 프로파일 대량 저장]
+        대량 의도 분석 결과를 한 번에 저장합니다.
+        profiles: [{'source': str, 'message': str, 'result': dict}, ...]
+        """
+        if not profiles: return
+
+        analyzed_at = datetime.now().isoformat()
+        rows = [
+            {
+                "source": p.get('source'),
+                "message": p.get('message'),
+                "matched_intent_id": p['result'].get('matched_intent_id'),
+                "intent_name": p['result'].get('intent_name'),
+                "severity_score": p['result'].get('severity_score'),
+                "threat_level": p['result'].get('threat_level'),
+                "result_json": dumps(p['result']),
+                "analyzed_at": analyzed_at
+            }
+            for p in profiles
+        ]
+
+        if self.mode == 'supabase':
+            try:
+                self.supabase.table('intent_profiles').insert(rows).execute()
+            except Exception as e:
+                print(f"[DB Error] Supabase Intent Profile Insert Failed: {e}")
+        else:
+            try:
+                self.cursor.executemany(
+                    """
+                    INSERT INTO intent_profiles
+                    (source, message, matched_intent_id, intent_name, severity_score, threat_level, result_json, analyzed_at)
+                    VALUES (:source, :message, :matched_intent_id, :intent_name, :severity_score, :threat_level, :result_json, :analyzed_at)
+                    """,
+                    rows
+                )
+                self.conn.commit()
+            except Exception as e:
+                print(f"[DB Error] SQLite Intent Profile Insert Failed: {e}")
+
+    @traced("db.insert_campaign_alert")
+    def insert_campaign_alert(self, alert: dict):
+        """
+        [캠페인 급증 경보 저장]
+        BurstDetector가 발생시킨 경보를 저장합니다. (detected_at: UNIX 시각 -> ISO 문자열)
+        """
+        if not alert: return
+
+        data = {
+            "key_type": alert.get('key_type'),
+            "key_value": alert.get('key_value'),
+            "example_msg": alert.get('example_msg'),
+            "window_count": alert.get('window_count'),
+            "expected_count": alert.get('expected_count'),
+            "window_sec": alert.get('window_sec'),
+            "detected_at": datetime.fromtimestamp(alert['detected_at']).isoformat() if alert.get('detected_at') else datetime.now().isoformat()
+        }
+
+        if self.mode == 'supabase':
+            try:
+                self.supabase.table('campaign_alerts').insert(data).execute()
+            except Exception as e:
+                print(f"[DB Error] Supabase Campaign Alert Insert Failed: {e}")
+        else:
+            try:
+                self.cursor.execute(
+                    """
+                    INSERT INTO campaign_alerts
+                    (key_type, key_value, example_msg, window_count, expected_count, window_sec, detected_at)
+                    VALUES (:key_type, :key_value, :example_msg, :window_count, :expected_count, :window_sec, :detected_at)
+                    """,
+                    data
+                )
+                self.conn.commit()
+            except Exception as e:
+                print(f"[DB Error] SQLite Campaign Alert Insert Failed: {e}")
+
+    def fetch_campaign_alerts(self, limit: int = 20):
+        """
+        [캠페인 급증 경보 조회]
+        최근 경보부터 limit건 반환합니다.
+        """
+        columns = "key_type, key_value, example_msg, window_count, expected_count, window_sec, detected_at"
+
+        if self.mode == 'supabase':
+            try:
+                return (self.supabase.table('campaign_alerts').select(columns)
+                        .order('detected_at', desc=True).limit(limit).execute().data)
+            except Exception as e:
+                print(f"[DB Error] Supabase Campaign Alert Fetch Failed: {e}")
+                return []
+        else:
+            self.cursor.execute(f"SELECT {columns} FROM campaign_alerts ORDER BY detected_at DESC, id DESC LIMIT ?", (limit,))
+            names = [d[0] for d in self.cursor.description]
+            return [dict(zip(names, r)) for r in self.cursor.fetchall()]
+
+    def fetch_attack_messages(self):
+        """
+        [공격 문자 조회]
+        attack_logs에 기록된 문자를 중복 없이 반환합니다. (대량 분석 입력용)
+        """
+        if self.mode == 'supabase':
+            try:
+                rows = self.supabase.table('attack_logs').select('generated_msg').execute().data
+                return list(dict.fromkeys(r['generated_msg'] for r in rows if r.get('generated_msg')))
+            except Exception as e:
+                print(f"[DB Error] Supabase Attack Log Fetch Failed: {e}")
+                return []
+        else:
+            rows = self.cursor.execute(
+                "SELECT generated_msg FROM attack_logs WHERE generated_msg IS NOT NULL GROUP BY generated_msg ORDER BY MIN(id)"
+            ).fetchall()
+            return [r[0] for r in rows]
+
+    def fetch_logged_indicators(self, min_score: float = 0.9):
+        """
+        [기록된 지표 조회]
+        모델 점수(지표 가중 전, 없으면 최종 점수)가 min_score 이상인 공격 로그의 지표를 (유형, 값) 기준으로 집계합니다. (평판 색인 재생성용)
+        차단 목록 적중으로 모델을 건너뛴 로그(short_circuit)는 제외합니다.
+        반환값: [(type, value, 최고 점수, 등장 횟수), ...] 등장 횟수가 많은 순
+        """
+        if self.mode == 'supabase':
+            try:
+                try:
+                    rows = (self.supabase.table('attack_logs').select('score, model_score, short_circuit, indicators')
+                            .not_.is_('indicators', 'null').execute().data)
+                except Exception as e:
+                    # model_score/short_circuit 컬럼이 없는 테이블은 최종 점수 기준으로 집계
+                    print(f"[Warning] Supabase attack_logs의 model_score/short_circuit 조회 실패, 최종 점수로 집계합니다: {e}")
+                    rows = (self.supabase.table('attack_logs').select('score, indicators')
+                            .gte('score', min_score).not_.is_('indicators', 'null').execute().data)
+                rows = [
+                    (r['model_score'] if r.get('model_score') is not None else r['score'], r['indicators'])
+                    for r in rows if not r.get('short_circuit')
+                ]
+                rows = [(score, indicators) for score, indicators in rows if score is not None and score >= min_score]
+            except Exception as e:
+                print(f"[DB Error] Supabase Indicator Fetch Failed: {e}")
+                return []
+        else:
+            rows = self.cursor.execute(
+                "SELECT COALESCE(model_score, score) AS model_score, indicators FROM attack_logs "
+                "WHERE COALESCE(model_score, score) >= ? AND indicators IS NOT NULL AND COALESCE(short_circuit, 0) = 0",
+                (min_score,)
+            ).fetchall()
+
+        aggregated = {}
+        for score, indicators_json in rows:
+            for indicator in loads(indicators_json or '[]'):
+                key = (indicator['type'], indicator['value'])
+                best, count = aggregated.get(key, (score, 0))
+                aggregated[key] = (max(best, score), count + 1)
+        ranked = sorted(aggregated.items(), key=lambda item: item[1][1], reverse=True)
+        return [(kind, value, best, count) for (kind, value), (best, count) in ranked]
+
+    def fetch_high_severity_profiles(self, since: str, min_severity: int = 4):
+        """
+        [고위험 프로파일 조회]
+        since(ISO 시각) 이후 분석된 의도 프로파일 중 위협 점수가 min_severity 이상인 항목을
+        문자 기준 중복 없이, 위협 점수가 높은 순으로 반환합니다. (주간 리포트 일괄 생성용)
+        반환값: [{'message', 'matched_intent_id', 'intent_name', 'severity_score', 'threat_level', 'result', 'analyzed_at'}, ...]
+        """
+        columns = "message, matched_intent_id, intent_name, severity_score, threat_level, result_json, analyzed_at"
+
+        if self.mode == 'supabase':
+            try:
+                rows = (self.supabase.table('intent_profiles').select(columns)
+                        .gte('analyzed_at', since).gte('severity_score', min_severity)
+                        .order('severity_score', desc=True).order('analyzed_at').execute().data)
+            except Exception as e:
+                print(f"[DB Error] Supabase Intent Profile Fetch Failed: {e}")
+                return []
+        else:
+            self.cursor.execute(
+                f"""
+                SELECT {columns} FROM intent_profiles
+                WHERE analyzed_at >= ? AND severity_score >= ?
+                ORDER BY severity_score DESC, analyzed_at
+                """,
+                (since, min_severity)
+            )
+            names = [d[0] for d in self.cursor.description]
+            rows = [dict(zip(names, r)) for r in self.cursor.fetchall()]
+
+        profiles = {}
+        for row in rows:
+            if row['message'] in profiles:
+                continue
+            row['result'] = loads(row.pop('result_json') or '{}')
+            profiles[row['message']] = row
+        return list(profiles.values())
+
     def get_stats(self):
         """
         [통계 조회]
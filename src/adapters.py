@@ -0,0 +1,239 @@
+import os
+import math
+import time
+
+import torch
+from torch import nn
+
+DEFAULT_ADAPTER_DIR = "models/adapters"
+
+# RoBERTa 인코더의 어텐션(query/key/value/output)과 FFN(intermediate/output) 선형층
+DEFAULT_TARGET_MODULES = (
+    "attention.self.query",
+    "attention.self.key",
+    "attention.self.value",
+    "attention.output.dense",
+    "intermediate.dense",
+    "output.dense"
+)
+# 분류 헤드는 크기가 작고 태스크 전용이므로 어댑터와 함께 통째로 학습/저장
+DEFAULT_HEAD_MODULES = ("classifier",)
+
+
+class LoRALinear(nn.Module):
+    """
+    [LoRA Linear]
+    고정된 nn.Linear에 저랭크 보정(B @ A)을 더하는 래퍼.
+    y = base(x) + dropout(x) @ A^T @ B^T * (alpha / r)
+    B를 0으로 초기화하므로 붙인 직후에는 원래 모델과 출력이 같습니다.
+    """
+
+    def __init__(self, base, r=8, alpha=16, dropout=0.05):
+        super().__init__()
+        self.base = base
+        self.r = r
+        self.alpha = alpha
+        self.scaling = alpha / r
+        weight = base.weight
+        self.lora_A = nn.Parameter(torch.empty(r, base.in_features, device=weight.device, dtype=weight.dtype))
+        self.lora_B = nn.Parameter(torch.zeros(base.out_features, r, device=weight.device, dtype=weight.dtype))
+        nn.init.kaiming_uniform_(self.lora_A, a=math.sqrt(5))
+        self.dropout = nn.Dropout(dropout) if dropout > 0 else nn.Identity()
+        self.merged = False
+        self.enabled = True
+
+    def forward(self, x):
+        out = self.base(x)
+        if self.enabled and not self.merged:
+            out = out + (self.dropout(x) @ self.lora_A.t() @ self.lora_B.t()) * self.scaling
+        return out
+
+    def delta_weight(self):
+        return (self.lora_B @ self.lora_A) * self.scaling
+
+    @torch.no_grad()
+    def merge(self):
+        if not self.merged:
+            self.base.weight += self.delta_weight()
+            self.merged = True
+
+    @torch.no_grad()
+    def unmerge(self):
+        if self.merged:
+            self.base.weight -= self.delta_weight()
+            self.merged = False
+
+    @torch.no_grad()
+    def reset(self):
+        """보정을 0으로 되돌립니다. (A는 새로 초기화)"""
+        self.unmerge()
+        nn.init.kaiming_uniform_(self.lora_A, a=math.sqrt(5))
+        self.lora_B.zero_()
+
+
+class AdapterManager:
+    """
+    [Adapter Manager]
+    탐지 모델에 LoRA 어댑터를 붙이고, 어댑터 가중치만 학습/저장/교체합니다.
+    - attach(): 대상 선형층을 LoRALinear로 교체하고 원본 가중치는 학습에서 제외
+    - save(name): 어댑터(+분류 헤드) 가중치만 저장 (수 MB), load(name): 실행 중 교체(hot-swap)
+    - merge(): 어댑터를 원본 가중치에 합쳐 추론 오버헤드 제거
+    - export_merged(path): 어댑터를 합친 가중치를 원래 모델 구조(nn.Linear 키)로 저장 -> 어댑터 없이 load_state_dict 가능
+    - reset(): 어댑터와 분류 헤드를 붙이기 전 상태로 되돌림
+    캠페인별 어댑터를 adapter_dir에 나란히 보관하고 필요할 때 load()로 바꿔 끼울 수 있습니다.
+    """
+
+    def __init__(self, model, r=8, alpha=16, dropout=0.05, target_modules=DEFAULT_TARGET_MODULES,
+                 head_modules=DEFAULT_HEAD_MODULES, adapter_dir=DEFAULT_ADAPTER_DIR):
+        self.model = model
+        self.config = {"r": r, "alpha": alpha, "dropout": dropout,
+                       "target_modules": list(target_modules), "head_modules": list(head_modules)}
+        self.adapter_dir = adapter_dir
+        self.layers = {}
+        self.head_snapshot = {}
+        self.active = None
+        self.attach()
+
+    def attach(self):
+        if self.layers:
+            return self
+        targets = [
+            (name, module) for name, module in self.model.named_modules()
+            if isinstance(module, nn.Linear) and name.endswith(tuple(self.config["target_modules"]))
+            and not name.startswith(tuple(self.config["head_modules"]))
+        ]
+        if not targets:
+            raise ValueError(f"어댑터를 붙일 선형층을 찾지 못했습니다: {self.config['target_modules']}")
+
+        for name, module in targets:
+            parent_name, _, child_name = name.rpartition(".")
+            parent = self.model.get_submodule(parent_name) if parent_name else self.model
+            layer = LoRALinear(module, self.config["r"], self.config["alpha"], self.config["dropout"])
+            setattr(parent, child_name, layer)
+            self.layers[name] = layer
+
+        # 분류 헤드는 reset()에서 되돌릴 수 있도록 원본을 보관
+        self.head_snapshot = {k: v.detach().clone() for k, v in self._head_state().items()}
+        self.freeze_base()
+        print(f"[*] LoRA 어댑터 연결: {len(self.layers)}개 층 (r={self.config['r']}), "
+              f"학습 파라미터 {self.num_trainable():,} / 전체 {sum(p.numel() for p in self.model.parameters()):,}")
+        return self
+
+    def freeze_base(self):
+        """어댑터와 분류 헤드를 제외한 모든 파라미터를 고정합니다."""
+        for name, param in self.model.named_parameters():
+            param.requires_grad = self._is_adapter_param(name)
+
+    def _is_adapter_param(self, name):
+        return "lora_" in name or name.startswith(tuple(self.config["head_modules"]))
+
+    def trainable_parameters(self):
+        return [p for p in self.model.parameters() if p.requires_grad]
+
+    def num_trainable(self):
+        return sum(p.numel() for p in self.trainable_parameters())
+
+    def _head_state(self):
+        return {k: v for k, v in self.model.state_dict().items() if k.startswith(tuple(self.config["head_modules"]))}
+
+    def state_dict(self):
+        """어댑터(lora_A/lora_B)와 분류 헤드 가중치만 CPU로 복사하여 반환합니다."""
+        return {
+            name: tensor.detach().cpu().clone()
+            for name, tensor in self.model.state_dict().items()
+            if "lora_" in name or name.startswith(tuple(self.config["head_modules"]))
+        }
+
+    def path_for(self, name):
+        return name if name.endswith(".pt") else os.path.join(self.adapter_dir, f"{name}.pt")
+
+    def save(self, name, **metadata):
+        """어댑터를 adapter_dir/<name>.pt로 저장합니다. 반환값: 저장 경로"""
+        if any(layer.merged for layer in self.layers.values()):
+            raise RuntimeError("병합된 어댑터는 저장할 수 없습니다. unmerge() 후 저장하세요.")
+        path = self.path_for(name)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        torch.save({
+            "config": self.config,
+            "state_dict": self.state_dict(),
+            "metadata": {"saved_at": time.strftime("%Y-%m-%dT%H:%M:%S"), **metadata}
+        }, path)
+        self.active = name
+        print(f"[*] 어댑터 저장: '{path}' ({os.path.getsize(path) / 1024:.0f}KB)")
+        return path
+
+    def load(self, name):
+        """저장된 어댑터로 교체합니다. (모델을 다시 불러오지 않음)"""
+        path = self.path_for(name)
+        checkpoint = torch.load(path, map_location="cpu")
+        if checkpoint["config"]["r"] != self.config["r"] or \
+                checkpoint["config"]["target_modules"] != self.config["target_modules"]:
+            raise ValueError(f"어댑터 구성이 현재 모델과 다릅니다: {path} ({checkpoint['config']})")
+
+        self.unmerge()
+        missing = set(self.state_dict()) - set(checkpoint["state_dict"])
+        if missing:
+            raise ValueError(f"어댑터 파일에 없는 가중치가 있습니다: {sorted(missing)[:3]}...")
+        self.model.load_state_dict(checkpoint["state_dict"], strict=False)
+        self.active = name
+        return checkpoint.get("metadata", {})
+
+    def merge(self):
+        """어댑터를 원본 가중치에 합칩니다. 추론 시 추가 연산이 없어집니다."""
+        for layer in self.layers.values():
+            layer.merge()
+
+    def unmerge(self):
+        for layer in self.layers.values():
+            layer.unmerge()
+
+    @torch.no_grad()
+    def merged_state_dict(self):
+        """
+        어댑터를 합친 전체 모델 가중치를 LoRALinear로 감싸기 전의 키 이름으로 반환합니다. (CPU 복사본)
+        "...query.base.weight" -> "...query.weight", lora_A/lora_B는 제외. 모델 자체는 바꾸지 않습니다.
+        """
+        renamed = {f"{name}.base.{param}": f"{name}.{param}" for name in self.layers for param in ("weight", "bias")}
+        state = {}
+        for key, tensor in self.model.state_dict().items():
+            if "lora_" in key:
+                continue
+            state[renamed.get(key, key)] = tensor.detach().cpu().clone()
+        for name, layer in self.layers.items():
+            if layer.enabled and not layer.merged:
+                state[f"{name}.weight"] += layer.delta_weight().detach().cpu()
+        return state
+
+    def export_merged(self, path):
+        """
+        어댑터를 합친 가중치를 원래 모델 구조로 저장합니다.
+        SmishingDetector의 학습 가중치 파일(models/smishing_detector_model.pth)로 그대로 쓸 수 있습니다.
+        반환값: 저장 경로
+        """
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        torch.save(self.merged_state_dict(), path)
+        print(f"[*] 어댑터 병합 가중치 저장: '{path}' ({os.path.getsize(path) / (1024 * 1024):.1f}MB)")
+        return path
+
+    @torch.no_grad()
+    def reset(self):
+        """어댑터를 0으로, 분류 헤드를 연결 시점의 가중치로 되돌립니다."""
+        for layer in self.layers.values():
+            layer.reset()
+        state = self.model.state_dict()
+        for key, value in self.head_snapshot.items():
+            state[key].copy_(value)
+        self.active = None
+
+    def set_enabled(self, enabled):
+        """어댑터를 끄면 원본 인코더로 동작합니다. (분류 헤드는 그대로)"""
+        for layer in self.layers.values():
+            layer.enabled = enabled
+
+    def list_adapters(self):
+        """adapter_dir에 저장된 어댑터 이름 목록"""
+        if not os.path.isdir(self.adapter_dir):
+            return []
+        return sorted(f[:-3] for f in os.listdir(self.adapter_dir) if f.endswith(".pt"))
@@ -0,0 +1,231 @@
+import os
+import re
+import json
+import math
+from collections import Counter
+
+from src.scenario_store import render_scenario
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+_ENCODING = None
+_ASCII_RUN = re.compile(r"[\x00-\x7f]+")
+
+
+def estimate_tokens(text):
+    """
+    [토큰 수 추정]
+    tiktoken이 설치되어 있으면 gpt-4o 인코딩(o200k_base)으로 정확히 세고,
+    없으면 로컬 근사치를 사용합니다.
+    - ASCII 구간: 4글자당 1토큰
+    - 한글 등 그 외 문자: 1글자당 1토큰 (실제보다 약간 많게 잡아 예산을 넘지 않도록)
+    """
+    global _ENCODING
+    if TIKTOKEN_AVAILABLE:
+        if _ENCODING is None:
+            _ENCODING = tiktoken.get_encoding("o200k_base")
+        return len(_ENCODING.encode(text))
+
+    runs = _ASCII_RUN.findall(text)
+    ascii_tokens = sum(math.ceil(len(run.strip()) / 4) for run in runs)
+    return ascii_tokens + (len(text) - sum(len(run) for run in runs))
+
+
+def _severity(scenario):
+    try:
+        return int(scenario.get("severity_score") or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _bigrams(text):
+    # 문자 사이에 끼운 기호(검.찰, 아/이)를 제거한 뒤 어절 단위 2-gram 추출
+    clean = re.sub(r"[^가-힣a-zA-Z0-9\s]", "", text.lower())
+    grams = []
+    for word in clean.split():
+        if len(word) == 1:
+            grams.append(word)
+        else:
+            grams.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return grams
+
+
+class BankRetriever:
+    """
+    [Bank Retriever]
+    시나리오 뱅크 전체 대신, 분석 대상 문자와 관련된 항목만 골라 프롬프트에 넣기 위한 검색 단계.
+    뱅크 항목(수법 명칭 + 설명 + 심리 트리거)을 문자 2-gram TF-IDF로 색인하고,
+    코사인 유사도 상위 top_k개를 token_budget 안에서 선택합니다.
+    뱅크가 커져도 프롬프트 크기가 일정하게 유지됩니다.
+    검색이 빗나가 정답 항목이 빠지면 GPT가 NEW로 답해 중복 수법이 등록되므로
+    - 최고 유사도가 min_similarity 미만(겹치는 어절이 거의 없음)이면 뱅크 전체를 반환
+    - 위협 점수가 가장 높은 항목 pinned개는 유사도와 관계없이 항상 포함
+    """
+
+    def __init__(self, top_k=8, token_budget=800, min_similarity=0.1, pinned=2):
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.min_similarity = min_similarity
+        self.pinned = pinned
+        self.version = None
+        self._index = ([], {}, {}, 0)
+
+    def fit(self, scenarios, version=None):
+        """뱅크 항목으로 색인을 (재)구성합니다. version은 저장소의 변경 횟수 (재색인 판단용)"""
+        doc_counts = [
+            Counter(_bigrams(" ".join([s.get("intent_name", ""), s.get("description", ""),
+                                       s.get("psychological_trigger", "")])))
+            for s in scenarios
+        ]
+        df = Counter(gram for counts in doc_counts for gram in counts)
+        idf = {gram: math.log((len(scenarios) + 1) / (n + 1)) + 1 for gram, n in df.items()}
+
+        # gram -> [(항목 인덱스, 정규화된 가중치)] 역색인
+        postings = {}
+        for i, counts in enumerate(doc_counts):
+            weights = {gram: tf * idf[gram] for gram, tf in counts.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            for gram, w in weights.items():
+                postings.setdefault(gram, []).append((i, w / norm))
+
+        lines = [render_scenario(s) for s in scenarios]
+        entries = [(s, line, estimate_tokens(line)) for s, line in zip(scenarios, lines)]
+        full_tokens = estimate_tokens("\n".join(lines))
+        # 조회 중인 스레드가 항상 일관된 색인을 보도록 한 번에 교체
+        self._index = (entries, idf, postings, full_tokens)
+        self.version = version
+
+    def rank(self, message):
+        """(항목 인덱스, 유사도) 목록을 유사도 내림차순으로 반환합니다. (유사도 0인 항목 제외)"""
+        entries, idf, postings, _ = self._index
+        query = {gram: tf * idf[gram] for gram, tf in Counter(_bigrams(message)).items() if gram in idf}
+        norm = math.sqrt(sum(w * w for w in query.values())) or 1.0
+
+        scores = {}
+        for gram, qw in query.items():
+            for i, dw in postings[gram]:
+                scores[i] = scores.get(i, 0.0) + qw / norm * dw
+        return sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+
+    def select(self, message):
+        """
+        [관련 항목 선택]
+        유사도 상위 항목을 top_k개, 누적 토큰이 token_budget을 넘지 않는 범위에서 고르고
+        위협 점수 상위 pinned개를 더합니다. 최고 유사도가 min_similarity 미만이면 뱅크 전체를 반환합니다.
+        반환값: 선택된 뱅크 항목 리스트 (뱅크 등록 순서 유지)
+        """
+        entries = self._index[0]
+        ranked = self.rank(message)
+        if not ranked or ranked[0][1] < self.min_similarity:
+            return [entry[0] for entry in entries]
+
+        chosen, used = [], 0
+        for i, _ in ranked:
+            if len(chosen) >= self.top_k:
+                break
+            tokens = entries[i][2]
+            if used + tokens > self.token_budget:
+                continue
+            chosen.append(i)
+            used += tokens
+        # 고위험 수법은 예산과 관계없이 포함 (검색이 놓쳐도 신규 등록으로 중복되지 않도록)
+        by_severity = sorted(range(len(entries)), key=lambda i: (-_severity(entries[i][0]), i))
+        chosen.extend(i for i in by_severity[:self.pinned] if i not in chosen)
+        return [entries[i][0] for i in sorted(chosen)]
+
+    def full_bank_tokens(self):
+        """뱅크 전체를 프롬프트에 넣을 경우의 추정 토큰 수"""
+        return self._index[3]
+
+
+def load_labeled_messages(path):
+    """final_dataset.json 형식의 파일에서 (문자, 정답 intent_id) 쌍을 읽습니다."""
+    if not os.path.exists(path):
+        print(f"[!] 파일을 찾을 수 없습니다: {path}")
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [(d["generated_message"], d["intent_analysis"]["matched_intent_id"])
+                for d in json.load(f) if d.get("generated_message") and d.get("intent_analysis")]
+
+
+def load_labeled_profiles(db, sources=("llm",)):
+    """
+    DB의 의도 프로파일(intent_profiles)에서 (문자, 정답 intent_id) 쌍을 읽습니다.
+    GPT가 직접 판정한 결과(match_source가 sources에 포함)만 사용하며, 문자 기준으로 중복을 제거합니다.
+    """
+    from src.utils import loads
+    if db.mode == 'supabase':
+        rows = db.supabase.table('intent_profiles').select('message, matched_intent_id, result_json').execute().data
+        rows = [(r['message'], r['matched_intent_id'], r['result_json']) for r in rows]
+    else:
+        rows = db.cursor.execute("SELECT message, matched_intent_id, result_json FROM intent_profiles").fetchall()
+    labeled = {}
+    for message, intent_id, result_json in rows:
+        if message and intent_id and loads(result_json or '{}').get("match_source") in sources:
+            labeled.setdefault(message, intent_id)
+    return list(labeled.items())
+
+
+def evaluate_retrieval(retriever, labeled):
+    """
+    [검색 단계 평가]
+    정답 intent_id가 선택된 항목에 포함되는 비율(recall@k)과
+    뱅크 요약의 프롬프트 토큰 절감률을 계산합니다. 뱅크에 없는 정답은 제외합니다.
+    """
+    known_ids = {s["intent_id"] for s, _, _ in retriever._index[0]}
+    samples = [(m, label) for m, label in labeled if label in known_ids]
+    full_tokens = retriever.full_bank_tokens()
+
+    hits, fallbacks, selected_tokens = 0, 0, []
+    bank_size = len(known_ids)
+    for message, label in samples:
+        selected = retriever.select(message)
+        hits += any(s["intent_id"] == label for s in selected)
+        fallbacks += len(selected) == bank_size
+        selected_tokens.append(estimate_tokens("\n".join(render_scenario(s) for s in selected)))
+
+    mean_selected = sum(selected_tokens) / len(selected_tokens) if selected_tokens else 0.0
+    return {
+        "samples": len(samples),
+        "skipped_unknown_label": len(labeled) - len(samples),
+        "top_k": retriever.top_k,
+        "token_budget": retriever.token_budget,
+        "recall_at_k": hits / len(samples) if samples else 0.0,
+        "full_bank_fallback_rate": fallbacks / len(samples) if samples else 0.0,
+        "full_bank_tokens": full_tokens,
+        "mean_selected_tokens": mean_selected,
+        "token_reduction": 1 - mean_selected / full_tokens if full_tokens else 0.0
+    }
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+    sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+    from src.scenario_store import ScenarioBankStore
+
+    data_dir = os.path.join(os.path.dirname(__file__), "../data")
+    # --from-db: 대량 의도 분석(intent_profiles)에서 GPT가 판정한 문자를 평가 세트로 사용하고 실제 뱅크로 평가
+    from_db = "--from-db" in sys.argv
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+
+    if from_db:
+        from database_manager import DBManager
+        store = ScenarioBankStore()
+        labeled = load_labeled_profiles(DBManager())
+    else:
+        labeled_path = args[0] if args else os.path.join(data_dir, "final_dataset.json")
+        # 실제 뱅크 DB를 건드리지 않도록 JSON 뱅크로 임시 저장소를 구성
+        store = ScenarioBankStore(db_path=os.path.join(tempfile.mkdtemp(), "scenario_bank.db"),
+                                  seed_json_path=os.path.join(data_dir, "scenario_bank.json"))
+        labeled = load_labeled_messages(labeled_path)
+
+    print(f"[*] 뱅크 {len(store.all())}건, 평가 문자 {len(labeled)}건")
+    for top_k in (3, 5, 8):
+        retriever = BankRetriever(top_k=top_k)
+        retriever.fit(store.all(), store.version())
+        print(f"    -> {json.dumps(evaluate_retrieval(retriever, labeled), ensure_ascii=False)}")
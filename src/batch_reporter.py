@@ -0,0 +1,195 @@
+import os
+import json
+import time
+import random
+import zipfile
+from collections import deque
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from src.rate_limiter import TokenBucket
+
+FAILED_PREFIX = "리포트 내용 생성 실패"
+# fmt="pdf"는 문서 전체를 메모리에 만든 뒤 기록하므로 이보다 많으면 zip을 권장
+COMBINED_PDF_WARN_REPORTS = 100
+
+
+class BatchReportPipeline:
+    """
+    [Batch Report Pipeline]
+    주간 보안 권고용 일괄 리포트 생성기 (SecurityReportGenerator 기반).
+    1. DBManager에서 기간 내 고위험 프로파일(위협 점수 min_severity 이상)을 조회
+    2. 리포트 본문을 제한된 동시성(max_concurrency, rate_per_sec)으로 생성
+    3. PDF를 프로세스 풀에서 렌더링하여 ZIP에 한 건씩 기록 (또는 섹션별 PDF 한 부로 묶음)
+    ZIP 출력은 모든 단계가 입력 순서대로 스트리밍되므로 리포트 수가 늘어도 메모리 사용량이 일정합니다.
+    섹션별 PDF 한 부(fmt="pdf")는 fpdf2가 문서 전체를 메모리에 구성하므로 리포트 수에 비례하여 메모리를 사용합니다.
+    """
+
+    def __init__(self, reporter, max_concurrency=4, rate_per_sec=2, render_workers=None, max_retries=2):
+        self.reporter = reporter
+        self.max_concurrency = max_concurrency
+        self.render_workers = render_workers
+        self.max_retries = max_retries
+        self.rate_limiter = TokenBucket(rate_per_sec)
+        self.stats = {"candidates": 0, "generated": 0, "failed": 0, "retries": 0}
+
+    @staticmethod
+    def build_inputs(profile, period_label):
+        """프로파일 하나를 generate_report_content 입력(news_item, attack_info, analysis_result)으로 변환"""
+        analysis = {**profile.get("result", {})}
+        for key in ("intent_name", "severity_score", "threat_level"):
+            if profile.get(key) is not None:
+                analysis[key] = profile[key]
+        news_item = {"context": {"news_title": f"{period_label} 고위험 스미싱 시나리오 주간 보안 권고"}, "raw_text": ""}
+        attack_info = {
+            "strategy": {"strategy_name": analysis.get("intent_name", "미분류")},
+            "message": profile["message"]
+        }
+        return news_item, attack_info, analysis
+
+    def _generate(self, profile, period_label):
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            # generate_report_content는 API 오류를 예외 대신 실패 문구로 반환함
+            content = self.reporter.generate_report_content(*self.build_inputs(profile, period_label))
+            if not content.startswith(FAILED_PREFIX):
+                return content
+            if attempt < self.max_retries:
+                self.stats["retries"] += 1
+                time.sleep(0.5 * (2 ** attempt) + random.uniform(0, 0.1))
+        return None
+
+    def generate_contents(self, profiles, period_label):
+        """
+        리포트 본문을 동시에 생성하여 (프로파일, 본문)을 입력 순서대로 내보냅니다.
+        생성에 실패한 프로파일은 건너뜁니다.
+        """
+        window = self.max_concurrency * 2
+        pending = deque()
+
+        def collect(profile, future):
+            content = future.result()
+            self.stats["candidates"] += 1
+            if content is None:
+                self.stats["failed"] += 1
+                print(f"    [!] 리포트 생성 실패: {profile.get('intent_name')} / {profile['message'][:30]}")
+                return None
+            self.stats["generated"] += 1
+            return profile, content
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            for profile in profiles:
+                pending.append((profile, executor.submit(self._generate, profile, period_label)))
+                if len(pending) >= window:
+                    item = collect(*pending.popleft())
+                    if item:
+                        yield item
+            while pending:
+                item = collect(*pending.popleft())
+                if item:
+                    yield item
+
+    def write_zip(self, profiles, out_path, period_label):
+        """
+        리포트마다 PDF 한 개를 ZIP에 기록합니다. PDF는 생성되는 즉시 기록되고 메모리에서 해제됩니다.
+        마지막에 목록(manifest.json)을 함께 기록합니다.
+        """
+        manifest = []
+        generated = self.generate_contents(profiles, period_label)
+        # 렌더링 입력으로 본문만 넘기고, 메타데이터는 순서대로 따로 보관
+        queued = deque()
+
+        def contents():
+            for profile, content in generated:
+                queued.append(profile)
+                yield content
+
+        engine = self.reporter.pdf_engine
+        # PDF는 이미 압축되어 있으므로 ZIP은 무압축(STORED)으로 기록
+        with zipfile.ZipFile(out_path, "w", compression=zipfile.ZIP_STORED) as zf:
+            for index, pdf_bytes in enumerate(engine.render_stream(contents(), max_workers=self.render_workers), 1):
+                profile = queued.popleft()
+                file_name = f"{index:03d}_{profile.get('matched_intent_id') or 'UNKNOWN'}.pdf"
+                zf.writestr(file_name, pdf_bytes)
+                manifest.append({
+                    "file": file_name,
+                    "intent_name": profile.get("intent_name"),
+                    "severity_score": profile.get("severity_score"),
+                    "threat_level": profile.get("threat_level"),
+                    "message": profile["message"],
+                    "analyzed_at": profile.get("analyzed_at")
+                })
+            zf.writestr("manifest.json", json.dumps(manifest, ensure_ascii=False, indent=4))
+        return manifest
+
+    def write_combined_pdf(self, profiles, out_path, period_label):
+        """
+        모든 리포트를 섹션으로 묶은 PDF 한 부를 기록합니다. (폰트가 한 번만 임베딩되어 용량이 작음)
+        본문 생성은 스트리밍되지만 PDF는 fpdf2 특성상 문서 전체를 메모리에 만든 뒤 기록합니다.
+        리포트가 많으면 리포트별로 스트리밍 기록하는 write_zip을 사용하세요.
+        """
+        sections = []
+
+        def contents():
+            for profile, content in self.generate_contents(profiles, period_label):
+                sections.append(profile.get("intent_name"))
+                yield content
+
+        pdf_bytes = self.reporter.pdf_engine.render_combined(contents())
+        with open(out_path, "wb") as f:
+            f.write(pdf_bytes)
+        return sections
+
+    def run(self, db, out_path, days=7, min_severity=4, fmt="zip"):
+        """
+        [주간 리포트 일괄 생성]
+        최근 days일 동안 기록된 고위험 시나리오의 리포트를 out_path에 기록합니다.
+        fmt: "zip" (리포트별 PDF, 스트리밍) 또는 "pdf" (섹션별 PDF 한 부, 전체를 메모리에 구성 - 소량 배치용)
+        """
+        since = datetime.now() - timedelta(days=days)
+        period_label = f"{since.strftime('%Y.%m.%d')}~{datetime.now().strftime('%Y.%m.%d')}"
+        profiles = db.fetch_high_severity_profiles(since.isoformat(), min_severity=min_severity)
+        print(f"[*] 리포트 대상 고위험 시나리오: {len(profiles)}건 ({period_label}, 위협 점수 {min_severity} 이상)")
+        if not profiles:
+            return {**self.stats, "out_path": None}
+
+        if os.path.dirname(out_path):
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+
+        started_at = time.perf_counter()
+        if fmt == "zip":
+            self.write_zip(profiles, out_path, period_label)
+        elif fmt == "pdf":
+            if len(profiles) > COMBINED_PDF_WARN_REPORTS:
+                print(f"[!] 리포트 {len(profiles)}건을 PDF 한 부로 묶으면 문서 전체가 메모리에 올라갑니다. "
+                      f"대량 배치는 --format zip(스트리밍)을 권장합니다.")
+            self.write_combined_pdf(profiles, out_path, period_label)
+        else:
+            raise ValueError(f"지원하지 않는 출력 형식입니다: {fmt} (zip/pdf)")
+
+        report = {**self.stats, "out_path": out_path, "elapsed_sec": time.perf_counter() - started_at}
+        print(f"[*] 주간 리포트 생성 완료: {report}")
+        return report
+
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+    sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+    from database_manager import DBManager
+    from src.report_generator import SecurityReportGenerator
+
+    parser = argparse.ArgumentParser(description="주간 고위험 시나리오 보안 리포트 일괄 생성")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--min-severity", type=int, default=4)
+    parser.add_argument("--format", default="zip", choices=["zip", "pdf"],
+                        help="zip: 리포트별 PDF를 스트리밍 기록 (대량 배치용) / pdf: 섹션별 PDF 한 부 (전체를 메모리에 구성, 소량 배치용)")
+    parser.add_argument("--out", default=None)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    out_path = args.out or os.path.join("reports", f"weekly_reports_{datetime.now().strftime('%Y%m%d')}.{args.format}")
+    pipeline = BatchReportPipeline(SecurityReportGenerator(), max_concurrency=args.concurrency,
+                                   render_workers=args.workers)
+    pipeline.run(DBManager(), out_path, days=args.days, min_severity=args.min_severity, fmt=args.format)
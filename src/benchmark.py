@@ -0,0 +1,195 @@
+import os
+import json
+import time
+import argparse
+import tempfile
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils import iter_jsonl
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "../data")
+
+
+def summarize(latencies_ms):
+    """지연 시간 목록(ms)의 요약 통계를 반환합니다."""
+    if not latencies_ms:
+        return {"count": 0}
+    ordered = sorted(latencies_ms)
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.mean(ordered),
+        "p50_ms": ordered[len(ordered) // 2],
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max_ms": ordered[-1]
+    }
+
+
+def load_benchmark_messages(limit=None):
+    """평가/생성 데이터셋에서 스미싱 문자를 모읍니다."""
+    messages = []
+    with open(os.path.join(DATA_DIR, "final_dataset.json"), "r", encoding="utf-8") as f:
+        messages.extend(d["generated_message"] for d in json.load(f))
+    with open(os.path.join(DATA_DIR, "test_dataset.json"), "r", encoding="utf-8") as f:
+        messages.extend(d["text"] for d in json.load(f) if d["label"] == 1)
+    return messages[:limit] if limit else messages
+
+
+def run_pipeline_benchmark(messages, analyzer=None, detector=None, reporter=None, workers=1):
+    """
+    [파이프라인 벤치마크]
+    문자 하나당 분석(IntentAnalyzer) -> 탐지(SmishingDetector) -> 리포트(SecurityReportGenerator)를
+    수행하고 단계별 지연 시간과 전체 처리량을 측정합니다. None인 단계는 건너뜁니다.
+    """
+    news_item = next(iter_jsonl(os.path.join(DATA_DIR, "smishing_context_data.jsonl")))
+    stages = {"analysis": [], "detection": [], "report_content": [], "report_pdf": []}
+    errors = {"count": 0}
+
+    def timed(stage, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        stages[stage].append((time.perf_counter() - start) * 1000)
+        return result
+
+    def process(message):
+        try:
+            intent = timed("analysis", analyzer.analyze_intent, message) if analyzer else {}
+            if detector:
+                timed("detection", detector.predict, message)
+            if reporter:
+                attack_info = {"strategy": {"strategy_name": intent.get("intent_name", "벤치마크")}, "message": message}
+                content = timed("report_content", reporter.generate_report_content, news_item, attack_info, intent)
+                timed("report_pdf", reporter.create_pdf_report, content)
+        except Exception as e:
+            errors["count"] += 1
+            print(f"[!] 처리 실패: {e}")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(process, messages))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "messages": len(messages),
+        "workers": workers,
+        "errors": errors["count"],
+        "elapsed_sec": elapsed,
+        "throughput_msg_per_sec": len(messages) / elapsed if elapsed else 0.0,
+        "stages": {name: summarize(values) for name, values in stages.items() if values}
+    }
+
+
+def load_labeled_texts(file_name="train_dataset.json"):
+    """(text, label) 목록. 진화 학습의 리플레이 데이터(test_dataset.json)와 겹치지 않는 세트를 망각 측정에 사용"""
+    with open(os.path.join(DATA_DIR, file_name), "r", encoding="utf-8") as f:
+        return [(d["text"], d["label"]) for d in json.load(f)]
+
+
+def evaluate_detector(detector, labeled, attacks):
+    """정상/스미싱 정확도와 진화 대상 공격 문자의 탐지율"""
+    predictions = [(detector.predict(text)["is_smishing"], label) for text, label in labeled]
+    ham = [pred for pred, label in predictions if label == 0]
+    spam = [pred for pred, label in predictions if label == 1]
+    return {
+        "accuracy": sum(pred == bool(label) for pred, label in predictions) / len(predictions),
+        "ham_accuracy": sum(not pred for pred in ham) / len(ham) if ham else None,
+        "spam_recall": sum(spam) / len(spam) if spam else None,
+        "attack_detection": sum(detector.predict(text)["is_smishing"] for text in attacks) / len(attacks)
+    }
+
+
+def run_evolution_benchmark(detector_factory, modes=("full", "fast"), limit=10, **trainer_options):
+    """
+    [진화 모드 벤치마크]
+    모드마다 새로 불러온 탐지 모델을 같은 공격 문자(final_dataset.json)로 진화시키고
+    학습 시간과 진화 전후 성능(망각: 별도 세트 정확도 하락)을 비교합니다. 모델 파일은 저장하지 않습니다.
+    trainer_options: SmishingTrainer 메모리 설정 (precision, accumulation_steps, micro_batch_size, gradient_checkpointing)
+    """
+    from src.trainer import SmishingTrainer
+
+    with open(os.path.join(DATA_DIR, "final_dataset.json"), "r", encoding="utf-8") as f:
+        vulnerabilities = json.load(f)[:limit]
+    attacks = [v["generated_message"] for v in vulnerabilities]
+    labeled = load_labeled_texts()
+    data_path = os.path.join(tempfile.mkdtemp(), "vulnerabilities.json")
+    with open(data_path, "w", encoding="utf-8") as f:
+        json.dump(vulnerabilities, f, ensure_ascii=False)
+
+    results = {}
+    for mode in modes:
+        detector = detector_factory()
+        before = evaluate_detector(detector, labeled, attacks)
+        trainer = SmishingTrainer(detector, mode=mode, **trainer_options)
+        start = time.perf_counter()
+        train_report = trainer.train_on_vulnerabilities(data_path, save=False)
+        train_sec = time.perf_counter() - start
+        after = evaluate_detector(detector, labeled, attacks)
+        results[mode] = {
+            "train_sec": train_sec,
+            "trainable_params": sum(p.numel() for group in trainer.optimizer.param_groups for p in group["params"]),
+            "before": before,
+            "after": after,
+            "forgetting": before["accuracy"] - after["accuracy"],
+            "train_report": train_report
+        }
+        if trainer.split is not None:
+            results[mode]["feature_cache"] = dict(trainer.split.cache.stats)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="분석+탐지+리포트 파이프라인 처리량 측정 (--evolution: 진화 모드 비교)")
+    parser.add_argument("--llm-mode", default="replay", choices=["live", "record", "replay"])
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--skip-detector", action="store_true")
+    parser.add_argument("--skip-report", action="store_true")
+    parser.add_argument("--campaign", action="store_true",
+                        help="탐지 앞단에 캠페인 군집화(MinHash-LSH) 단계를 둠")
+    parser.add_argument("--indicators", action="store_true",
+                        help="탐지 앞단에 지표 추출 + 평판 색인 대조 단계를 둠")
+    parser.add_argument("--evolution", default=None,
+                        help="진화 모드 비교만 실행 (예: full,fast,adapter)")
+    parser.add_argument("--evolution-limit", type=int, default=10)
+    parser.add_argument("--precision", default=None, choices=["auto", "bf16", "fp32"])
+    parser.add_argument("--accumulation-steps", type=int, default=None)
+    parser.add_argument("--micro-batch", type=int, default=None)
+    parser.add_argument("--grad-checkpointing", action="store_true")
+    args = parser.parse_args()
+
+    if args.evolution:
+        from src.detector import SmishingDetector
+        report = run_evolution_benchmark(SmishingDetector, modes=args.evolution.split(","), limit=args.evolution_limit,
+                                         precision=args.precision, accumulation_steps=args.accumulation_steps,
+                                         micro_batch_size=args.micro_batch,
+                                         gradient_checkpointing=args.grad_checkpointing or None)
+        print(json.dumps(report, ensure_ascii=False, indent=4))
+    else:
+        # 클라이언트 생성 전에 모드를 지정해야 함
+        os.environ["LLM_CLIENT_MODE"] = args.llm_mode
+
+        from src.intent_analyzer import IntentAnalyzer
+        from src.scenario_store import ScenarioBankStore
+
+        # 응답 캐시를 끄고 LLM 경로 자체를 측정. 신규 수법 등록이 실제 뱅크를 바꾸지 않도록 임시 저장소 사용
+        bank_store = ScenarioBankStore(db_path=os.path.join(tempfile.mkdtemp(), "scenario_bank.db"))
+        analyzer = IntentAnalyzer(use_cache=False, bank_store=bank_store)
+
+        detector = None
+        if not args.skip_detector:
+            from src.detector import SmishingDetector
+            detector = SmishingDetector()
+            if args.campaign:
+                from src.campaign_cluster import CampaignDetector
+                detector = CampaignDetector(detector)
+            if args.indicators:
+                from src.indicators import IndicatorGuard, ReputationIndex
+                detector = IndicatorGuard(detector, ReputationIndex.load_if_exists())
+
+        reporter = None
+        if not args.skip_report:
+            from src.report_generator import SecurityReportGenerator
+            reporter = SecurityReportGenerator(use_cache=False)
+
+        report = run_pipeline_benchmark(load_benchmark_messages(args.limit), analyzer, detector, reporter, workers=args.workers)
+        print(json.dumps(report, ensure_ascii=False, indent=4))
@@ -0,0 +1,111 @@
+import os
+import json
+import time
+import random
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from src.rate_limiter import TokenBucket
+
+
+class BulkIntentAnalyzer:
+    """
+    [Bulk Intent Analyzer]
+    수천 건의 문자를 IntentAnalyzer로 동시에 분석하는 백필(backfill) 도구.
+    - max_concurrency: 동시에 진행되는 분석 요청 수 상한
+    - rate_per_sec: API 쿼터에 맞춘 초당 요청 수 (토큰 버킷)
+    - max_retries: 실패 시 지수 백오프 재시도 횟수
+    결과는 입력 순서대로 스트리밍되며, 진행 중인 작업 수가 제한되므로 입력이 커도 메모리가 일정합니다.
+    """
+
+    def __init__(self, analyzer, max_concurrency=8, rate_per_sec=5, max_retries=3):
+        self.analyzer = analyzer
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.rate_limiter = TokenBucket(rate_per_sec)
+        self.stats = {"total": 0, "succeeded": 0, "failed": 0, "retries": 0}
+
+    def _analyze_with_retry(self, message):
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                return self.analyzer.analyze_intent(message), None
+            except Exception as e:
+                if attempt == self.max_retries:
+                    return None, str(e)
+                self.stats["retries"] += 1
+                time.sleep(0.5 * (2 ** attempt) + random.uniform(0, 0.1))
+
+    def analyze_stream(self, messages):
+        """
+        문자들을 동시에 분석하고 (index, message, result, error)를 입력 순서대로 내보냅니다.
+        실패한 문자는 result=None, error=오류 메시지입니다.
+        """
+        window = self.max_concurrency * 2  # 앞선 결과를 기다리는 동안 미리 처리해 둘 작업 수
+        pending = deque()
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            for index, message in enumerate(messages):
+                pending.append((index, message, executor.submit(self._analyze_with_retry, message)))
+                if len(pending) >= window:
+                    yield self._collect(*pending.popleft())
+            while pending:
+                yield self._collect(*pending.popleft())
+
+    def _collect(self, index, message, future):
+        result, error = future.result()
+        self.stats["total"] += 1
+        self.stats["succeeded" if result is not None else "failed"] += 1
+        return index, message, result, error
+
+    def run(self, messages, db=None, source="bulk", flush_size=50):
+        """
+        [대량 분석 실행]
+        분석 결과를 flush_size 단위로 DB(intent_profiles)에 기록하며 진행합니다.
+        반환값: 처리 통계
+        """
+        buffer = []
+        started_at = time.perf_counter()
+
+        for index, message, result, error in self.analyze_stream(messages):
+            if error:
+                print(f"    [!] #{index} 분석 실패: {error}")
+                continue
+            buffer.append({"source": source, "message": message, "result": result})
+            if db and len(buffer) >= flush_size:
+                db.insert_intent_profiles_bulk(buffer)
+                buffer = []
+            if (index + 1) % 100 == 0:
+                print(f"    -> {index + 1}건 처리 완료")
+
+        if db and buffer:
+            db.insert_intent_profiles_bulk(buffer)
+
+        elapsed = time.perf_counter() - started_at
+        report = {**self.stats, "elapsed_sec": elapsed,
+                  "throughput_msg_per_sec": self.stats["total"] / elapsed if elapsed else 0.0}
+        print(f"[*] 대량 의도 분석 완료: {report}")
+        return report
+
+
+def load_dataset_messages(path):
+    """final_dataset.json 형식(generated_message 필드)의 파일에서 문자를 읽습니다."""
+    if not os.path.exists(path):
+        print(f"[!] 파일을 찾을 수 없습니다: {path}")
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [d["generated_message"] for d in json.load(f) if d.get("generated_message")]
+
+
+if __name__ == "__main__":
+    import sys
+    sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+    from database_manager import DBManager
+    from src.intent_analyzer import IntentAnalyzer
+
+    db = DBManager()
+    bulk = BulkIntentAnalyzer(IntentAnalyzer(), max_concurrency=8, rate_per_sec=5)
+
+    bulk.run(db.fetch_attack_messages(), db=db, source="attack_logs")
+    dataset_path = os.path.join(os.path.dirname(__file__), "../data/final_dataset.json")
+    bulk.run(load_dataset_messages(dataset_path), db=db, source="final_dataset")
@@ -0,0 +1,299 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.tracing import span, incr
+from src.campaign_cluster import normalize_message
+from src.indicators import extract_indicators, SHORT_LINK_HOSTS
+
+# 단축 URL 서비스 도메인처럼 정상 문자에도 흔한 지표는 급증 키에서 제외
+SKIPPED_INDICATOR_TYPES = ("short_link", "ip_url")
+
+
+class CountMinSketch:
+    """
+    [Count-Min Sketch]
+    depth x width 고정 크기 카운터. 추정값은 실제 빈도 이상이며 (과대 추정만 발생)
+    오차는 전체 건수 / width 수준입니다.
+    행별 열 번호는 64비트 키 해시의 두 절반으로 만든 이중 해싱 (h1 + i * h2)이므로
+    두 키가 모든 행에서 충돌하려면 두 절반이 모두 같아야 합니다.
+    """
+
+    def __init__(self, width=1 << 14, depth=4):
+        self.width = width
+        self.depth = depth
+        self.rows = np.arange(depth)
+        self.steps = np.arange(depth, dtype=np.uint64)
+
+    def columns(self, hashes):
+        """64비트 키 해시 (n,) -> 행별 열 번호 (n, depth)"""
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        return ((h1[:, None] + self.steps * h2[:, None]) % np.uint64(self.width)).astype(np.intp)
+
+
+def burst_keys(text, indicators=None):
+    """
+    문자의 급증 감시 키 목록 [(유형, 값)]: 정규화된 문구(템플릿)와 URL/도메인/번호 지표.
+    indicators를 넘기면 (IndicatorGuard 결과 등) 추출을 생략합니다.
+    """
+    keys = [("template", normalize_message(text))]
+    if indicators is None:
+        indicators = extract_indicators(text)
+    for indicator in indicators:
+        kind, value = indicator["type"], indicator["value"]
+        if kind in SKIPPED_INDICATOR_TYPES or (kind == "domain" and value in SHORT_LINK_HOSTS):
+            continue
+        keys.append((kind, value))
+    return keys
+
+
+def key_hash(kind, value):
+    return int.from_bytes(hashlib.blake2b(f"{kind}:{value}".encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class BurstDetector:
+    """
+    [Burst Detector]
+    SmishingDetector와 나란히 동작하는 스트리밍 캠페인 급증 탐지기.
+    시간 구간(slot_sec)마다 Count-Min Sketch 하나를 두는 고정 크기 링 버퍼로
+    최근 window_sec 동안의 키별 건수와 그 이전 기간(history_sec)의 평균 건수를 추정합니다.
+    - 급증 조건: 창 건수 >= min_count 이고 창 건수 >= ratio x 이전 기간 기준 예상 건수
+    - 같은 키는 cooldown_sec 동안 다시 경보하지 않음
+    - 이전 기간이 창 길이만큼 쌓이기 전(기동 직후)에는 평소에 많은 키와 급증을 구분할 수 없으므로 경보하지 않음
+      (cold_start=True이면 이 기간에도 min_count만으로 판정)
+    - 늦게 도착한 문자는 링 버퍼에 남아 있는 원래 구간에 반영하고, 그보다 오래된 문자는 버림
+    - 경보는 on_alert 콜백(예: DBManager.insert_campaign_alert)으로 전달하고 observe()의 반환값에도 포함
+    메모리 사용량: (history_sec / slot_sec) x depth x width x 4바이트 (기본값 약 15MB)
+    """
+
+    def __init__(self, window_sec=600, slot_sec=60, history_sec=3600, min_count=200, ratio=5.0,
+                 cooldown_sec=None, width=1 << 14, depth=4, on_alert=None, max_cooldowns=100000, cold_start=False):
+        if window_sec % slot_sec or history_sec % slot_sec or history_sec <= window_sec:
+            raise ValueError("window_sec/history_sec는 slot_sec의 배수이고 history_sec > window_sec이어야 합니다.")
+        self.sketch = CountMinSketch(width, depth)
+        self.slot_sec = slot_sec
+        self.window_sec = window_sec
+        self.window_slots = window_sec // slot_sec
+        self.num_slots = history_sec // slot_sec
+        self.tables = np.zeros((self.num_slots, depth, width), dtype=np.uint32)
+        self.slot_ids = np.full(self.num_slots, -1, dtype=np.int64)  # 링 위치별 구간 번호 (-1: 비어 있음)
+        self.current_slot = None
+        self.first_slot = None
+        self.min_count = min_count
+        self.ratio = ratio
+        self.cooldown_sec = window_sec if cooldown_sec is None else cooldown_sec
+        self.max_cooldowns = max_cooldowns
+        self.cooldowns = OrderedDict()  # 키 해시 -> 마지막 경보 시각
+        self.on_alert = on_alert
+        self.cold_start = cold_start
+        self.lock = threading.Lock()
+        self.stats = {"messages": 0, "keys": 0, "alerts": 0, "late_dropped": 0}
+
+    def _advance(self, slot):
+        """새 구간으로 이동하며 링 버퍼에서 만료된 구간을 비웁니다."""
+        if self.first_slot is None or slot < self.first_slot:
+            self.first_slot = slot
+        if self.current_slot is not None and slot <= self.current_slot:
+            return
+        start = slot - self.num_slots + 1 if self.current_slot is None else max(self.current_slot + 1, slot - self.num_slots + 1)
+        for s in range(start, slot + 1):
+            position = s % self.num_slots
+            self.tables[position] = 0
+            self.slot_ids[position] = s
+        self.current_slot = slot
+
+    def _estimate(self, columns):
+        """
+        키별 (창 건수, 이전 기간 건수, 이전 기간 구간 수).
+        구간마다 행 최솟값(Count-Min 추정)을 구한 뒤 합산하므로 구간 합을 먼저 더하는 것보다 오차가 작습니다.
+        """
+        counts = self.tables[:, self.sketch.rows, columns]       # (구간, 키, depth)
+        per_slot = counts.min(axis=2).astype(np.int64)            # (구간, 키)
+        age = self.current_slot - self.slot_ids                   # 0: 현재 구간
+        valid = self.slot_ids >= 0
+        in_window = valid & (age < self.window_slots)
+        in_history = valid & (age >= self.window_slots)
+        history_slots = int(min(in_history.sum(), max(0, self.current_slot - self.first_slot - self.window_slots + 1)))
+        return per_slot[in_window].sum(axis=0), per_slot[in_history].sum(axis=0), history_slots
+
+    def observe_many(self, messages, timestamp=None):
+        """
+        같은 시각(기본: 현재)에 도착한 문자 묶음을 반영합니다. 게이트웨이 피드는 묶음 단위 호출이 빠릅니다.
+        messages: 문자열 또는 (문자열, 지표 목록) 튜플의 목록
+        반환값: 새로 발생한 경보 목록
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        labels, hashes, examples = {}, [], {}
+        with span("burst.hash", size=len(messages)):
+            for message in messages:
+                text, indicators = message if isinstance(message, tuple) else (message, None)
+                for kind, value in burst_keys(text, indicators):
+                    h = key_hash(kind, value)
+                    hashes.append(h)
+                    if h not in labels:
+                        labels[h] = (kind, value)
+                        examples[h] = text
+            columns = self.sketch.columns(hashes) if hashes else None
+
+        alerts = []
+        with self.lock:
+            self.stats["messages"] += len(messages)
+            self.stats["keys"] += len(hashes)
+            if columns is None:
+                return alerts
+            slot = int(timestamp // self.slot_sec)
+            if self.current_slot is not None and self.current_slot - slot >= self.num_slots:
+                # 링 버퍼보다 오래된 문자는 어느 구간에도 반영할 수 없음
+                self.stats["late_dropped"] += len(messages)
+                return alerts
+            self._advance(slot)
+            table = self.tables[slot % self.num_slots]
+            np.add.at(table, (self.sketch.rows[None, :], columns), 1)
+
+            unique_hashes = list(labels)
+            unique_columns = self.sketch.columns(unique_hashes)
+            window_counts, history_counts, history_slots = self._estimate(unique_columns)
+            if history_slots < self.window_slots and not self.cold_start:
+                # 기준 기간이 부족하면 예상 건수를 믿을 수 없으므로 경보하지 않음 (건수 반영만)
+                unique_hashes = []
+            for i, h in enumerate(unique_hashes):
+                window_count = int(window_counts[i])
+                if window_count < self.min_count:
+                    continue
+                # 이전 기간 평균을 창 길이로 환산한 예상 건수 (cold_start로 이전 기간 없이 판정하면 0 -> min_count만으로 판정)
+                expected = history_counts[i] / history_slots * self.window_slots if history_slots else 0.0
+                if window_count < self.ratio * expected:
+                    continue
+                last = self.cooldowns.get(h)
+                if last is not None and timestamp - last < self.cooldown_sec:
+                    continue
+                self.cooldowns[h] = timestamp
+                self.cooldowns.move_to_end(h)
+                while len(self.cooldowns) > self.max_cooldowns:
+                    self.cooldowns.popitem(last=False)
+                kind, value = labels[h]
+                alerts.append({
+                    "key_type": kind,
+                    "key_value": value,
+                    "example_msg": examples[h],
+                    "window_count": window_count,
+                    "expected_count": float(expected),
+                    "window_sec": self.window_sec,
+                    "detected_at": timestamp
+                })
+            self.stats["alerts"] += len(alerts)
+
+        for alert in alerts:
+            incr("burst_alerts", key_type=alert["key_type"])
+            print(f"[!] 캠페인 급증 감지: {alert['key_type']}={alert['key_value'][:40]} "
+                  f"({alert['window_count']}건/{self.window_sec}초, 예상 {alert['expected_count']:.1f}건)")
+            if self.on_alert:
+                try:
+                    self.on_alert(alert)
+                except Exception as e:
+                    print(f"[!] 급증 경보 저장 실패: {e}")
+        return alerts
+
+    def observe(self, text, indicators=None, timestamp=None):
+        """문자 한 건을 반영합니다. 반환값: 새로 발생한 경보 목록"""
+        return self.observe_many([(text, indicators)], timestamp)
+
+    def count(self, text=None, kind="template", value=None):
+        """키의 현재 창 건수 추정값 (text를 넘기면 정규화된 문구 키)"""
+        value = normalize_message(text) if text is not None else value
+        with self.lock:
+            if self.current_slot is None:
+                return 0
+            window_counts, _, _ = self._estimate(self.sketch.columns([key_hash(kind, value)]))
+            return int(window_counts[0])
+
+    def get_report(self):
+        with self.lock:
+            return {**self.stats, "memory_mb": self.tables.nbytes / (1024 * 1024)}
+
+
+def synthetic_feed(duration_sec=3600, base_rate=20.0, burst_start=2400, burst_sec=600, burst_rate=10.0, seed=0):
+    """
+    재생용 합성 게이트웨이 피드 [(시각, 문자)]. 다양한 정상/스미싱 문자 배경 트래픽에
+    burst_start부터 burst_sec 동안 하나의 템플릿 변형(이름/숫자/링크만 바뀜)을 초당 burst_rate건 섞습니다.
+    """
+    rng = np.random.RandomState(seed)
+    subjects = ["택배", "결제", "예약", "모임", "카드", "병원", "회의", "주문", "배송", "환불"]
+    actions = ["확인 부탁드려요", "내일 가능할까요", "완료되었습니다", "변경되었습니다", "연락 주세요"]
+    feed = []
+    for second in range(duration_sec):
+        for _ in range(rng.poisson(base_rate)):
+            # 배경 트래픽은 키 공간이 넓음 (같은 문구가 반복되지 않도록 임의 단어 조합)
+            words = " ".join(rng.choice(subjects, 3)) + " " + rng.choice(actions)
+            feed.append((second + rng.rand(), f"{words} {''.join(rng.choice(list('가나다라마바사아자차'), 6))}"))
+        if burst_start <= second < burst_start + burst_sec:
+            for _ in range(rng.poisson(burst_rate)):
+                feed.append((second + rng.rand(),
+                             f"[Web발신] 고객님 택배 주소 불일치로 보관중입니다. 주문번호 {rng.randint(10000, 99999)} "
+                             f"hxxp://parcel-check{rng.randint(1, 9)}[.]com/{rng.randint(1000, 9999)} 에서 확인"))
+    feed.sort(key=lambda item: item[0])
+    return feed
+
+
+def replay(feed, detector, batch_sec=1.0):
+    """피드를 시각 순으로 batch_sec 단위 묶음으로 재생합니다. 반환값: (경보 목록, 초당 처리 건수)"""
+    alerts, batch, batch_time = [], [], None
+    start = time.perf_counter()
+    for timestamp, text in feed:
+        if batch and timestamp - batch_time >= batch_sec:
+            alerts.extend(detector.observe_many(batch, batch_time))
+            batch = []
+        if not batch:
+            batch_time = timestamp
+        batch.append(text)
+    if batch:
+        alerts.extend(detector.observe_many(batch, batch_time))
+    elapsed = time.perf_counter() - start
+    return alerts, len(feed) / elapsed if elapsed else 0.0
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+    import json
+    import argparse
+    sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+    from src.utils import iter_jsonl
+
+    parser = argparse.ArgumentParser(description="캠페인 급증 탐지 재생 (JSONL 피드: {\"timestamp\", \"text\"} 또는 --synthetic)")
+    parser.add_argument("feed", nargs="?", default=None)
+    parser.add_argument("--synthetic", action="store_true", help="합성 트래픽으로 탐지 지연/오경보/처리량 점검")
+    parser.add_argument("--window", type=int, default=600)
+    parser.add_argument("--min-count", type=int, default=200)
+    parser.add_argument("--ratio", type=float, default=5.0)
+    parser.add_argument("--save-alerts", action="store_true", help="경보를 DBManager(campaign_alerts)에 저장")
+    args = parser.parse_args()
+
+    on_alert = None
+    if args.save_alerts:
+        from database_manager import DBManager
+        on_alert = DBManager().insert_campaign_alert
+    detector = BurstDetector(window_sec=args.window, min_count=args.min_count, ratio=args.ratio, on_alert=on_alert)
+
+    if args.synthetic:
+        feed = synthetic_feed()
+        alerts, throughput = replay(feed, detector)
+        burst_alerts = [a for a in alerts if "parcel" in a["example_msg"]]
+        report = {
+            "messages": len(feed),
+            "throughput_msg_per_sec": throughput,
+            "burst_alerts": len(burst_alerts),
+            "false_alerts": len(alerts) - len(burst_alerts),
+            "first_alert_delay_sec": min(a["detected_at"] for a in burst_alerts) - 2400 if burst_alerts else None,
+            **detector.get_report()
+        }
+    else:
+        feed = [(row["timestamp"], row["text"]) for row in iter_jsonl(args.feed)]
+        alerts, throughput = replay(sorted(feed, key=lambda item: item[0]), detector)
+        report = {"messages": len(feed), "throughput_msg_per_sec": throughput, "alerts": alerts, **detector.get_report()}
+    print(json.dumps(report, ensure_ascii=False, indent=4))
@@ -0,0 +1,259 @@
+import re
+import time
+import zlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.tracing import span, incr
+from src.indicators import extract_indicators
+
+# URL/전화번호/숫자는 캠페인 변형마다 바뀌므로 자리표시자로 치환
+URL_PATTERN = re.compile(r"(https?://|www\.)\S+|\b[\w-]+(\.[\w-]+)+/\S*", re.IGNORECASE)
+DIGIT_PATTERN = re.compile(r"\d+")
+NOISE_PATTERN = re.compile(r"[^가-힣a-z#@]")
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+
+def normalize_message(text):
+    """
+    변형 문자가 같은 문자열에 가까워지도록 정규화합니다.
+    (링크 -> '@', 숫자 -> '#', 글자 사이에 끼운 점/슬래시/공백 등 제거)
+    """
+    text = URL_PATTERN.sub("@", text.lower())
+    text = DIGIT_PATTERN.sub("#", text)
+    return NOISE_PATTERN.sub("", text)
+
+
+def link_hosts(text):
+    """문자에 포함된 링크의 호스트(도메인/IP) 집합. 정규화에서 '@'로 지워지는 정보를 따로 보관합니다."""
+    return frozenset(i["value"] for i in extract_indicators(text) if i["type"] in ("domain", "ip_url"))
+
+
+class MinHasher:
+    """문자 n-gram 집합의 MinHash 서명 (num_perm개의 32비트 값). 해시 계수는 seed로 고정되어 프로세스 간에 재현됩니다."""
+
+    def __init__(self, num_perm=64, ngram=3, seed=7):
+        rng = np.random.RandomState(seed)
+        # a*x + b가 uint64 범위를 넘지 않도록 a, b < 2^31 (x는 32비트 crc)
+        self.a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.uint64)
+        self.num_perm = num_perm
+        self.ngram = ngram
+
+    def signature(self, normalized):
+        n = self.ngram
+        if len(normalized) <= n:
+            grams = {normalized}
+        else:
+            grams = {normalized[i:i + n] for i in range(len(normalized) - n + 1)}
+        hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+        permuted = (np.outer(hashes, self.a) + self.b) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+class CampaignCluster:
+    def __init__(self, cluster_id, signature, text, hosts=frozenset()):
+        self.cluster_id = cluster_id
+        self.signature = signature
+        self.example = text
+        self.hosts = hosts           # 대표 문자의 링크 호스트 (판정은 이 링크 기준)
+        self.size = 0
+        self.band_keys = []
+        self.verdict = None          # 대표 판정 (detector.predict 결과)
+        self.verdict_version = None  # 판정 당시 탐지 모델 가중치 버전
+        self.scores = []             # 모델로 채점한 구성원의 스미싱 확률
+        self.reuse = True            # 드리프트가 감지되면 False (이후 구성원은 개별 채점)
+        self.host_verdicts = OrderedDict()  # 정상 판정 군집에서 대표와 다른 링크 호스트 집합 -> (판정, 가중치 버전)
+        self.last_seen = time.time()
+
+    def summary(self):
+        return {
+            "cluster_id": self.cluster_id,
+            "size": self.size,
+            "scored": len(self.scores),
+            "mean_score": float(np.mean(self.scores)) if self.scores else None,
+            "reuse": self.reuse,
+            "example": self.example[:60]
+        }
+
+
+class CampaignDetector:
+    """
+    [Campaign Detector]
+    SmishingDetector 앞단의 스트리밍 MinHash-LSH 군집화 단계.
+    수신 문자를 변형 캠페인 군집에 배정하고, 군집 판정을 재사용하여 트랜스포머 호출을 줄입니다.
+    - 새 군집의 첫 문자, 표본 구성원(2, 4, 8, ... 이후 probe_every번째마다), 판정이 임계값 근처(margin 이내)인 군집은 모델로 채점
+    - 채점 결과가 군집 평균과 drift_tolerance 이상 다르거나 판정이 뒤집히면 재사용을 중단 (이후 개별 채점)
+    - 탐지 모델이 진화하면(weights_version 변경) 군집 판정을 다시 채점
+    - 링크는 정규화에서 '@'로 지워지므로, 정상 판정 군집에 대표 문자와 다른 링크 호스트의 구성원이 오면
+      (정상 안내 문자를 복제하고 링크만 바꾼 경우) 그 호스트 집합을 한 번 모델로 채점하고 군집 안에 따로 보관하여 재사용.
+      이 채점은 군집의 판정/드리프트 통계에 섞지 않음. 스미싱 판정 군집은 도메인을 바꿔 가며 보내는 것이 보통이므로
+      호스트가 달라도 군집 판정을 그대로 재사용
+    predict()는 SmishingDetector.predict와 같은 형식에 "campaign" 항목을 추가하여 반환합니다.
+    """
+
+    def __init__(self, detector, num_perm=64, bands=16, similarity=0.6, probe_every=256,
+                 drift_tolerance=0.15, margin=0.1, max_clusters=50000, max_host_verdicts=64):
+        if num_perm % bands:
+            raise ValueError("num_perm은 bands로 나누어떨어져야 합니다.")
+        self.detector = detector
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.similarity = similarity
+        self.probe_every = probe_every
+        self.drift_tolerance = drift_tolerance
+        self.margin = margin
+        self.max_clusters = max_clusters
+        self.max_host_verdicts = max_host_verdicts
+        self.clusters = OrderedDict()  # 최근 사용 순서 (오래된 군집부터 제거)
+        self.buckets = {}              # (구간 번호, 구간 서명) -> 군집 ID 목록
+        self.next_id = 1
+        self.lock = threading.Lock()
+        self.stats = {"messages": 0, "model_calls": 0, "reused": 0, "clusters_created": 0, "drift_events": 0,
+                      "host_checks": 0}
+
+    def _band_keys(self, signature):
+        return [(i, signature[i * self.rows:(i + 1) * self.rows].tobytes()) for i in range(self.bands)]
+
+    def assign(self, text, hosts=frozenset()):
+        """문자를 군집에 배정합니다. 반환값: (군집, 대표 서명과의 추정 유사도)"""
+        signature = self.hasher.signature(normalize_message(text))
+        keys = self._band_keys(signature)
+        with self.lock:
+            best, best_similarity = None, 0.0
+            seen = set()
+            for key in keys:
+                for cluster_id in self.buckets.get(key, ()):
+                    if cluster_id in seen:
+                        continue
+                    seen.add(cluster_id)
+                    # 추정 자카드 유사도 = 서명이 일치하는 비율
+                    similarity = float(np.mean(self.clusters[cluster_id].signature == signature))
+                    if similarity > best_similarity:
+                        best, best_similarity = self.clusters[cluster_id], similarity
+
+            if best is None or best_similarity < self.similarity:
+                best, best_similarity = self._create(signature, keys, text, hosts), 1.0
+            best.size += 1
+            best.last_seen = time.time()
+            self.clusters.move_to_end(best.cluster_id)
+            return best, best_similarity
+
+    def _create(self, signature, keys, text, hosts):
+        cluster = CampaignCluster(self.next_id, signature, text, hosts)
+        self.next_id += 1
+        cluster.band_keys = keys
+        self.clusters[cluster.cluster_id] = cluster
+        for key in keys:
+            self.buckets.setdefault(key, []).append(cluster.cluster_id)
+        self.stats["clusters_created"] += 1
+        while len(self.clusters) > self.max_clusters:
+            self._evict(next(iter(self.clusters)))
+        return cluster
+
+    def _evict(self, cluster_id):
+        cluster = self.clusters.pop(cluster_id)
+        for key in cluster.band_keys:
+            members = self.buckets.get(key)
+            if members:
+                members.remove(cluster_id)
+                if not members:
+                    del self.buckets[key]
+
+    def _needs_model(self, cluster):
+        if cluster.verdict is None or not cluster.reuse:
+            return True
+        if cluster.verdict_version != getattr(self.detector, "weights_version", 0):
+            return True
+        if abs(cluster.verdict["smishing_score"] - self.detector.threshold) < self.margin:
+            return True  # 경계선 판정은 재사용하지 않음
+        # 초기에는 2, 4, 8, ... 번째 구성원, 이후에는 probe_every번째마다 표본 채점 (드리프트 확인)
+        size = cluster.size
+        return (size < self.probe_every and size & (size - 1) == 0) or size % self.probe_every == 0
+
+    def _record_score(self, cluster, result):
+        version = getattr(self.detector, "weights_version", 0)
+        if cluster.verdict is None or cluster.verdict_version != version:
+            # 첫 채점 또는 모델 진화 후 재채점: 군집 판정과 드리프트 상태를 새로 시작
+            cluster.verdict, cluster.verdict_version, cluster.scores = dict(result), version, []
+            cluster.reuse = True
+        elif cluster.reuse:
+            mean = float(np.mean(cluster.scores))
+            if abs(result["smishing_score"] - mean) > self.drift_tolerance or \
+                    result["is_smishing"] != cluster.verdict["is_smishing"]:
+                cluster.reuse = False
+                self.stats["drift_events"] += 1
+                incr("campaign_drift")
+                print(f"[!] 캠페인 군집 #{cluster.cluster_id} 드리프트 감지: "
+                      f"평균 {mean:.3f} -> {result['smishing_score']:.3f}, 개별 채점으로 전환")
+        cluster.scores.append(result["smishing_score"])
+
+    def predict(self, text):
+        with span("campaign.assign"):
+            hosts = link_hosts(text)
+            cluster, similarity = self.assign(text, hosts)
+
+        version = getattr(self.detector, "weights_version", 0)
+        with self.lock:
+            host_mismatch = hosts != cluster.hosts
+            # 정상 판정(또는 아직 판정 전) 군집에 처음 보는 링크 호스트 -> 군집 판정 대신 호스트 집합별 판정
+            host_variant = host_mismatch and (cluster.verdict is None or not cluster.verdict["is_smishing"])
+            if host_variant:
+                cached = cluster.host_verdicts.get(hosts)
+                verdict = cached[0] if cached and cached[1] == version else None
+                if verdict is not None:
+                    cluster.host_verdicts.move_to_end(hosts)
+                else:
+                    self.stats["host_checks"] += 1
+            else:
+                verdict = None if self._needs_model(cluster) else cluster.verdict
+            self.stats["messages"] += 1
+
+        if verdict is None:
+            result = self.detector.predict(text)
+            with self.lock:
+                if host_variant:
+                    cluster.host_verdicts[hosts] = (dict(result), version)
+                    cluster.host_verdicts.move_to_end(hosts)
+                    while len(cluster.host_verdicts) > self.max_host_verdicts:
+                        cluster.host_verdicts.popitem(last=False)
+                else:
+                    self._record_score(cluster, result)
+                self.stats["model_calls"] += 1
+            incr("campaign_verdicts", source="model")
+            reused = False
+        else:
+            result = {**verdict, "original_text": text, "processed_text": self.detector.preprocess(text)}
+            with self.lock:
+                self.stats["reused"] += 1
+            incr("campaign_verdicts", source="reused")
+            reused = True
+
+        result["campaign"] = {
+            "cluster_id": cluster.cluster_id,
+            "size": cluster.size,
+            "similarity": similarity,
+            "reused_verdict": reused,
+            "host_mismatch": host_mismatch
+        }
+        return result
+
+    def top_campaigns(self, limit=10):
+        """구성원이 많은 군집 요약"""
+        with self.lock:
+            ranked = sorted(self.clusters.values(), key=lambda c: c.size, reverse=True)[:limit]
+            return [c.summary() for c in ranked]
+
+    def get_report(self):
+        with self.lock:
+            messages = self.stats["messages"]
+            return {
+                **self.stats,
+                "active_clusters": len(self.clusters),
+                "model_call_ratio": self.stats["model_calls"] / messages if messages else 0.0
+            }
@@ -0,0 +1,148 @@
+import os
+import json
+import threading
+
+from src.crawl_index import CrawlIndex
+from src.utils import loads
+from src.corpus_store import MappedCorpus
+
+_CORPUS_CACHE = {}
+_CORPUS_LOCK = threading.Lock()
+
+
+class NewsCorpus:
+    """
+    [News Corpus]
+    뉴스 컨텍스트 JSONL 파일의 바이트 오프셋 색인.
+    파일 전체를 메모리에 올리지 않고 줄 위치, 게시 시각(timestamp), 표시용 라벨만 보관합니다.
+    - 최신순 정렬 결과를 미리 계산해 두고 page()/search()로 필요한 만큼만 꺼냅니다.
+    - 본문은 get()으로 요청할 때 해당 줄만 읽어 파싱합니다.
+    - 파일 끝에 기사가 추가된 경우(크롤러 append) 추가된 부분만 이어서 색인합니다.
+    - generation: 파일이 새로 쓰여 처음부터 다시 색인할 때마다 증가 (줄 번호 기반 동기화 상태의 무효화 기준)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offsets = []      # 줄 시작 바이트 위치
+        self.timestamps = []   # 게시 시각 (파싱 실패 시 0 -> 가장 뒤로 정렬)
+        self.labels = []       # "[카테고리] 제목"
+        self.order = []        # 최신순으로 정렬된 줄 번호
+        self.indexed_size = 0
+        self.mtime = None
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.refresh()
+
+    def _scan(self, start, offsets, timestamps, labels):
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            offset = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # 기록 중인 마지막 줄은 다음 갱신 때 색인
+                if line.strip():
+                    try:
+                        context = loads(line).get("context", {})
+                    except json.JSONDecodeError:
+                        context = None
+                    if context is not None:
+                        offsets.append(offset)
+                        timestamps.append(CrawlIndex.pub_timestamp(context.get("source_date")) or 0.0)
+                        labels.append(f"[{context.get('category')}] {context.get('news_title')}")
+                offset += len(line)
+        return offset
+
+    def refresh(self):
+        """
+        파일 변경(mtime/크기)을 확인하여 색인을 갱신합니다.
+        파일이 커지기만 했다면 이어서 색인하고, 줄어들었거나 새로 쓰였다면 처음부터 다시 색인합니다.
+        반환값: 색인이 바뀌었는지 여부
+        """
+        with self.lock:
+            if not os.path.exists(self.path):
+                changed = bool(self.offsets)
+                self.offsets, self.timestamps, self.labels, self.order = [], [], [], []
+                self.indexed_size, self.mtime = 0, None
+                if changed:
+                    self.generation += 1
+                return changed
+
+            stat = os.stat(self.path)
+            if stat.st_mtime == self.mtime and stat.st_size == self.indexed_size:
+                return False
+
+            if stat.st_size < self.indexed_size or not self._prefix_unchanged():
+                # 전체 재색인: 새 목록을 만든 뒤 한 번에 교체하여 조회 중인 세션이 중간 상태를 보지 않도록 함
+                offsets, timestamps, labels = [], [], []
+                self.indexed_size = self._scan(0, offsets, timestamps, labels)
+                self.offsets, self.timestamps, self.labels = offsets, timestamps, labels
+                self.generation += 1
+            else:
+                # 추가된 부분만 이어서 색인 (기존 줄 번호는 그대로 유지)
+                self.indexed_size = self._scan(self.indexed_size, self.offsets, self.timestamps, self.labels)
+            self.mtime = stat.st_mtime
+            self.order = sorted(range(len(self.offsets)), key=lambda i: (-self.timestamps[i], i))
+            return True
+
+    def _prefix_unchanged(self):
+        # 마지막으로 색인한 줄이 그대로 있으면 앞부분은 변경되지 않은 것으로 판단 (append 전용 파일)
+        if not self.offsets:
+            return self.indexed_size == 0
+        with open(self.path, "rb") as f:
+            f.seek(self.offsets[-1])
+            line = f.readline()
+        return self.offsets[-1] + len(line) == self.indexed_size and line.endswith(b"\n")
+
+    def __len__(self):
+        return len(self.order)
+
+    def page(self, page_no, page_size=50):
+        """최신순 page_no(0부터) 페이지의 줄 번호 목록"""
+        start = page_no * page_size
+        return self.order[start:start + page_size]
+
+    def search(self, query, limit=50):
+        """라벨(카테고리/제목)에 검색어가 포함된 기사의 줄 번호를 최신순으로 최대 limit개 반환합니다."""
+        query = query.strip().lower()
+        if not query:
+            return self.page(0, limit)
+        results = []
+        for i in self.order:
+            if query in self.labels[i].lower():
+                results.append(i)
+                if len(results) >= limit:
+                    break
+        return results
+
+    def label(self, index):
+        return self.labels[index]
+
+    def get(self, index):
+        """줄 번호의 기사를 파일에서 읽어 반환합니다."""
+        with open(self.path, "rb") as f:
+            f.seek(self.offsets[index])
+            return loads(f.readline())
+
+    def iter_items(self, start=0):
+        """파일 순서대로 start번째 기사부터 읽어 (줄 번호, 기사)를 내보냅니다. (DB 동기화 등)"""
+        with open(self.path, "rb") as f:
+            for index in range(start, len(self.offsets)):
+                f.seek(self.offsets[index])
+                yield index, loads(f.readline())
+
+
+def get_corpus(path):
+    """
+    프로세스 단위로 캐시된 색인을 반환합니다. (.jsonl -> NewsCorpus, .smc -> MappedCorpus)
+    Streamlit 재실행(rerun)마다 호출해도 파일이 바뀌지 않았다면 stat 한 번으로 끝납니다.
+    """
+    key = os.path.abspath(path)
+    with _CORPUS_LOCK:
+        corpus = _CORPUS_CACHE.get(key)
+        if corpus is None:
+            # .smc: corpus_store로 변환한 메모리 매핑 코퍼스
+            factory = MappedCorpus if path.endswith(".smc") else NewsCorpus
+            corpus = _CORPUS_CACHE[key] = factory(path)
+            return corpus
+    corpus.refresh()
+    return corpus
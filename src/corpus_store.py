@@ -0,0 +1,377 @@
+import os
+import mmap
+import shutil
+import struct
+import tempfile
+import threading
+
+import numpy as np
+
+from src.crawl_index import CrawlIndex
+from src.utils import dumps, dumps_bytes, loads, iter_jsonl, load_json, JsonlWriter
+
+MAGIC = b"SMCORP01"
+HEADER = struct.Struct("<8sQ")  # magic, 메타데이터(JSON) 길이
+ALIGN = 8
+MISSING = -1  # 값이 없는 칸 / 공용 블록이 없는 행
+
+# 셀 종류: 문자열은 UTF-8 그대로, 그 밖의 값(숫자, 리스트 등)은 JSON으로 힙에 저장
+KIND_STR = 0
+KIND_JSON = 1
+
+# 여러 줄이 같은 내용을 반복하는 블록 -> 공용 테이블에 한 번만 저장
+DEFAULT_SHARED_KEYS = ("attack_design",)
+DEFAULT_DATE_FIELD = "context.source_date"
+
+
+def _flatten(record, shared_keys):
+    """
+    {"context": {"a": 1}} -> (("context", "a"), 1) (공용 블록 키는 제외)
+    경로를 튜플로 다루므로 점이 들어간 키("c.d")도 중첩 필드와 구분되며,
+    빈 dict와 None도 값 그대로 한 칸에 저장하여 get()이 원래 레코드와 같아지도록 합니다.
+    """
+    for key, value in record.items():
+        if key in shared_keys:
+            continue
+        if isinstance(value, dict) and value:
+            for sub_key, sub_value in value.items():
+                yield (key, sub_key), sub_value
+        else:
+            yield (key,), value
+
+
+def _column_name(path):
+    """value()에서 쓰는 컬럼 이름 ("context.news_title")"""
+    return ".".join(path)
+
+
+def _field(record, dotted):
+    value = record
+    for part in dotted.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _layout(meta, arrays):
+    """메타데이터 길이가 배열 위치에 영향을 주므로 위치가 변하지 않을 때까지 다시 계산합니다."""
+    meta_bytes = b""
+    while True:
+        position = HEADER.size + len(meta_bytes)
+        for name, array in arrays.items():
+            position += -position % ALIGN
+            meta["arrays"][name] = {"offset": position, "dtype": array.dtype.str, "shape": list(array.shape)}
+            position += array.nbytes
+        meta["heap_offset"] = position + (-position % ALIGN)
+        encoded = dumps_bytes(meta)
+        if len(encoded) == len(meta_bytes):
+            return encoded
+        meta_bytes = encoded
+
+
+def write_corpus(records, out_path, shared_keys=DEFAULT_SHARED_KEYS, date_field=DEFAULT_DATE_FIELD):
+    """
+    [Corpus 변환]
+    레코드(dict) 목록을 메모리 매핑용 바이너리 코퍼스 파일(.smc)로 기록합니다.
+    파일 구조: 헤더 | 메타데이터(JSON: 컬럼, 공용 블록 테이블, 배열 위치) | 행별 배열 | 문자열 힙
+    - 값은 힙에 한 번씩 기록하고 행마다 (오프셋, 길이, 종류)만 보관
+    - shared_keys 블록(attack_design 등)은 중복을 제거한 테이블의 번호로 저장
+    - date_field의 게시 시각과 시각순 정렬 결과를 함께 기록하여 기간 조회에 사용
+    반환값: {"records", "columns", "shared_blocks", "bytes"}
+    """
+    shared_keys = tuple(shared_keys)
+    columns = {}  # 컬럼 경로(튜플) -> 번호 (처음 나온 순서)
+    shared_tables = {key: {} for key in shared_keys}  # 직렬화 문자열 -> 블록 번호
+    rows, shared_ids, timestamps = [], [], []
+
+    out_dir = os.path.dirname(os.path.abspath(out_path))
+    with tempfile.TemporaryFile(dir=out_dir) as heap:
+        position = 0
+        for record in records:
+            cells = []
+            for path, value in _flatten(record, shared_keys):
+                if isinstance(value, str):
+                    data, kind = value.encode("utf-8"), KIND_STR
+                else:
+                    data, kind = dumps_bytes(value), KIND_JSON
+                cells.append((columns.setdefault(path, len(columns)), position, len(data), kind))
+                heap.write(data)
+                position += len(data)
+            rows.append(cells)
+
+            ids = []
+            for key in shared_keys:
+                block = record.get(key)
+                table = shared_tables[key]
+                ids.append(MISSING if block is None else table.setdefault(dumps(block), len(table)))
+            shared_ids.append(ids)
+            timestamps.append(CrawlIndex.pub_timestamp(_field(record, date_field)) or 0.0)
+
+        count = len(rows)
+        offsets = np.zeros((count, len(columns)), dtype="<u8")
+        lengths = np.full((count, len(columns)), MISSING, dtype="<i8")
+        kinds = np.zeros((count, len(columns)), dtype="u1")
+        for i, cells in enumerate(rows):
+            for column, offset, length, kind in cells:
+                offsets[i, column] = offset
+                lengths[i, column] = length
+                kinds[i, column] = kind
+        rows = None
+
+        stamps = np.array(timestamps, dtype="<f8")
+        arrays = {
+            "offsets": offsets,
+            "lengths": lengths,
+            "kinds": kinds,
+            "shared": np.array(shared_ids, dtype="<i4").reshape(count, len(shared_keys)),
+            "timestamps": stamps,
+            "date_order": np.argsort(stamps, kind="stable").astype("<i4"),
+            # 최신순, 같은 시각이면 파일 순서 (NewsCorpus.order와 같은 정렬)
+            "recent_order": np.lexsort((np.arange(count), -stamps)).astype("<i4")
+        }
+        meta = {
+            "count": count,
+            "columns": [_column_name(path) for path in columns],
+            # 컬럼 -> 레코드 안의 경로 (컬럼 이름의 점만으로는 중첩 필드와 점이 든 키를 구분할 수 없음)
+            "paths": [list(path) for path in columns],
+            "shared_keys": list(shared_keys),
+            "shared_tables": [list(shared_tables[key]) for key in shared_keys],
+            "date_field": date_field,
+            "arrays": {}
+        }
+        meta_bytes = _layout(meta, arrays)
+
+        # 임시 파일에 기록한 뒤 교체하여, 읽는 중인 프로세스가 반쯤 쓰인 파일을 보지 않도록 함
+        tmp_path = out_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, len(meta_bytes)))
+            f.write(meta_bytes)
+            for name, array in arrays.items():
+                f.write(b"\0" * (meta["arrays"][name]["offset"] - f.tell()))
+                f.write(array.tobytes())
+            f.write(b"\0" * (meta["heap_offset"] - f.tell()))
+            heap.seek(0)
+            shutil.copyfileobj(heap, f, 1024 * 1024)
+        os.replace(tmp_path, out_path)
+
+    return {
+        "records": count,
+        "columns": len(columns),
+        "shared_blocks": sum(len(table) for table in meta["shared_tables"]),
+        "bytes": os.path.getsize(out_path)
+    }
+
+
+class _CorpusFile:
+    """한 번 연 .smc 파일 (mmap과 그 위의 배열). 열린 뒤에는 바뀌지 않으므로 잠금 없이 읽습니다."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.mtime = os.fstat(f.fileno()).st_mtime
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, meta_len = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC:
+            self.mm.close()
+            raise ValueError(f"코퍼스 파일 형식이 아닙니다: {path}")
+        meta = loads(self.mm[HEADER.size:HEADER.size + meta_len])
+
+        self.count = meta["count"]
+        # 예전 파일에는 paths가 없으므로 컬럼 이름의 첫 점을 기준으로 나눔
+        self.paths = [tuple(p) for p in meta.get("paths") or [name.split(".", 1) for name in meta["columns"]]]
+        self.columns = {}
+        for i, name in enumerate(meta["columns"]):
+            self.columns.setdefault(name, i)
+        self.shared_keys = meta["shared_keys"]
+        # 공용 블록은 종류가 적으므로 미리 파싱해 둠
+        self.shared_tables = [[loads(block) for block in table] for table in meta["shared_tables"]]
+        self.date_field = meta["date_field"]
+        for name, spec in meta["arrays"].items():
+            array = np.frombuffer(self.mm, dtype=spec["dtype"], count=int(np.prod(spec["shape"])), offset=spec["offset"])
+            setattr(self, name, array.reshape(spec["shape"]))
+        self.heap_offset = meta["heap_offset"]
+        self.order = self.recent_order
+        self._sorted_stamps = self.timestamps[self.date_order]
+
+    def cell(self, index, column):
+        length = int(self.lengths[index, column])
+        if length == MISSING:
+            return None
+        start = self.heap_offset + int(self.offsets[index, column])
+        data = self.mm[start:start + length]
+        return data.decode("utf-8") if self.kinds[index, column] == KIND_STR else loads(data)
+
+    def value(self, index, name):
+        column = self.columns.get(name)
+        if column is not None:
+            return self.cell(index, column)
+        if name in self.shared_keys:
+            key = self.shared_keys.index(name)
+            block = int(self.shared[index, key])
+            return None if block == MISSING else self.shared_tables[key][block]
+        return None
+
+    def get(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        record = {}
+        for column, path in enumerate(self.paths):
+            if int(self.lengths[index, column]) == MISSING:
+                continue
+            value = self.cell(index, column)
+            if len(path) == 2:
+                record.setdefault(path[0], {})[path[1]] = value
+            else:
+                record[path[0]] = value
+        for key, table, block in zip(self.shared_keys, self.shared_tables, self.shared[index].tolist()):
+            if block != MISSING:
+                # 공용 블록은 행끼리 공유되므로 복사본을 반환
+                record[key] = loads(dumps(table[block]))
+        return record
+
+    def label(self, index):
+        return f"[{self.value(index, 'context.category')}] {self.value(index, 'context.news_title')}"
+
+    def release(self):
+        # numpy 뷰가 mmap을 참조하고 있으면 닫을 수 없으므로 먼저 해제
+        for name in ("offsets", "lengths", "kinds", "shared", "timestamps", "date_order", "recent_order", "order", "_sorted_stamps"):
+            setattr(self, name, None)
+        self.mm.close()
+
+
+class MappedCorpus:
+    """
+    [Mapped Corpus]
+    write_corpus로 만든 .smc 파일을 mmap으로 열어 필요한 행만 읽습니다.
+    - 여는 비용은 메타데이터 파싱뿐이며, 행별 배열과 문자열 힙은 운영체제 페이지 캐시를 그대로 사용
+    - get(i): 원래 JSONL 한 줄과 같은 dict, value(i, "context.news_title"): 필드 하나만 디코딩
+    - between(start_ts, end_ts): 게시 시각 범위의 행 번호 (이진 탐색)
+    NewsCorpus와 같은 조회 메서드(page/search/label/get/iter_items)를 제공하여 사이드바에서 그대로 사용할 수 있습니다.
+
+    열린 파일은 _CorpusFile 하나로 묶여 있고, 조회 메서드는 호출 시작 시점의 것을 끝까지 사용합니다.
+    refresh()는 새 파일을 완전히 연 뒤 참조만 바꾸며 이전 파일은 닫지 않으므로(참조가 모두 사라지면 해제),
+    다른 스레드에서 읽는 중에 다시 열어도 닫힌 mmap이나 다른 파일의 행 번호를 읽지 않습니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.generation = 0  # 다시 열 때마다 증가 (.smc는 항상 통째로 다시 쓰이므로)
+        self._file = _CorpusFile(path)
+
+    def __getattr__(self, name):
+        # count, columns, timestamps, order 등 열린 파일의 속성
+        if name == "_file":
+            raise AttributeError(name)
+        return getattr(self._file, name)
+
+    def refresh(self):
+        """파일이 다시 변환되었으면 새로 엽니다. 반환값: 다시 열었는지 여부"""
+        with self.lock:
+            if not os.path.exists(self.path) or os.stat(self.path).st_mtime == self._file.mtime:
+                return False
+            self._file = _CorpusFile(self.path)
+            self.generation += 1
+            return True
+
+    def __len__(self):
+        return self._file.count
+
+    def value(self, index, name):
+        """행 index의 필드 하나 (예: "context.news_title", "raw_text")"""
+        return self._file.value(index, name)
+
+    def get(self, index):
+        """행 index를 원래 레코드(dict)로 복원합니다."""
+        return self._file.get(index)
+
+    def timestamp(self, index):
+        return float(self._file.timestamps[index])
+
+    def between(self, start_ts=None, end_ts=None):
+        """게시 시각이 [start_ts, end_ts) 범위인 행 번호를 오래된 순서로 반환합니다."""
+        file = self._file
+        lo = 0 if start_ts is None else int(np.searchsorted(file._sorted_stamps, start_ts, side="left"))
+        hi = file.count if end_ts is None else int(np.searchsorted(file._sorted_stamps, end_ts, side="left"))
+        return file.date_order[lo:hi].tolist()
+
+    def page(self, page_no, page_size=50):
+        """최신순 page_no(0부터) 페이지의 행 번호 목록"""
+        start = page_no * page_size
+        return self._file.order[start:start + page_size].tolist()
+
+    def label(self, index):
+        return self._file.label(index)
+
+    def search(self, query, limit=50):
+        """라벨(카테고리/제목)에 검색어가 포함된 행 번호를 최신순으로 최대 limit개 반환합니다."""
+        query = query.strip().lower()
+        if not query:
+            return self.page(0, limit)
+        file = self._file
+        results = []
+        for i in file.order.tolist():
+            if query in file.label(i).lower():
+                results.append(i)
+                if len(results) >= limit:
+                    break
+        return results
+
+    def iter_items(self, start=0):
+        """파일 순서대로 start번째 행부터 (행 번호, 레코드)를 내보냅니다."""
+        file = self._file
+        for index in range(start, file.count):
+            yield index, file.get(index)
+
+    def close(self):
+        with self.lock:
+            self._file.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def _read_records(path):
+    """JSONL(한 줄에 레코드 하나) 또는 레코드 목록 JSON(학습 데이터셋 등)을 읽습니다."""
+    if path.endswith(".jsonl"):
+        return iter_jsonl(path)
+    return iter(load_json(path))
+
+
+def convert_to_corpus(src_path, out_path, shared_keys=DEFAULT_SHARED_KEYS, date_field=DEFAULT_DATE_FIELD):
+    """JSONL/JSON 파일을 .smc 코퍼스로 변환합니다."""
+    stats = write_corpus(_read_records(src_path), out_path, shared_keys, date_field)
+    print(f"[*] 코퍼스 변환 완료: {src_path} ({os.path.getsize(src_path):,} bytes) -> "
+          f"{out_path} ({stats['bytes']:,} bytes, {stats['records']}건, 공용 블록 {stats['shared_blocks']}개)")
+    return stats
+
+
+def convert_to_jsonl(corpus_path, out_path):
+    """.smc 코퍼스를 다시 JSONL로 기록합니다. 반환값: 기록한 건수"""
+    with MappedCorpus(corpus_path) as corpus, JsonlWriter(out_path, append=False) as writer:
+        for _, record in corpus.iter_items():
+            writer.write(record)
+        return writer.count
+
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+    sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+    parser = argparse.ArgumentParser(description="뉴스 컨텍스트/데이터셋 JSONL <-> 메모리 매핑 코퍼스(.smc) 변환")
+    parser.add_argument("command", choices=["to-corpus", "to-jsonl"])
+    parser.add_argument("src")
+    parser.add_argument("out")
+    parser.add_argument("--shared-key", action="append", default=None,
+                        help="중복 제거할 블록 키 (기본값: attack_design)")
+    args = parser.parse_args()
+
+    if args.command == "to-corpus":
+        convert_to_corpus(args.src, args.out, shared_keys=args.shared_key or DEFAULT_SHARED_KEYS)
+    else:
+        print(f"[*] {convert_to_jsonl(args.src, args.out)}건을 {args.out}에 기록했습니다.")
@@ -0,0 +1,146 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+from src.text_hash import simhash_bands, hamming_distance
+
+UINT64_MASK = (1 << 64) - 1
+
+
+class CrawlIndex:
+    """
+    [Crawl Index]
+    증분 크롤링을 위한 영구 인덱스(SQLite).
+    - seen_urls: 이미 수집한 기사 URL (실행 간 중복 제거)
+    - keyword_watermarks: 키워드별로 수집한 가장 최신 pubDate
+    - simhash_bands: 기사 내용 지문(SimHash)의 구간 색인 (실행 간 유사 기사 병합)
+    """
+
+    SIMHASH_BANDS = 4
+    SIMHASH_MAX_DISTANCE = 3
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.lock = threading.Lock()
+
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS seen_urls (
+                url TEXT PRIMARY KEY,
+                first_seen TEXT
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS keyword_watermarks (
+                keyword TEXT PRIMARY KEY,
+                newest_pub_ts REAL, -- pubDate의 Unix timestamp
+                newest_pub_date TEXT, -- 원본 pubDate 문자열
+                updated_at TEXT
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS simhash_bands (
+                band INTEGER,
+                band_value INTEGER,
+                fingerprint INTEGER, -- 64비트 지문 (SQLite 정수 범위에 맞춰 부호 있는 값으로 저장)
+                article_id TEXT
+            )
+        ''')
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_simhash_bands ON simhash_bands (band, band_value)")
+        self.conn.commit()
+
+    @staticmethod
+    def pub_timestamp(pub_date):
+        """RFC 2822 형식의 pubDate를 비교 가능한 timestamp로 변환합니다."""
+        try:
+            return parsedate_to_datetime(pub_date).timestamp()
+        except (TypeError, ValueError):
+            return None
+
+    def get_watermark(self, keyword):
+        """키워드의 마지막 수집 시점(timestamp)을 반환합니다. 없으면 None."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT newest_pub_ts FROM keyword_watermarks WHERE keyword = ?", (keyword,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def update_watermark(self, keyword, pub_date):
+        """키워드의 워터마크를 더 최신 pubDate로만 전진시킵니다."""
+        ts = self.pub_timestamp(pub_date)
+        if ts is None:
+            return
+        with self.lock:
+            self.conn.execute(
+                """
+                INSERT INTO keyword_watermarks (keyword, newest_pub_ts, newest_pub_date, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(keyword) DO UPDATE SET
+                    newest_pub_ts = excluded.newest_pub_ts,
+                    newest_pub_date = excluded.newest_pub_date,
+                    updated_at = excluded.updated_at
+                WHERE excluded.newest_pub_ts > keyword_watermarks.newest_pub_ts
+                """,
+                (keyword, ts, pub_date, datetime.now().isoformat())
+            )
+            self.conn.commit()
+
+    def filter_unseen(self, urls):
+        """주어진 URL 중 아직 인덱스에 없는 것만 반환합니다."""
+        urls = list(dict.fromkeys(urls))
+        seen = set()
+        with self.lock:
+            # SQLite 변수 개수 제한을 고려하여 나누어 조회
+            for i in range(0, len(urls), 500):
+                chunk = urls[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT url FROM seen_urls WHERE url IN ({placeholders})", chunk
+                ).fetchall()
+                seen.update(r[0] for r in rows)
+        return [u for u in urls if u not in seen]
+
+    def mark_seen(self, urls):
+        """수집이 끝난 URL을 인덱스에 기록합니다."""
+        now = datetime.now().isoformat()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO seen_urls (url, first_seen) VALUES (?, ?)",
+                [(u, now) for u in urls]
+            )
+            self.conn.commit()
+
+    def find_near_duplicate(self, fingerprint):
+        """해밍 거리 기준으로 가까운 지문을 가진 기사 ID를 반환합니다. 없으면 None."""
+        with self.lock:
+            for band, value in simhash_bands(fingerprint, self.SIMHASH_BANDS):
+                rows = self.conn.execute(
+                    "SELECT fingerprint, article_id FROM simhash_bands WHERE band = ? AND band_value = ?",
+                    (band, value)
+                ).fetchall()
+                for other, other_id in rows:
+                    if hamming_distance(fingerprint, other & UINT64_MASK) <= self.SIMHASH_MAX_DISTANCE:
+                        return other_id
+        return None
+
+    def add_fingerprints(self, entries):
+        """(지문, 기사 ID) 목록을 구간 색인에 추가합니다."""
+        rows = [
+            (band, value, fp - (1 << 64) if fp >= (1 << 63) else fp, aid)
+            for fp, aid in entries
+            for band, value in simhash_bands(fp, self.SIMHASH_BANDS)
+        ]
+        with self.lock:
+            self.conn.executemany(
+                "INSERT INTO simhash_bands (band, band_value, fingerprint, article_id) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
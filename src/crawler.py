@@ -1,17 +1,66 @@
 import os
 import requests
-import json
 import time
 import re
 import random
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from src.rate_limiter import TokenBucket
+from src.crawl_index import CrawlIndex
+from src.keyword_matcher import KeywordMatcher
+from src.text_hash import normalize_url, article_id, simhash, SimHashIndex
+from src.utils import JsonlWriter, save_json
 
 # 환경 변수 로드
 load_dotenv()
 
 class NaverApiCrawler:
-    def __init__(self):
+    # 네이버 검색 API 제약: 1회 최대 100건, start 파라미터 최대 1000
+    MAX_DISPLAY = 100
+    MAX_START = 1000
+    RETRY_STATUS = {429, 500, 502, 503, 504}
+
+    # 카테고리별 가중치 키워드 정의
+    # 중요도가 높은 단어는 점수를 더 높게 배정할 수 있습니다.
+    CATEGORY_RULES = {
+        "DEEPFAKE_AI_SCAM": {
+            "keywords": ['딥페이크', '합성', '영상통화', '목소리', '얼굴', '페이스스왑', '생성형 ai'],
+            "weight": 1.5
+        },
+        "GOV_IMPERSONATION": {
+            "keywords": ['검찰', '경찰', '금감원', '수사관', '계좌동결', '구속영장', '범죄연루', '검사'],
+            "weight": 1.2
+        },
+        "FAMILY_IMPERSONATION": {
+            "keywords": ['가족', '자녀', '딸', '아들', '엄마', '아빠', '납치', '액정파손', '지인사칭'],
+            "weight": 1.0
+        },
+        "INVESTMENT_SCAM": {
+            "keywords": ['투자', '코인', '리딩방', '고수익', '공모주', '상장', '수익률', '재테크'],
+            "weight": 1.0
+        },
+        # [신규] 사회/정책적 맥락 (Social Context)
+        "POLICY_NEWS": {
+            "keywords": ['정책', '지원금', '환급금', '연말정산', '청약', '보조금', '개정', '시행'],
+            "weight": 1.1 
+        },
+        "ECONOMIC_ISSUE": {
+            "keywords": ['금리', '물가', '환율', '주식', '비트코인', '폭락', '급등', '경제 위기'],
+            "weight": 1.0
+        },
+        "SOCIAL_EVENT": {
+            "keywords": ['명절', '추석', '설날', '블랙프라이데이', '할인', '택배', '휴가', '올림픽', '월드컵'],
+            "weight": 1.0
+        },
+        "LIFESTYLE_SMISHING": {
+            "keywords": ['부고', '청첩장', '택배', '건강검진', '배송지', '미납', '과태료'],
+            "weight": 0.8
+        }
+    }
+
+    def __init__(self, base_url=None, rate_per_sec=10, max_workers=8, max_retries=3, index_path=None):
         # API 인증 정보 (환경 변수)
         self.client_id = os.getenv("NAVER_CLIENT_ID")
         self.client_secret = os.getenv("NAVER_CLIENT_SECRET")
@@ -19,13 +68,28 @@ class NaverApiCrawler:
         if not self.client_id or not self.client_secret:
             raise ValueError(".env 파일에 NAVER_CLIENT_ID와 SECRET을 설정해주세요.")
 
-        self.base_url = "https://openapi.naver.com/v1/search/news.json"
+        # base_url은 로컬 Mock 서버 테스트를 위해 교체 가능
+        self.base_url = base_url or os.getenv("NAVER_NEWS_API_URL", "https://openapi.naver.com/v1/search/news.json")
+
+        # 동시 수집 설정: 연결을 재사용하는 세션 + API 쿼터에 맞춘 토큰 버킷
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.rate_limiter = TokenBucket(rate_per_sec)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         
         # 저장 경로 설정 (src 기준 상위의 data 폴더)
         self.save_dir = os.path.join(os.path.dirname(__file__), "..", "data")
         if not os.path.exists(self.save_dir):
             os.makedirs(self.save_dir)
 
+        # 증분 크롤링용 영구 인덱스 (incremental 모드에서 처음 사용할 때 생성)
+        self.index_path = index_path or os.path.join(self.save_dir, "crawl_index.db")
+        self.index = None
+        self.pending_commit = None  # 증분 수집 후 저장이 끝나면 반영할 인덱스 갱신분
+
         # 트렌드 분석용 키워드
         self.trend_keywords = {
             "method": ["부고", "청첩장", "택배", "건강검진", "해외결제", "카드개설", "대출", "투자", "알바", "납치", "영상통화", "딥페이크"],
@@ -33,6 +97,18 @@ class NaverApiCrawler:
             "channel": ["카카오톡", "텔레그램", "문자", "SMS", "페이스북", "인스타", "DM"]
         }
 
+        # 키워드 매처는 크롤러당 한 번만 컴파일하여 재사용
+        self.category_matcher = KeywordMatcher(
+            kw for info in self.CATEGORY_RULES.values() for kw in info["keywords"]
+        )
+        self.keyword_categories = {}  # 키워드 -> 해당 키워드를 가진 카테고리 목록
+        for cat, info in self.CATEGORY_RULES.items():
+            for kw in info["keywords"]:
+                self.keyword_categories.setdefault(kw, []).append(cat)
+        self.trend_matcher = KeywordMatcher(
+            kw for keywords in self.trend_keywords.values() for kw in keywords
+        )
+
     def _get_headers(self):
         return {
             "X-Naver-Client-Id": self.client_id,
@@ -43,50 +119,16 @@ class NaverApiCrawler:
     def _determine_type(self, title, content):
         text = (title + " " + content).lower()
         
-        # 1. 카테고리별 가중치 키워드 정의
-        # 중요도가 높은 단어는 점수를 더 높게 배정할 수 있습니다.
-        categories = {
-            "DEEPFAKE_AI_SCAM": {
-                "keywords": ['딥페이크', '합성', '영상통화', '목소리', '얼굴', '페이스스왑', '생성형 ai'],
-                "weight": 1.5
-            },
-            "GOV_IMPERSONATION": {
-                "keywords": ['검찰', '경찰', '금감원', '수사관', '계좌동결', '구속영장', '범죄연루', '검사'],
-                "weight": 1.2
-            },
-            "FAMILY_IMPERSONATION": {
-                "keywords": ['가족', '자녀', '딸', '아들', '엄마', '아빠', '납치', '액정파손', '지인사칭'],
-                "weight": 1.0
-            },
-            "INVESTMENT_SCAM": {
-                "keywords": ['투자', '코인', '리딩방', '고수익', '공모주', '상장', '수익률', '재테크'],
-                "weight": 1.0
-            },
-            # [신규] 사회/정책적 맥락 (Social Context)
-            "POLICY_NEWS": {
-                "keywords": ['정책', '지원금', '환급금', '연말정산', '청약', '보조금', '개정', '시행'],
-                "weight": 1.1 
-            },
-            "ECONOMIC_ISSUE": {
-                "keywords": ['금리', '물가', '환율', '주식', '비트코인', '폭락', '급등', '경제 위기'],
-                "weight": 1.0
-            },
-            "SOCIAL_EVENT": {
-                "keywords": ['명절', '추석', '설날', '블랙프라이데이', '할인', '택배', '휴가', '올림픽', '월드컵'],
-                "weight": 1.0
-            },
-            "LIFESTYLE_SMISHING": {
-                "keywords": ['부고', '청첩장', '택배', '건강검진', '배송지', '미납', '과태료'],
-                "weight": 0.8
-            }
-        }
+        # 1. 모든 카테고리 키워드를 한 번의 스캔으로 집계
+        keyword_counts = self.category_matcher.count(text)
 
         # 2. 카테고리별 점수 계산
-        category_scores = {}
-        for cat, info in categories.items():
-            # 문장에 포함된 키워드 개수 * 가중치
-            score = sum(text.count(kw) for kw in info["keywords"]) * info["weight"]
-            category_scores[cat] = score
+        # 문장에 포함된 키워드 개수 * 가중치 (발견된 키워드만 역참조하여 합산)
+        hits = dict.fromkeys(self.CATEGORY_RULES, 0)
+        for kw, count in keyword_counts.items():
+            for cat in self.keyword_categories[kw]:
+                hits[cat] += count
+        category_scores = {cat: hits[cat] * info["weight"] for cat, info in self.CATEGORY_RULES.items()}
 
         # 3. 최상위 카테고리 결정
         max_score = max(category_scores.values())
@@ -100,66 +142,211 @@ class NaverApiCrawler:
     
     def analyze_trends(self, data_list):
         analysis_result = {"methods": [], "targets": [], "channels": []}
-        all_text = " ".join([d['title'] + " " + (d['content'] if d['content'] else "") for d in data_list])
+        texts = (d['title'] + " " + (d['content'] if d['content'] else "") for d in data_list)
+        keyword_counts = self.trend_matcher.count_joined(texts, sep=" ")
         for category, keywords in self.trend_keywords.items():
             found_words = []
             for kw in keywords:
-                count = all_text.count(kw)
+                count = keyword_counts.get(kw, 0)
                 if count > 0:
                     found_words.append((kw, count))
             analysis_result[category + "s"] = sorted(found_words, key=lambda x: x[1], reverse=True)
         return analysis_result
 
-    def fetch_news(self, keyword, display=100):
-        """네이버 OpenAPI를 통해 뉴스 리스트를 가져옵니다."""
-        params = {
-            "query": keyword,
-            "display": display,
-            "sort": "date"  # 최신순
-        }
-        try:
-            response = requests.get(self.base_url, headers=self._get_headers(), params=params)
+    def _request_page(self, params):
+        """
+        한 페이지를 요청합니다. 429/5xx 응답은 지수 백오프로 재시도하며,
+        Retry-After 헤더가 있으면 그 값을 우선합니다.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            try:
+                response = self.session.get(self.base_url, headers=self._get_headers(), params=params, timeout=10)
+            except requests.RequestException as e:
+                if attempt == self.max_retries:
+                    print(f"    [!] 요청 실패: {e}")
+                    return None
+                time.sleep(0.5 * (2 ** attempt) + random.uniform(0, 0.1))
+                continue
+
             if response.status_code == 200:
-                return response.json().get('items', [])
+                return response.json()
+
+            if response.status_code in self.RETRY_STATUS and attempt < self.max_retries:
+                retry_after = response.headers.get("Retry-After")
+                delay = float(retry_after) if retry_after and retry_after.isdigit() else 0.5 * (2 ** attempt)
+                time.sleep(delay + random.uniform(0, 0.1))
+                continue
+
+            print(f"    [!] API 에러 (상태코드: {response.status_code})")
+            return None
+        return None
+
+    def fetch_news(self, keyword, display=100, max_items=None, since_ts=None):
+        """
+        네이버 OpenAPI를 통해 뉴스 리스트를 가져옵니다.
+        max_items가 display보다 크면 start 파라미터로 다음 페이지를 이어서 요청합니다.
+        since_ts가 주어지면 그 시점 이후의 기사만 반환하며, 더 오래된 기사가 나오면
+        (최신순 정렬이므로) 다음 페이지를 요청하지 않습니다.
+        """
+        return self._fetch_pages(keyword, display, max_items, since_ts)[0]
+
+    def _fetch_pages(self, keyword, display=100, max_items=None, since_ts=None):
+        """
+        fetch_news의 본체. 반환값: (기사 목록, 수집 완료 여부)
+        수집 완료: since_ts보다 오래된 기사(경계)를 만났거나 검색 결과의 끝에 도달한 경우.
+        since_ts가 있으면 max_items를 무시하고 경계까지 페이지를 이어서 요청합니다. (MAX_START까지)
+        since_ts가 없으면(첫 수집) max_items건을 채운 것도 완료로 봅니다.
+        요청 실패나 MAX_START 도달로 중단되면 완료가 아니므로 워터마크를 올리면 안 됩니다.
+        """
+        display = min(display, self.MAX_DISPLAY)
+        max_items = max_items or display
+
+        items = []
+        start = 1
+        while start <= self.MAX_START and (since_ts is not None or len(items) < max_items):
+            params = {
+                "query": keyword,
+                "display": display if since_ts is not None else min(display, max_items - len(items)),
+                "start": start,
+                "sort": "date"  # 최신순
+            }
+            page = self._request_page(params)
+            if not page:
+                return items, False
+
+            page_items = page.get('items', [])
+            if since_ts is not None:
+                # 워터마크와 같은 시각의 기사는 URL 인덱스로 걸러지므로 포함
+                fresh = [it for it in page_items if (CrawlIndex.pub_timestamp(it.get('pubDate')) or 0) >= since_ts]
+                items.extend(fresh)
+                if len(fresh) < len(page_items):
+                    return items, True
             else:
-                print(f"    [!] API 에러 (상태코드: {response.status_code})")
-                return []
-        except Exception as e:
-            print(f"    [!] 요청 실패: {e}")
-            return []
+                items.extend(page_items)
+
+            # 마지막 페이지 도달 시 종료 (total이 없는 응답은 페이지가 덜 찼는지로만 판단)
+            total = page.get('total')
+            if len(page_items) < params["display"] or (total is not None and start + len(page_items) > total):
+                return items, True
+            start += len(page_items)
+
+        if since_ts is not None:
+            print(f"    [!] 키워드 '{keyword}': 검색 한도(start={self.MAX_START})까지 워터마크에 도달하지 못함")
+            return items, False
+        return items, True
+
+    def run_crawling(self, target_keywords, max_items=100, incremental=False):
+        """
+        키워드별 뉴스를 수집합니다.
+        incremental=True이면 키워드별 pubDate 워터마크 이후의 기사를 워터마크에 닿을 때까지 요청하고,
+        영구 URL 인덱스에 없는 신규 기사만 반환합니다. (워터마크가 없는 첫 수집은 max_items건)
+        인덱스와 워터마크 갱신은 저장이 끝난 뒤 commit_crawl()로 반영합니다.
+        """
+        if incremental and self.index is None:
+            self.index = CrawlIndex(self.index_path)
 
-    def run_crawling(self, target_keywords):
         all_results = []
-        print(f"[*] 네이버 API 기반 데이터 수집 시작...")
-
-        for kw in target_keywords:
-            print(f"    -> 키워드 '{kw}' 수집 중...", end=" ")
-            items = self.fetch_news(kw)
-            
-            for idx, item in enumerate(items):
-                # HTML 태그 제거
-                title = re.sub('<[^>]*>', '', item['title'])
-                description = re.sub('<[^>]*>', '', item['description'])
-                
-                processed_item = {
-                    "id": f"CTX-API-{datetime.now().strftime('%Y%m%d')}-{random.randint(1000, 9999)}",
-                    "type": self._determine_type(title, description),
-                    "title": title,
-                    "source": "Naver News API",
-                    "link": item['originallink'] or item['link'],
-                    "content": description,
-                    "timestamp": item['pubDate']
-                }
-                all_results.append(processed_item)
-            
-            print(f"({len(items)}건 완료)")
-            time.sleep(0.1) # API 쿼터 보호
+        newest_pub = {}
+        complete = set()
+        mode_label = "증분" if incremental else "전체"
+        print(f"[*] 네이버 API 기반 데이터 수집 시작... ({mode_label} 모드, 동시 작업 {self.max_workers}개)")
 
-        # 링크 기준 중복 제거
-        unique_dict = {v['link']: v for v in all_results}
-        return list(unique_dict.values())
+        def fetch(kw):
+            since_ts = self.index.get_watermark(kw) if incremental else None
+            return self._fetch_pages(kw, max_items=max_items, since_ts=since_ts)
 
-    def save_for_scenario_generation(self, data, filename="smishing_context_data.jsonl"):
+        # 키워드별 요청은 스레드 풀에서 동시에 수행하고, 결과는 키워드 순서대로 처리
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            fetched = executor.map(fetch, target_keywords)
+
+            for kw, (items, reached) in zip(target_keywords, fetched):
+                if reached:
+                    complete.add(kw)
+                for idx, item in enumerate(items):
+                    # HTML 태그 제거
+                    title = re.sub('<[^>]*>', '', item['title'])
+                    description = re.sub('<[^>]*>', '', item['description'])
+
+                    link = item['originallink'] or item['link']
+                    fingerprint = simhash(title + ' ' + description)
+                    processed_item = {
+                        # 정규화 URL 해시 기반 ID: 같은 기사는 언제 수집해도 같은 ID
+                        "id": article_id(link),
+                        "type": self._determine_type(title, description),
+                        "title": title,
+                        "source": "Naver News API",
+                        "link": link,
+                        "url": normalize_url(link),
+                        "content": description,
+                        # 내용이 비어 있으면 지문 없음 (유사 기사 병합 대상에서 제외)
+                        "content_hash": f"{fingerprint:016x}" if fingerprint is not None else None,
+                        "timestamp": item['pubDate']
+                    }
+                    all_results.append(processed_item)
+
+                if items:
+                    newest_pub[kw] = max((it['pubDate'] for it in items), key=lambda d: CrawlIndex.pub_timestamp(d) or 0)
+                print(f"    -> 키워드 '{kw}' 수집 완료 ({len(items)}건)")
+
+        # 정규화 URL(=ID) 기준 중복 제거
+        unique_dict = {v['id']: v for v in all_results}
+        results = list(unique_dict.values())
+
+        if incremental:
+            # 이전 실행에서 이미 수집한 기사 제거
+            unseen = set(self.index.filter_unseen([v['url'] for v in results]))
+            results = [v for v in results if v['url'] in unseen]
+
+        # 내용 지문(SimHash)이 가까운 기사는 같은 기사의 전재본으로 보고 하나만 남김
+        near_index = SimHashIndex()
+        unique_results = []
+        for v in results:
+            if v['content_hash'] is None:
+                unique_results.append(v)
+                continue
+            fp = int(v['content_hash'], 16)
+            if near_index.find(fp) is not None:
+                continue
+            if incremental and self.index.find_near_duplicate(fp) is not None:
+                continue
+            near_index.add(fp, v['id'])
+            unique_results.append(v)
+        print(f"[*] 유사 기사 {len(results) - len(unique_results)}건 병합")
+
+        if incremental:
+            # 저장이 끝난 뒤 commit_crawl()에서 반영 (저장 실패 시 다음 실행에서 다시 수집)
+            self.pending_commit = {
+                # 병합된 전재본도 다시 수집되지 않도록 URL은 모두 기록
+                "urls": [v['url'] for v in results],
+                "fingerprints": [(int(v['content_hash'], 16), v['id']) for v in unique_results if v['content_hash']],
+                # 워터마크는 경계까지 수집을 마친 키워드만 올림 (중간에 멈추면 다음 실행에서 이어서 수집)
+                "watermarks": {kw: pub for kw, pub in newest_pub.items() if kw in complete}
+            }
+            skipped = [kw for kw in target_keywords if kw not in complete]
+            if skipped:
+                print(f"[!] 워터마크 유지 (수집 미완료): {skipped}")
+            print(f"[*] 신규 기사 {len(unique_results)}건 (기존 수집분 {len(unique_dict) - len(results)}건 제외)")
+
+        results = unique_results
+        return results
+
+    def commit_crawl(self):
+        """
+        증분 수집 결과(URL 인덱스, 내용 지문, 워터마크)를 영구 인덱스에 반영합니다.
+        save_for_scenario_generation()이 성공한 뒤에 호출합니다.
+        """
+        pending = self.pending_commit
+        if not pending:
+            return
+        self.index.mark_seen(pending["urls"])
+        self.index.add_fingerprints(pending["fingerprints"])
+        for kw, pub_date in pending["watermarks"].items():
+            self.index.update_watermark(kw, pub_date)
+        self.pending_commit = None
+
+    def save_for_scenario_generation(self, data, filename="smishing_context_data.jsonl", append=False):
+        """시나리오 생성용 JSONL을 저장합니다. append=True이면 기존 파일 끝에 신규 항목만 추가합니다."""
         file_path = os.path.join(self.save_dir, filename)
         
         # 카테고리별 전문 공격 전략 정의
@@ -207,7 +394,7 @@ class NaverApiCrawler:
             }
         }
 
-        with open(file_path, "w", encoding="utf-8") as f:
+        with JsonlWriter(file_path, append=append) as writer:
             for item in data:
                 # 분류된 타입에 맞는 전략 선택 (없으면 일반형)
                 strat = attack_strategies.get(item['type'], {
@@ -218,9 +405,12 @@ class NaverApiCrawler:
 
                 training_entry = {
                     "context": {
+                        "id": item['id'],
+                        "url": item['url'],
                         "news_title": item['title'],
                         "category": item['type'],
-                        "source_date": item['timestamp']
+                        "source_date": item['timestamp'],
+                        "content_hash": item['content_hash']
                     },
                     "attack_design": {
                         "instruction": f"제공된 '{item['type']}' 기사(사회적 맥락)를 분석하여, 이를 악용하는 지능형 스미싱 시나리오를 설계하라.",
@@ -235,9 +425,13 @@ class NaverApiCrawler:
                     },
                     "raw_text": item['content']
                 }
-                f.write(json.dumps(training_entry, ensure_ascii=False) + "\n")
+                writer.write(training_entry)
 
 if __name__ == "__main__":
+    import sys
+
+    # --incremental: 이전 실행 이후의 신규 기사만 수집하여 JSONL 끝에 추가
+    incremental = "--incremental" in sys.argv
     crawler = NaverApiCrawler()
     
     target_keywords = [
@@ -255,7 +449,7 @@ if __name__ == "__main__":
     ]
 
     # 데이터 수집 실행
-    final_list = crawler.run_crawling(target_keywords)
+    final_list = crawler.run_crawling(target_keywords, incremental=incremental)
 
     # 분석 보고서
     trend_report = crawler.analyze_trends(final_list)
@@ -264,11 +458,13 @@ if __name__ == "__main__":
     print(f"주요 수법 트렌드 (TOP 5): {trend_report['methods'][:5]}")
     print("="*50)
 
-    # Raw Data 저장
-    raw_path = os.path.join(crawler.save_dir, "scam_news_api_raw.json")
-    with open(raw_path, "w", encoding="utf-8") as f:
-        json.dump(final_list, f, ensure_ascii=False, indent=4)
+    # Raw Data 저장 (전체 수집 스냅샷이므로 증분 모드에서는 덮어쓰지 않음)
+    if not incremental:
+        # 프로그램이 읽는 원본 덤프이므로 들여쓰기 없이 기록
+        save_json(final_list, os.path.join(crawler.save_dir, "scam_news_api_raw.json"), compact=True)
     
     # 시나리오 생성용 JSONL 저장
-    crawler.save_for_scenario_generation(final_list)
+    crawler.save_for_scenario_generation(final_list, append=incremental)
+    if incremental:
+        crawler.commit_crawl()
     print(f"\n[Success] 모든 데이터가 {crawler.save_dir} 폴더에 저장되었습니다.")
\ No newline at end of file
@@ -1,10 +1,14 @@
 import torch
+import numpy as np
 import re
 import os
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 
+from src.tracing import traced, span
+from src.profiling import profiled
+
 class SmishingDetector:
-    def __init__(self, model_name="klue/roberta-base", threshold=0.7):
+    def __init__(self, model_name="klue/roberta-base", threshold=0.7, adapter_path=None):
         print(f"[*] 모델 로딩 중: {model_name}...")
         
         # Hugging Face 표준 AutoClass 사용 (별도 설정 불필요)
@@ -28,6 +32,34 @@ class SmishingDetector:
         # 보안 민감도 설정을 위한 임계값
         self.threshold = threshold
 
+        # 가중치가 바뀔 때마다(진화 학습, 어댑터 교체) 증가. 판정을 재사용하는 캐시의 무효화 기준
+        self.weights_version = 0
+
+        # LoRA 어댑터 (enable_adapters()로 연결, 진화 결과를 어댑터 파일로 보관)
+        self.adapters = None
+        if adapter_path and os.path.exists(adapter_path):
+            self.load_adapter(adapter_path)
+
+    def enable_adapters(self, **config):
+        """모델에 LoRA 어댑터를 연결하고 AdapterManager를 반환합니다. (이미 연결되어 있으면 그대로 반환)"""
+        if self.adapters is None:
+            from src.adapters import AdapterManager
+            self.adapters = AdapterManager(self.model, **config)
+        return self.adapters
+
+    def load_adapter(self, name):
+        """저장된 어댑터(이름 또는 .pt 경로)로 교체합니다. 모델을 다시 불러오지 않습니다."""
+        metadata = self.enable_adapters().load(name)
+        self.model.eval()
+        self.weights_version += 1
+        print(f"[*] 어댑터 적용: {name} {metadata}")
+        return metadata
+
+    def merge_adapter(self):
+        """현재 어댑터를 가중치에 합쳐 추론 시 추가 연산을 없앱니다. (다른 어댑터를 load하면 자동으로 해제)"""
+        if self.adapters is not None:
+            self.adapters.merge()
+
     def preprocess(self, text):
         """특수문자 노이즈 제거 및 입력 정제"""
         # 한글, 숫자, 영문, 기본적인 문장부호 제외 제거
@@ -35,6 +67,8 @@ class SmishingDetector:
         clean_text = re.sub(r'\s+', ' ', clean_text).strip()
         return clean_text
 
+    @traced("detector.predict")
+    @profiled("detector.predict")
     def predict(self, text):
         """
         문장이 스미싱일 확률을 계산하고 상세 분석 결과를 반환
@@ -49,7 +83,7 @@ class SmishingDetector:
             padding=True
         ).to(self.device)
 
-        with torch.no_grad():
+        with span("detector.forward"), torch.no_grad():
             outputs = self.model(**inputs)
         
         # 확률 변환
@@ -66,4 +100,35 @@ class SmishingDetector:
             "smishing_score": smishing_prob, # 0~1 사이의 순수 스미싱 확률
             "original_text": text,
             "processed_text": processed_text
-        }
\ No newline at end of file
+        }
+
+    @traced("detector.embed")
+    @profiled("detector.embed")
+    def embed(self, texts, batch_size=32):
+        """
+        분류 헤드 이전의 인코더 출력(mean pooling)을 L2 정규화한 문장 임베딩으로 반환합니다.
+        반환값: numpy 배열 (len(texts), hidden_size)
+        """
+        if isinstance(texts, str):
+            texts = [texts]
+
+        vectors = []
+        for i in range(0, len(texts), batch_size):
+            batch = [self.preprocess(t) for t in texts[i:i + batch_size]]
+            inputs = self.tokenizer(
+                batch,
+                return_tensors="pt",
+                truncation=True,
+                max_length=128,
+                padding=True
+            ).to(self.device)
+
+            with torch.no_grad():
+                hidden = self.model.base_model(**inputs).last_hidden_state
+
+            # 패딩 토큰을 제외한 평균
+            mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+            vectors.append(torch.nn.functional.normalize(pooled, dim=1).cpu().numpy())
+
+        return np.concatenate(vectors, axis=0)
@@ -0,0 +1,180 @@
+import os
+import json
+from datetime import datetime
+
+# pyarrow는 선택적 의존성 (내보내기 기능을 사용할 때만 필요)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.ipc as ipc
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    pa = None
+
+
+class ColumnarExporter:
+    """
+    [Columnar Exporter]
+    DBManager의 테이블을 청크 단위로 읽어 날짜별 파티션의 압축 컬럼형 파일
+    (Parquet 또는 Arrow IPC)로 내보냅니다.
+    테이블 전체를 메모리에 올리지 않으며, 워터마크(rowid) 기반 증분 내보내기를 지원합니다.
+
+    출력 구조: {out_dir}/{table}/date=YYYY-MM-DD/part-{청크 시작 rowid}.parquet
+    """
+
+    # 테이블별 컬럼 정의: (컬럼명, 타입) / 파티션 기준 시각 컬럼
+    TABLES = {
+        "attack_logs": {
+            "columns": [("id", "int64"), ("scenario_name", "string"), ("generated_msg", "string"),
+                        ("score", "float64"), ("model_used", "string"), ("timestamp", "string")],
+            "time_column": "timestamp"
+        },
+        "raw_datasets": {
+            "columns": [("id", "int64"), ("source_file", "string"), ("content", "string"),
+                        ("full_json", "string"), ("ingested_at", "string")],
+            "time_column": "ingested_at"
+        },
+        "news_articles": {
+            "columns": [("id", "string"), ("news_title", "string"), ("news_content", "string"),
+                        ("source_date", "string"), ("category", "string"),
+                        ("original_json", "string"), ("saved_at", "string")],
+            "time_column": "saved_at"
+        }
+    }
+
+    WATERMARK_FILE = "_watermarks.json"
+
+    def __init__(self, db, out_dir="exports", fmt="parquet", compression="zstd", chunk_size=50000):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("컬럼형 내보내기를 사용하려면 pyarrow를 설치해주세요. (pip install pyarrow)")
+        if fmt not in ("parquet", "arrow"):
+            raise ValueError(f"지원하지 않는 포맷입니다: {fmt} (parquet/arrow)")
+        if db.mode != 'sqlite':
+            raise ValueError("컬럼형 내보내기는 SQLite 모드에서만 지원됩니다.")
+
+        self.db = db
+        self.out_dir = out_dir
+        self.fmt = fmt
+        self.compression = compression
+        self.chunk_size = chunk_size
+        os.makedirs(self.out_dir, exist_ok=True)
+
+    # --- Watermark ---
+
+    def _watermark_path(self):
+        return os.path.join(self.out_dir, self.WATERMARK_FILE)
+
+    def load_watermarks(self):
+        """테이블별 마지막으로 내보낸 rowid를 반환합니다."""
+        path = self._watermark_path()
+        if not os.path.exists(path):
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_watermarks(self, watermarks):
+        # 임시 파일에 쓴 뒤 교체하여 중단 시에도 워터마크 파일이 깨지지 않도록 함
+        path = self._watermark_path()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(watermarks, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, path)
+
+    # --- Export ---
+
+    def _schema(self, table):
+        spec = self.TABLES[table]
+        fields = [pa.field(name, getattr(pa, dtype)()) for name, dtype in spec["columns"]]
+        return pa.schema(fields)
+
+    @staticmethod
+    def _partition_of(value):
+        """ISO 시각 문자열에서 날짜 파티션 키(YYYY-MM-DD)를 추출합니다."""
+        if not value:
+            return "unknown"
+        return str(value)[:10]
+
+    def _write_part(self, table, partition, rows, schema, first_rowid):
+        part_dir = os.path.join(self.out_dir, table, f"date={partition}")
+        os.makedirs(part_dir, exist_ok=True)
+
+        columns = list(zip(*rows))
+        batch = pa.record_batch(
+            [pa.array(col, type=field.type) for col, field in zip(columns, schema)],
+            schema=schema
+        )
+
+        if self.fmt == "parquet":
+            file_path = os.path.join(part_dir, f"part-{first_rowid:012d}.parquet")
+            pq.write_table(pa.Table.from_batches([batch]), file_path, compression=self.compression)
+        else:
+            file_path = os.path.join(part_dir, f"part-{first_rowid:012d}.arrow")
+            options = ipc.IpcWriteOptions(compression=self.compression)
+            with pa.OSFile(file_path, "wb") as sink:
+                with ipc.new_file(sink, schema, options=options) as writer:
+                    writer.write_batch(batch)
+        return file_path
+
+    def export_table(self, table, incremental=True):
+        """
+        [테이블 내보내기]
+        rowid 순으로 chunk_size씩 읽어 파티션별 파일로 기록합니다.
+        incremental=True이면 마지막 워터마크 이후의 행만 내보냅니다.
+        """
+        if table not in self.TABLES:
+            raise ValueError(f"내보낼 수 없는 테이블입니다: {table}")
+
+        spec = self.TABLES[table]
+        schema = self._schema(table)
+        col_names = [name for name, _ in spec["columns"]]
+        time_idx = col_names.index(spec["time_column"])
+
+        watermarks = self.load_watermarks()
+        last_rowid = watermarks.get(table, {}).get("last_rowid", 0) if incremental else 0
+
+        # 내보내기 도중의 쓰기와 충돌하지 않도록 별도 커서 사용
+        cursor = self.db.conn.cursor()
+        cursor.execute(
+            f"SELECT rowid, {', '.join(col_names)} FROM {table} WHERE rowid > ? ORDER BY rowid",
+            (last_rowid,)
+        )
+
+        stats = {"table": table, "rows": 0, "files": []}
+        while True:
+            rows = cursor.fetchmany(self.chunk_size)
+            if not rows:
+                break
+
+            # 청크 내에서 날짜 파티션별로 분할
+            partitions = {}
+            for row in rows:
+                partitions.setdefault(self._partition_of(row[1 + time_idx]), []).append(row[1:])
+
+            for partition, part_rows in partitions.items():
+                # 파일명은 청크의 시작 rowid로 정해 재실행 시에도 겹치지 않음
+                stats["files"].append(self._write_part(table, partition, part_rows, schema, rows[0][0]))
+
+            last_rowid = rows[-1][0]
+            stats["rows"] += len(rows)
+
+            # 청크마다 워터마크를 갱신하여 중단되더라도 이어서 내보낼 수 있게 함
+            watermarks[table] = {"last_rowid": last_rowid, "exported_at": datetime.now().isoformat()}
+            self._save_watermarks(watermarks)
+
+        cursor.close()
+        print(f"[*] '{table}' 내보내기 완료: {stats['rows']}행, 파일 {len(stats['files'])}개")
+        return stats
+
+    def export_all(self, incremental=True):
+        """지원하는 모든 테이블을 내보냅니다."""
+        return [self.export_table(table, incremental=incremental) for table in self.TABLES]
+
+
+if __name__ == "__main__":
+    import sys
+    sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+    from database_manager import DBManager
+
+    exporter = ColumnarExporter(DBManager(), out_dir="exports")
+    exporter.export_all(incremental=True)
@@ -0,0 +1,180 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+import torch
+from torch.utils.checkpoint import checkpoint
+
+DEFAULT_CACHE_DIR = "models/feature_cache"
+
+
+def text_key(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class FeatureCache:
+    """
+    [Feature Cache]
+    고정된 하위 인코더 층의 출력(hidden states)을 디스크에 보관합니다.
+    경로: cache_dir/<모델 버전>/<텍스트 해시>.npy (float16)
+    모델 버전이 바뀌면(하위 층 가중치 변경) 다른 디렉터리를 사용하므로 오래된 특징을 읽지 않습니다.
+    최근 사용한 항목은 메모리(LRU)에도 보관합니다.
+    """
+
+    def __init__(self, version, cache_dir=DEFAULT_CACHE_DIR, memory_items=512):
+        self.version = version
+        self.dir = os.path.join(cache_dir, version)
+        self.memory_items = memory_items
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        os.makedirs(self.dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.dir, key + ".npy")
+
+    def _remember(self, key, array):
+        with self.lock:
+            self.memory[key] = array
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.memory_items:
+                self.memory.popitem(last=False)
+
+    def get(self, text):
+        key = text_key(text)
+        with self.lock:
+            array = self.memory.get(key)
+            if array is not None:
+                self.memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return array
+        path = self._path(key)
+        if not os.path.exists(path):
+            with self.lock:
+                self.stats["misses"] += 1
+            return None
+        array = np.load(path)
+        with self.lock:
+            self.stats["disk_hits"] += 1
+        self._remember(key, array)
+        return array
+
+    def put(self, text, array):
+        key = text_key(text)
+        array = np.ascontiguousarray(array, dtype=np.float16)
+        # 임시 파일에 쓴 뒤 교체 (동시에 같은 텍스트를 기록해도 깨진 파일이 남지 않도록)
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp_path, self._path(key))
+        self._remember(key, array)
+
+
+class SplitEncoder:
+    """
+    [Split Encoder]
+    RoBERTa 분류 모델을 고정된 하위 층(임베딩 + 인코더 0..k-1)과 학습할 상위 층(인코더 k.. + 분류 헤드)으로 나눕니다.
+    - lower(text): 하위 층 출력. FeatureCache에 있으면 디스크/메모리에서 읽고, 없으면 계산하여 저장
+    - upper(hidden): 캐시된 특징에서 로짓 계산 (학습 시 역전파는 상위 층만 통과)
+    문자를 하나씩(패딩 없이) 처리하므로 상위 층에 어텐션 마스크가 필요 없습니다.
+    캐시된 특징은 학습 중에 계산되더라도 항상 같은 값이어야 하므로, 하위 층은 eval 모드(드롭아웃 없음),
+    autocast 밖의 float32로 계산합니다.
+    """
+
+    def __init__(self, detector, frozen_layers=8, cache_dir=DEFAULT_CACHE_DIR):
+        self.detector = detector
+        self.model = detector.model
+        self.encoder_layers = self.model.base_model.encoder.layer
+        if not hasattr(self.model, "classifier") or not 0 < frozen_layers < len(self.encoder_layers):
+            raise ValueError(f"하위 층 고정을 지원하지 않는 모델/설정입니다 (frozen_layers={frozen_layers})")
+        self.frozen_layers = frozen_layers
+        self.checkpointing = False  # True이면 상위 층 활성값을 저장하지 않고 역전파 때 재계산
+        self.freeze_lower()
+        self.cache = FeatureCache(self.fingerprint(), cache_dir)
+
+    def lower_parameters(self):
+        yield from self.model.base_model.embeddings.parameters()
+        for layer in self.encoder_layers[:self.frozen_layers]:
+            yield from layer.parameters()
+
+    def upper_parameters(self):
+        params = []
+        for layer in self.encoder_layers[self.frozen_layers:]:
+            params.extend(layer.parameters())
+        params.extend(self.model.classifier.parameters())
+        return params
+
+    def freeze_lower(self):
+        for param in self.lower_parameters():
+            param.requires_grad = False
+
+    @torch.no_grad()
+    def fingerprint(self):
+        """
+        하위 층 가중치의 지문 (캐시 버전 키).
+        파라미터마다 앞부분과 일정 간격 표본만 해시하여 전체 가중치를 읽지 않고도 변경을 감지합니다.
+        """
+        digest = hashlib.sha1(f"{self.model.config.name_or_path}|{self.frozen_layers}".encode("utf-8"))
+        for param in self.lower_parameters():
+            flat = param.detach().reshape(-1)
+            sample = torch.cat([flat[:256], flat[::max(1, flat.numel() // 256)]])
+            digest.update(str(tuple(param.shape)).encode("utf-8"))
+            digest.update(sample.float().cpu().numpy().tobytes())
+        return digest.hexdigest()[:16]
+
+    @contextmanager
+    def _lower_mode(self):
+        """하위 층만 eval 모드로 두고 autocast를 끈 상태로 실행한 뒤 이전 모드로 되돌립니다."""
+        modules = [self.model.base_model.embeddings, *self.encoder_layers[:self.frozen_layers]]
+        previous = [module.training for module in modules]
+        for module in modules:
+            module.eval()
+        try:
+            with torch.autocast(device_type=self.detector.device.type, enabled=False):
+                yield
+        finally:
+            for module, training in zip(modules, previous):
+                module.train(training)
+
+    @torch.no_grad()
+    def _compute_lower(self, text):
+        inputs = self.detector.tokenizer(text, return_tensors="pt", truncation=True, max_length=128).to(self.detector.device)
+        with self._lower_mode():
+            # 상위 층은 계산하지 않고 임베딩 + 인코더 0..k-1만 통과
+            hidden = self.model.base_model.embeddings(input_ids=inputs["input_ids"]).float()
+            for layer in self.encoder_layers[:self.frozen_layers]:
+                output = layer(hidden)
+                hidden = output[0] if isinstance(output, tuple) else output
+        return hidden[0].float().cpu().numpy()
+
+    def lower(self, text):
+        array = self.cache.get(text)
+        if array is None:
+            array = self._compute_lower(text)
+            self.cache.put(text, array)
+        param = next(self.model.classifier.parameters())
+        return torch.from_numpy(np.asarray(array)).to(device=param.device, dtype=param.dtype).unsqueeze(0)
+
+    def warm(self, texts):
+        """리플레이 데이터의 특징을 미리 계산해 둡니다. 반환값: 새로 계산한 건수"""
+        computed = 0
+        for text in texts:
+            if self.cache.get(text) is None:
+                self.cache.put(text, self._compute_lower(text))
+                computed += 1
+        return computed
+
+    def upper(self, hidden):
+        for layer in self.encoder_layers[self.frozen_layers:]:
+            if self.checkpointing and torch.is_grad_enabled():
+                output = checkpoint(layer, hidden, use_reentrant=False)
+            else:
+                output = layer(hidden)
+            hidden = output[0] if isinstance(output, tuple) else output
+        return self.model.classifier(hidden)
+
+    def logits(self, text):
+        return self.upper(self.lower(text))
@@ -0,0 +1,373 @@
+import os
+import re
+import math
+import mmap
+import struct
+import hashlib
+import threading
+import ipaddress
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from src.tracing import span, incr
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(__file__), "../data/reputation.idx")
+
+# 괄호/대괄호로 감싼 점 등 흔한 난독화 표기를 원래 문자로 되돌림
+DEFANG_PATTERN = re.compile(r"\[\.\]|\(\.\)|\{\.\}|\[dot\]|\(dot\)", re.IGNORECASE)
+URL_PATTERN = re.compile(r"\b(?:h[tx]{2}ps?://|www\.)[^\s<>\"'\]\[)(]+", re.IGNORECASE)
+# 스킴 없이 적힌 도메인 (예: kcb-safe.com/verify)
+DOMAIN_PATTERN = re.compile(
+    r"(?<![\w@.-])((?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+(?:[a-z]{2,24}|xn--[a-z0-9-]+))(?::\d+)?(/[^\s<>\"'\]\[)(]*)?",
+    re.IGNORECASE
+)
+# 스킴 없이 적힌 "이름.확장자"는 도메인보다 파일 이름인 경우가 많으므로 제외 (실제 TLD인 zip/mov 등은 포함하지 않음)
+FILE_EXTENSIONS = {
+    "pdf", "hwp", "hwpx", "doc", "docx", "xls", "xlsx", "ppt", "pptx", "txt", "csv", "rtf",
+    "jpg", "jpeg", "png", "gif", "bmp", "webp", "heic", "svg", "mp3", "mp4", "avi", "wav",
+    "apk", "exe", "msi", "dmg", "rar", "7z", "tar", "gz", "html", "htm", "js", "json", "xml"
+}
+# 휴대전화, 지역번호, 대표번호(15xx/16xx/18xx), 국제번호(+82)
+PHONE_PATTERN = re.compile(
+    r"(?<!\d)(?:\+82[-\s.]?1[016789]|01[016789]|0(?:2|[3-6][1-5]|70))[-\s.]?\d{3,4}[-\s.]?\d{4}(?!\d)"
+    r"|(?<!\d)1[5-9]\d{2}[-\s.]?\d{4}(?!\d)"
+)
+# 하이픈으로 구분된 계좌번호 (은행별 3~4개 묶음)
+ACCOUNT_PATTERN = re.compile(r"(?<![\d-])\d{2,6}-\d{2,6}-\d{2,8}(?:-\d{1,3})?(?![\d-])")
+
+SHORT_LINK_HOSTS = {
+    "bit.ly", "goo.gl", "tinyurl.com", "t.co", "ow.ly", "is.gd", "buff.ly", "cutt.ly", "rb.gy",
+    "han.gl", "me2.do", "vo.la", "url.kr", "buly.kr", "naver.me", "c11.kr", "t.ly", "shorturl.at"
+}
+
+# 평판 목록에 없더라도 그 자체로 위험 신호인 유형의 기본 위험도 (0~100)
+HEURISTIC_RISK = {"short_link": 40, "ip_url": 60}
+
+# 차단 기준 미만 지표가 모델 점수에 더하는 로짓의 최대치 (위험도 100, weight 1.0일 때 오즈 약 7.4배)
+MAX_LOGIT_BOOST = 2.0
+
+INDEX_MAGIC = b"SMREP001"
+INDEX_HEADER = struct.Struct("<8sQ")  # magic, 항목 수
+
+
+def _normalize_domain(host):
+    host = host.lower().strip(".")
+    return host[4:] if host.startswith("www.") else host
+
+
+def _digits(value):
+    return re.sub(r"\D", "", value)
+
+
+def _phone_digits(value):
+    # 국제번호(+82)는 국내 표기(0...)로 통일. 계좌번호는 82로 시작해도 그대로 둠
+    digits = _digits(value)
+    return "0" + digits[2:] if digits.startswith("82") else digits
+
+
+def extract_indicators(text):
+    """
+    문자에서 URL/도메인/단축 URL/전화번호/계좌번호를 추출합니다.
+    반환값: [{"type": ..., "value": 정규화된 값}, ...] (중복 제거, 등장 순서)
+    """
+    text = DEFANG_PATTERN.sub(".", text)
+    found = {}
+
+    def add(kind, value):
+        if value:
+            found.setdefault((kind, value), {"type": kind, "value": value})
+
+    consumed = []
+    for match in URL_PATTERN.finditer(text):
+        raw = match.group(0).rstrip(".,!?")
+        raw = re.sub(r"^hxxp", "http", raw, flags=re.IGNORECASE)
+        if raw.lower().startswith("www."):
+            raw = "http://" + raw
+        parts = urlsplit(raw)
+        host = _normalize_domain(parts.hostname or "")
+        add("url", host + parts.path.rstrip("/"))
+        consumed.append(match.span())
+        _add_host(add, host)
+
+    for match in DOMAIN_PATTERN.finditer(text):
+        if any(start <= match.start() < end for start, end in consumed):
+            continue
+        host = _normalize_domain(match.group(1))
+        if host.rsplit(".", 1)[-1] in FILE_EXTENSIONS:
+            continue
+        if match.group(2):
+            add("url", host + match.group(2).rstrip("/.,"))
+        _add_host(add, host)
+
+    phone_spans = []
+    for match in PHONE_PATTERN.finditer(text):
+        add("phone", _phone_digits(match.group(0)))
+        phone_spans.append(match.span())
+    for match in ACCOUNT_PATTERN.finditer(text):
+        if not any(start <= match.start() < end for start, end in phone_spans):
+            add("account", _digits(match.group(0)))
+
+    return list(found.values())
+
+
+def _add_host(add, host):
+    if not host:
+        return
+    try:
+        ipaddress.ip_address(host)
+        add("ip_url", host)
+        return
+    except ValueError:
+        pass
+    add("domain", host)
+    if host in SHORT_LINK_HOSTS:
+        add("short_link", host)
+
+
+def indicator_hash(kind, value):
+    # 도메인/URL/번호 모두 "유형:값" 문자열의 64비트 해시로 색인
+    return int.from_bytes(hashlib.blake2b(f"{kind}:{value}".encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def write_index(entries, out_path):
+    """
+    평판 항목 [(유형, 값, 위험도 0~100), ...]을 mmap용 색인 파일로 기록합니다.
+    파일 구조: 헤더 | 정렬된 해시(uint64) | 위험도(uint8). 같은 항목이 여러 번 나오면 마지막 값을 사용합니다.
+    도메인 값은 해당 도메인과 모든 하위 도메인에 적용됩니다. 위험도 0은 허용 목록(allowlist)입니다.
+    """
+    table = {}
+    for kind, value, risk in entries:
+        if kind == "domain":
+            value = _normalize_domain(value)
+        elif kind == "phone":
+            value = _phone_digits(value)
+        elif kind == "account":
+            value = _digits(value)
+        table[indicator_hash(kind, value)] = max(0, min(100, int(risk)))
+
+    hashes = np.array(sorted(table), dtype="<u8")
+    risks = np.array([table[h] for h in hashes.tolist()], dtype="u1")
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, len(hashes)))
+        f.write(hashes.tobytes())
+        f.write(risks.tobytes())
+    os.replace(tmp_path, out_path)
+    return len(hashes)
+
+
+def load_entries(path):
+    """탭 구분 평판 목록 (유형<TAB>값<TAB>위험도, '#'은 주석)을 읽습니다."""
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            kind, value, *rest = line.split("\t")
+            entries.append((kind, value, int(rest[0]) if rest else 100))
+    return entries
+
+
+class ReputationIndex:
+    """
+    [Reputation Index]
+    차단/허용 지표의 해시 집합을 mmap으로 열어 조회합니다. (해시 배열을 이진 탐색)
+    도메인은 역순 도메인 트라이처럼 가장 구체적인 상위 도메인부터 차례로 조회하므로
+    a.b.example.com -> b.example.com -> example.com 순으로 도메인 길이에 비례하는 시간에 판정합니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count = INDEX_HEADER.unpack_from(self.mm, 0)
+        if magic != INDEX_MAGIC:
+            raise ValueError(f"평판 색인 파일 형식이 아닙니다: {path}")
+        self.hashes = np.frombuffer(self.mm, dtype="<u8", count=count, offset=INDEX_HEADER.size)
+        self.risks = np.frombuffer(self.mm, dtype="u1", count=count, offset=INDEX_HEADER.size + count * 8)
+
+    @classmethod
+    def load_if_exists(cls, path=DEFAULT_INDEX_PATH):
+        if path and os.path.exists(path):
+            index = cls(path)
+            print(f"[*] 평판 색인 로드: {path} ({len(index):,}건)")
+            return index
+        return None
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def _get(self, kind, value):
+        key = indicator_hash(kind, value)
+        position = int(np.searchsorted(self.hashes, key))
+        if position < len(self.hashes) and int(self.hashes[position]) == key:
+            return int(self.risks[position])
+        return None
+
+    def lookup(self, kind, value):
+        """지표의 위험도(0~100)를 반환합니다. 목록에 없으면 None."""
+        if kind == "domain":
+            labels = value.split(".")
+            for i in range(len(labels) - 1):
+                risk = self._get("domain", ".".join(labels[i:]))
+                if risk is not None:
+                    return risk
+            return None
+        return self._get(kind, value)
+
+
+class IndicatorGuard:
+    """
+    [Indicator Guard]
+    탐지 단계(SmishingDetector/CampaignDetector) 앞에서 지표를 추출하고 평판 색인과 대조합니다.
+    - 위험도가 block_risk 이상인 지표가 있으면 모델을 호출하지 않고 스미싱으로 판정 (short-circuit)
+    - 그 밖에는 지표 위험도를 모델 점수의 로짓에 더함: sigmoid(logit(모델 점수) + 위험도/100 * weight * max_boost)
+      모델 점수를 올리기만 하고 0에 가까운 점수를 임계값 위로 끌어올리지는 못하므로, 차단 기준 미만 지표만으로는
+      스미싱 판정이 나지 않습니다. (판정은 모델이 어느 정도 의심할 때만 뒤집힘)
+    - 허용 목록(위험도 0) 지표는 다른 지표의 휴리스틱 위험도를 무시하게 합니다. (모델 점수는 그대로)
+    결과에는 "indicators"(지표별 위험도)와 "indicator_risk"가 추가됩니다.
+    """
+
+    def __init__(self, inner, index=None, block_risk=90, weight=1.0, max_boost=MAX_LOGIT_BOOST):
+        self.inner = inner
+        # 임계값/전처리는 실제 탐지 모델에서 가져옴 (inner가 CampaignDetector이면 그 안의 SmishingDetector)
+        self.detector = getattr(inner, "detector", inner)
+        self.index = index
+        self.block_risk = block_risk
+        self.weight = weight
+        self.max_boost = max_boost
+        self.lock = threading.Lock()
+        self.stats = {"messages": 0, "short_circuits": 0, "reweighted": 0}
+
+    def assess(self, text):
+        """지표 추출 + 평판 조회. 반환값: (지표 목록, 최대 위험도 0~100)"""
+        indicators = extract_indicators(text)
+        allowlisted = False
+        for indicator in indicators:
+            risk = self.index.lookup(indicator["type"], indicator["value"]) if self.index else None
+            indicator["listed"] = risk is not None
+            if risk is None:
+                risk = HEURISTIC_RISK.get(indicator["type"], 0)
+            elif risk == 0:
+                allowlisted = True
+            indicator["risk"] = risk
+        listed = [i["risk"] for i in indicators if i["listed"]]
+        if allowlisted:
+            return indicators, max(listed)
+        return indicators, max((i["risk"] for i in indicators), default=0)
+
+    def predict(self, text):
+        with span("indicators.assess"):
+            indicators, risk = self.assess(text)
+
+        if risk >= self.block_risk:
+            self._count("short_circuits")
+            incr("indicator_verdicts", source="blocklist")
+            return {
+                "is_smishing": True,
+                "confidence": 1.0,
+                "smishing_score": 1.0,
+                "original_text": text,
+                "processed_text": self.detector.preprocess(text),
+                "indicators": indicators,
+                "indicator_risk": risk,
+                "short_circuit": True
+            }
+
+        result = self.inner.predict(text)
+        if risk:
+            model_score = result["smishing_score"]
+            score = self.combine(model_score, risk)
+            is_smishing = score >= self.detector.threshold
+            result = {
+                **result,
+                "model_score": model_score,
+                "smishing_score": score,
+                "is_smishing": is_smishing,
+                "confidence": score if is_smishing else 1 - score
+            }
+            self._count("reweighted")
+            incr("indicator_verdicts", source="reweighted")
+        else:
+            self._count()
+        result["indicators"] = indicators
+        result["indicator_risk"] = risk
+        result["short_circuit"] = False
+        return result
+
+    def combine(self, model_score, risk):
+        """차단 기준 미만 지표의 위험도를 모델 점수의 로짓에 더한 최종 점수"""
+        model_score = min(max(model_score, 1e-6), 1 - 1e-6)
+        logit = math.log(model_score / (1 - model_score)) + risk / 100 * self.weight * self.max_boost
+        return 1 / (1 + math.exp(-logit))
+
+    def _count(self, key=None):
+        with self.lock:
+            self.stats["messages"] += 1
+            if key:
+                self.stats[key] += 1
+
+    def get_report(self):
+        with self.lock:
+            return {**self.stats, "index_entries": len(self.index) if self.index else 0}
+
+
+def build_index(out_path=DEFAULT_INDEX_PATH, list_paths=(), db=None, min_score=0.9, learned_risk=45,
+                learned_number_risk=30, block_risk=90, threshold=0.5):
+    """
+    평판 목록 파일들과 attack_logs에 기록된 지표(모델 점수 min_score 이상)를 합쳐 색인을 만듭니다.
+    목록 파일의 항목이 학습된 항목보다 우선합니다.
+
+    학습된 항목은 점수 가중에만 쓰이도록 block_risk 미만, 위험도/100이 탐지 임계값(threshold) 미만으로 기록합니다.
+    (차단은 검수된 목록만, 색인 조회 결과의 위험도도 그 자체로는 스미싱 판정 수준이 아님을 뜻함)
+    - 차단 목록 적중으로 모델을 건너뛴 로그(short_circuit)는 제외: 색인이 스스로를 근거로 커지지 않도록
+    - 전화번호/계좌번호는 정상 기관 번호가 도용되는 경우가 많으므로 learned_number_risk로 더 낮게 기록
+    """
+    if max(learned_risk, learned_number_risk) >= min(block_risk, threshold * 100):
+        raise ValueError(f"학습된 지표의 위험도는 차단 기준({block_risk})과 탐지 임계값({threshold:.0%})보다 낮아야 합니다.")
+    entries = []
+    if db is not None:
+        for kind, value, _, _ in db.fetch_logged_indicators(min_score=min_score):
+            # 단축 URL 서비스 자체는 차단하지 않음 (개별 단축 링크 URL만 학습)
+            if kind in ("short_link", "ip_url") or (kind == "domain" and value in SHORT_LINK_HOSTS):
+                continue
+            entries.append((kind, value, learned_number_risk if kind in ("phone", "account") else learned_risk))
+        print(f"[*] attack_logs에서 학습한 지표: {len(entries)}건")
+    for path in list_paths:
+        entries.extend(load_entries(path))
+    count = write_index(entries, out_path)
+    print(f"[*] 평판 색인 생성 완료: {out_path} ({count:,}건)")
+    return count
+
+
+if __name__ == "__main__":
+    import sys
+    import json
+    import argparse
+    sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+    parser = argparse.ArgumentParser(description="지표 추출 / 평판 색인 생성")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="평판 목록(TSV)과 attack_logs로 색인 생성")
+    build.add_argument("lists", nargs="*")
+    build.add_argument("--out", default=DEFAULT_INDEX_PATH)
+    build.add_argument("--from-db", action="store_true")
+    build.add_argument("--min-score", type=float, default=0.9)
+    build.add_argument("--threshold", type=float, default=0.5, help="탐지 임계값 (학습된 위험도의 상한 검증용)")
+    check = sub.add_parser("check", help="문자의 지표와 위험도 확인")
+    check.add_argument("text")
+    check.add_argument("--index", default=DEFAULT_INDEX_PATH)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        db = None
+        if args.from_db:
+            from database_manager import DBManager
+            db = DBManager()
+        build_index(args.out, args.lists, db=db, min_score=args.min_score, threshold=args.threshold)
+    else:
+        guard = IndicatorGuard(None, ReputationIndex.load_if_exists(args.index))
+        indicators, risk = guard.assess(args.text)
+        print(json.dumps({"indicators": indicators, "risk": risk}, ensure_ascii=False, indent=4))
@@ -1,30 +1,123 @@
-import openai
 import json
 import os
+import time
+import threading
 from dotenv import load_dotenv
 
+from src.bank_retriever import BankRetriever, estimate_tokens
+from src.intent_matcher import LocalIntentMatcher
+from src.llm_cache import LLMResponseCache, make_cache_key
+from src.llm_client import build_llm_client
+from src.scenario_store import ScenarioBankStore, render_scenario
+from src.tracing import traced, span, incr
+
 load_dotenv(override=True)
 
 class IntentAnalyzer:
-    def __init__(self, api_key=None):
-        self.client = openai.OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
-        self.bank_path = os.path.join(os.path.dirname(__file__), "../data/scenario_bank.json")
-        self._load_bank()
+    MODEL = "gpt-4o"
 
-    def _load_bank(self):
-        with open(self.bank_path, "r", encoding="utf-8") as f:
-            self.data = json.load(f)
-            self.scenario_bank = self.data["scenarios"]
+    def __init__(self, api_key=None, local_matcher=None, cache=None, use_cache=True, bank_store=None, retriever=None):
+        # LLM_CLIENT_MODE 환경 변수에 따라 실제 API / 녹화 / 재생 클라이언트 선택
+        self.client = build_llm_client(api_key)
+        self.bank_path = os.path.join(os.path.dirname(__file__), "../data/scenario_bank.json")
+        self.exemplar_path = os.path.join(os.path.dirname(__file__), "../data/final_dataset.json")
+        # 시나리오 뱅크 저장소 (최초 실행 시 scenario_bank.json 내용을 가져옴)
+        self.bank_store = bank_store or ScenarioBankStore(seed_json_path=self.bank_path)
+
+        # 문자와 관련된 뱅크 항목만 프롬프트에 넣는 검색 단계 (None이면 뱅크 전체를 넣음)
+        self.retriever = retriever if retriever is not None else BankRetriever()
+
+        # 로컬 1차 매칭 단계 (없으면 모든 문자를 GPT로 분석)
+        self.local_matcher = local_matcher
+        # 디스크 응답 캐시 (세션/재시작 간 동일 요청의 API 재호출 방지)
+        self.cache = cache or (LLMResponseCache() if use_cache else None)
+        # 여러 스레드에서 동시에 분석할 때 뱅크 등록/사례 추가를 직렬화
+        self.lock = threading.Lock()
+        # 단계별 호출 수/누적 지연 시간(ms)
+        self.stats = {"requests": 0, "local_hits": 0, "local_ms": 0.0, "cache_hits": 0, "llm_calls": 0, "llm_ms": 0.0,
+                      "bank_prompts": 0, "bank_tokens": 0, "full_bank_tokens": 0}
+
+    @property
+    def scenario_bank(self):
+        """등록된 전체 시나리오 목록 (저장소가 바뀌었을 때만 다시 읽음)"""
+        return self.bank_store.all()
 
     def _update_bank(self, new_scenario):
-        """새로운 시나리오를 JSON 파일에 영구적으로 추가합니다."""
-        self.scenario_bank.append(new_scenario)
-        with open(self.bank_path, "w", encoding="utf-8") as f:
-            json.dump({"scenarios": self.scenario_bank}, f, indent=4, ensure_ascii=False)
-        print(f"[*] 신규 공격 의도 등록 완료: {new_scenario['intent_name']}")
+        """새로운 시나리오를 저장소에 추가하고, 발급된 ID가 채워진 항목을 반환합니다."""
+        new_entry = self.bank_store.register_new(new_scenario)
+        print(f"[*] 신규 공격 의도 등록 완료: {new_entry['intent_id']} {new_entry['intent_name']}")
+        return new_entry
 
+    def attach_local_matcher(self, detector, threshold=0.92):
+        """
+        탐지 모델(RoBERTa)의 인코더로 시나리오 뱅크와 과거 분석 사례를 임베딩하여
+        로컬 매칭 단계를 활성화합니다. threshold는 보정 표본이 부족할 때 쓰는 기본 임계값이며,
+        탐지 모델이 진화하면(weights_version 변경) 색인을 다시 임베딩하고 임계값을 다시 보정합니다.
+        """
+        matcher = LocalIntentMatcher(detector.embed, threshold=threshold,
+                                     version_fn=lambda: getattr(detector, "weights_version", 0))
+        matcher.build(self.scenario_bank, exemplar_path=self.exemplar_path)
+        # 색인이 완성된 뒤에 연결 (백그라운드 로딩 중 분석 요청이 와도 빈 색인을 보지 않도록)
+        self.local_matcher = matcher
+        print(f"[*] 로컬 의도 매칭 준비 완료 (색인 {matcher.size}건, 임계값 {matcher.threshold:.3f})")
+
+    def get_stage_report(self):
+        """단계별 적중률과 평균 지연 시간을 반환합니다."""
+        requests = self.stats["requests"]
+        hits = self.stats["local_hits"]
+        llm_calls = self.stats["llm_calls"]
+        full_tokens = self.stats["full_bank_tokens"]
+        return {
+            "requests": requests,
+            "local_hit_rate": hits / requests if requests else 0.0,
+            "local_avg_ms": self.stats["local_ms"] / requests if requests and self.local_matcher else 0.0,
+            "cache_hits": self.stats["cache_hits"],
+            "llm_calls": llm_calls,
+            "llm_avg_ms": self.stats["llm_ms"] / llm_calls if llm_calls else 0.0,
+            "bank_prompt_reduction": 1 - self.stats["bank_tokens"] / full_tokens if full_tokens else 0.0
+        }
+
+    def _render_bank(self, attack_message):
+        """
+        프롬프트에 넣을 뱅크 요약을 만듭니다.
+        검색 단계가 있으면 관련 항목만 골라 렌더링하고, 전체 뱅크 대비 토큰 수를 기록합니다.
+        """
+        if self.retriever is None:
+            return self.bank_store.render_prompt()
+
+        # 저장소가 바뀐 경우(신규 수법 등록 등)에만 재색인
+        version = self.bank_store.version()
+        if self.retriever.version != version:
+            self.retriever.fit(self.bank_store.all(), version)
+
+        bank_info = "\n".join(render_scenario(s) for s in self.retriever.select(attack_message))
+        self.stats["bank_prompts"] += 1
+        self.stats["bank_tokens"] += estimate_tokens(bank_info)
+        self.stats["full_bank_tokens"] += self.retriever.full_bank_tokens()
+        return bank_info
+
+    @traced("intent.analyze")
     def analyze_intent(self, attack_message):
-        bank_info = "\n".join([f"- {s['intent_id']}: {s['intent_name']} ({s['description']})" for s in self.scenario_bank])
+        self.stats["requests"] += 1
+
+        # 1단계: 로컬 임베딩 매칭 (유사도가 충분히 높으면 GPT 호출 생략)
+        if self.local_matcher:
+            start = time.perf_counter()
+            with span("intent.local_match"):
+                profile, similarity = self.local_matcher.match(attack_message)
+            self.stats["local_ms"] += (time.perf_counter() - start) * 1000
+            if profile:
+                self.stats["local_hits"] += 1
+                profile["reason"] = f"로컬 임베딩 매칭: 기존 프로파일과 코사인 유사도 {similarity:.3f}"
+                profile["match_source"] = "local"
+                profile["similarity"] = similarity
+                incr("intent_requests", source="local")
+                return profile
+
+        # 2단계: GPT 프로파일링
+        # 문자와 관련된 뱅크 항목만 토큰 예산 안에서 포함
+        with span("intent.bank_retrieval"):
+            bank_info = self._render_bank(attack_message)
 
         prompt = f"""
         당신은 사이버 범죄 심리 및 법률 전문가로 구성된 '지능형 위협 프로파일링 엔진'입니다. 
@@ -54,31 +147,58 @@ class IntentAnalyzer:
         }}
         """
 
-        response = self.client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "당신은 디지털 포렌식 및 사이버 범죄 수사 전문가입니다."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={ "type": "json_object" }
-        )
-        
-        result = json.loads(response.choices[0].message.content)
-
-        # 신종 수법 등록 시 새로운 필드들도 함께 저장되도록 보완
-        if result['matched_intent_id'] == "NEW":
-            new_id = f"NEW-{len(self.scenario_bank) + 1:02d}"
-            new_entry = {
-                "intent_id": new_id,
-                "intent_name": result['intent_name'],
-                "description": result['description'],
-                "severity_score": result['severity_score'],
-                "legal_risks": result['legal_risks'],
-                "registered_at": "2026-02-02" # 동적 날짜 권장
-            }
-            self._update_bank(new_entry)
-            result['matched_intent_id'] = new_id
-            
+        messages = [
+            {"role": "system", "content": "당신은 디지털 포렌식 및 사이버 범죄 수사 전문가입니다."},
+            {"role": "user", "content": prompt}
+        ]
+        response_format = {"type": "json_object"}
+
+        # 프롬프트에 포함된 뱅크 요약과 뱅크 버전이 키에 반영되므로, 선택된 항목이 바뀌거나
+        # 신규 수법이 등록된 뒤에는 이전 응답(특히 NEW 판정)을 재사용하지 않음
+        cache_key = make_cache_key(self.MODEL, messages, response_format=response_format,
+                                   bank_version=self.bank_store.version())
+        content = self.cache.get(cache_key) if self.cache else None
+        source = "llm_cache"
+
+        if content is None:
+            start = time.perf_counter()
+            with span("intent.llm", model=self.MODEL):
+                response = self.client.chat.completions.create(
+                    model=self.MODEL,
+                    messages=messages,
+                    response_format=response_format
+                )
+            self.stats["llm_calls"] += 1
+            self.stats["llm_ms"] += (time.perf_counter() - start) * 1000
+            content = response.choices[0].message.content
+            source = "llm"
+            if self.cache:
+                self.cache.put(cache_key, self.MODEL, content)
+        else:
+            self.stats["cache_hits"] += 1
+
+        result = json.loads(content)
+
+        with self.lock:
+            # 신종 수법 등록 시 새로운 필드들도 함께 저장되도록 보완
+            if result['matched_intent_id'] == "NEW":
+                # ID(NEW-xx)와 등록일은 저장소가 원자적으로 발급
+                new_entry = self._update_bank({
+                    "intent_name": result['intent_name'],
+                    "description": result['description'],
+                    "severity_score": result['severity_score'],
+                    "legal_risks": result['legal_risks']
+                })
+                result['matched_intent_id'] = new_entry['intent_id']
+                if self.local_matcher:
+                    self.local_matcher.add_scenarios([new_entry])
+
+            # 분석된 문자는 이후 유사 변종을 로컬에서 처리할 수 있도록 사례로 등록
+            if self.local_matcher:
+                self.local_matcher.add_exemplar(attack_message, result)
+
+        result["match_source"] = source
+        incr("intent_requests", source=source)
         return result
     
 
@@ -113,4 +233,5 @@ if __name__ == "__main__":
         print(f" ▸ 분석 근거: {analysis_result['reason']}")
         print("-" * 60)
 
+    print(f"[*] 단계별 처리 현황: {analyzer.get_stage_report()}")
     print("\n[*] 모든 테스트 및 시나리오 뱅크 업데이트가 완료되었습니다.")
\ No newline at end of file
@@ -0,0 +1,208 @@
+import json
+import os
+import threading
+import numpy as np
+
+THREAT_LEVELS = {5: "Critical", 4: "High", 3: "Medium"}
+
+
+def threat_level_of(severity_score):
+    """위협 점수(1~5)를 위협 레벨 문자열로 변환합니다."""
+    try:
+        return THREAT_LEVELS.get(int(severity_score), "Low")
+    except (TypeError, ValueError):
+        return "Unknown"
+
+
+class LocalIntentMatcher:
+    """
+    [Local Intent Matcher]
+    GPT 호출 전에 동작하는 로컬 1차 매칭 단계.
+    시나리오 뱅크 항목과 과거 분석 사례(exemplar)를 한 번 임베딩해 두고,
+    입력 문자와의 코사인 유사도(정규화 벡터의 내적)로 가장 가까운 프로파일을 찾습니다.
+
+    로컬에서 바로 답할 수 있는 것은 전체 프로파일(위협 점수, 적용 법률)을 가진 항목뿐이므로
+    - 과거 분석 사례: GPT가 반환한 결과 전체를 보관 (최대 max_exemplars건, 넘으면 오래된 사례부터 제거)
+    - 뱅크 항목: severity_score/legal_risks가 있는 항목(NEW-xx 등)만 색인
+
+    임베딩 모델의 가중치가 바뀌면(version_fn 값 변경: 진화 학습, 어댑터 교체) 색인을 다시 임베딩하고
+    임계값을 다시 보정합니다. 이전 벡터와 새 인코더의 질의를 비교하지 않도록 하기 위함입니다.
+    """
+
+    def __init__(self, embed_fn, threshold=0.92, version_fn=None, max_exemplars=5000,
+                 target_precision=0.95, min_calibration_samples=20):
+        # embed_fn: 문자열 리스트 -> L2 정규화된 numpy 배열 (예: SmishingDetector.embed)
+        self.embed_fn = embed_fn
+        # version_fn: 임베딩 가중치 버전 (예: lambda: detector.weights_version)
+        self.version_fn = version_fn or (lambda: 0)
+        self.default_threshold = threshold
+        self.threshold = threshold
+        self.max_exemplars = max_exemplars
+        self.target_precision = target_precision
+        self.min_calibration_samples = min_calibration_samples
+        self.lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.buffer = None   # 용량을 두 배씩 늘리는 임베딩 버퍼 (행 추가 시 전체 복사를 피함)
+        self.size = 0
+        self.texts = []      # 재임베딩용 원문
+        self.kinds = []      # "scenario" / "exemplar"
+        self.profiles = []
+        self.weights_version = self.version_fn()
+
+    @property
+    def matrix(self):
+        return None if self.buffer is None else self.buffer[:self.size]
+
+    def _append(self, vectors):
+        needed = self.size + len(vectors)
+        if self.buffer is None or needed > len(self.buffer):
+            capacity = max(needed, 2 * (len(self.buffer) if self.buffer is not None else 64))
+            grown = np.empty((capacity, vectors.shape[1]), dtype=np.float32)
+            if self.size:
+                grown[:self.size] = self.buffer[:self.size]
+            self.buffer = grown
+        self.buffer[self.size:needed] = vectors
+
+    def _add(self, texts, profiles, kind):
+        if not texts:
+            return
+        vectors = np.asarray(self.embed_fn(texts), dtype=np.float32)
+        with self.lock:
+            # 동시 조회 중에도 행 인덱스가 항상 유효하도록 행을 먼저 쓴 뒤 프로파일과 크기를 늘림
+            self._append(vectors)
+            self.texts.extend(texts)
+            self.kinds.extend([kind] * len(texts))
+            self.profiles.extend(profiles)
+            self.size += len(texts)
+            if kind == "exemplar":
+                self._evict_exemplars()
+
+    def _evict_exemplars(self):
+        exemplar_rows = [i for i, k in enumerate(self.kinds) if k == "exemplar"]
+        overflow = len(exemplar_rows) - self.max_exemplars
+        if overflow <= 0:
+            return
+        # 매번 한 행씩 지우지 않도록 상한의 10%를 한 번에 제거 (오래된 사례부터)
+        drop = set(exemplar_rows[:overflow + self.max_exemplars // 10])
+        keep = [i for i in range(self.size) if i not in drop]
+        self.buffer = self.buffer[keep].copy()
+        self.size = len(keep)
+        self.texts = [self.texts[i] for i in keep]
+        self.kinds = [self.kinds[i] for i in keep]
+        self.profiles = [self.profiles[i] for i in keep]
+
+    def build(self, scenario_bank, exemplar_path=None):
+        """뱅크 항목과 과거 분석 사례로 색인을 (재)구성하고 임계값을 보정합니다."""
+        with self.lock:
+            self._reset()
+            self.add_scenarios(scenario_bank)
+            if exemplar_path and os.path.exists(exemplar_path):
+                with open(exemplar_path, "r", encoding="utf-8") as f:
+                    for item in json.load(f):
+                        if item.get("generated_message") and item.get("intent_analysis"):
+                            self.add_exemplar(item["generated_message"], item["intent_analysis"])
+            self.calibrate()
+
+    def rebuild(self):
+        """현재 색인의 원문을 지금의 인코더로 다시 임베딩하고 임계값을 다시 보정합니다."""
+        with self.lock:
+            version = self.version_fn()
+            if self.size:
+                vectors = np.asarray(self.embed_fn(self.texts), dtype=np.float32)
+                self.buffer = vectors.copy()
+            self.weights_version = version
+            print(f"[*] 로컬 의도 매칭 색인 재구성 (가중치 버전 {version}, {self.size}건)")
+            self.calibrate()
+
+    def add_scenarios(self, scenarios):
+        texts, profiles = [], []
+        for s in scenarios:
+            if "severity_score" not in s or "legal_risks" not in s:
+                continue
+            texts.append(f"{s['intent_name']} {s['description']}")
+            profiles.append({
+                "matched_intent_id": s["intent_id"],
+                "intent_name": s["intent_name"],
+                "description": s["description"],
+                "severity_score": s["severity_score"],
+                "legal_risks": s["legal_risks"],
+                "threat_level": threat_level_of(s["severity_score"])
+            })
+        self._add(texts, profiles, "scenario")
+
+    def add_exemplar(self, message, analysis_result):
+        """GPT 분석이 끝난 문자를 사례로 추가하여 이후 유사 문자는 로컬에서 처리합니다."""
+        profile = {k: v for k, v in analysis_result.items() if k not in ("reason", "match_source", "similarity")}
+        self._add([message], [profile], "exemplar")
+
+    def calibrate(self, labeled=None):
+        """
+        [임계값 보정]
+        라벨이 있는 (문자, 정답 intent_id) 쌍에서 최근접 항목의 유사도와 정답 여부를 구하고,
+        유사도가 t 이상인 매칭의 정밀도가 target_precision 이상이 되는 가장 낮은 t를 임계값으로 사용합니다.
+        labeled가 없으면 색인된 과거 분석 사례를 자기 자신을 제외하고 매칭하여 평가합니다 (leave-one-out).
+        표본이 min_calibration_samples 미만이면 기본 임계값을 유지합니다.
+        반환값: 적용된 임계값
+        """
+        with self.lock:
+            matrix = self.matrix
+            ids = [p.get("matched_intent_id") for p in self.profiles]
+            if matrix is None:
+                return self.threshold
+            if labeled:
+                queries = np.asarray(self.embed_fn([m for m, _ in labeled]), dtype=np.float32)
+                scores = queries @ matrix.T
+                # 색인에 같은 원문이 있으면 자기 자신과의 매칭은 제외
+                row_of = {t: i for i, t in enumerate(self.texts)}
+                for q, (message, _) in enumerate(labeled):
+                    if message in row_of:
+                        scores[q, row_of[message]] = -np.inf
+                labels = [label for _, label in labeled]
+            else:
+                rows = [i for i, k in enumerate(self.kinds) if k == "exemplar"]
+                scores = matrix[rows] @ matrix.T
+                scores[np.arange(len(rows)), rows] = -np.inf
+                labels = [ids[i] for i in rows]
+
+            if len(labels) < self.min_calibration_samples:
+                self.threshold = self.default_threshold
+                return self.threshold
+
+            best = scores.argmax(axis=1)
+            similarity = scores[np.arange(len(labels)), best]
+            correct = np.array([ids[b] == label for b, label in zip(best, labels)])
+            order = np.argsort(-similarity)
+            precision = np.cumsum(correct[order]) / np.arange(1, len(order) + 1)
+            passing = np.nonzero(precision >= self.target_precision)[0]
+            if len(passing):
+                # 유사도 내림차순으로 정밀도 조건을 만족하는 가장 긴 구간의 끝 = 가장 낮은 임계값
+                self.threshold = float(similarity[order[passing[-1]]])
+            else:
+                self.threshold = 1.0  # 어떤 구간도 정밀도를 만족하지 못하면 동일 문자만 로컬 처리
+            print(f"[*] 로컬 의도 매칭 임계값 보정: {self.threshold:.3f} "
+                  f"(표본 {len(labels)}건, 목표 정밀도 {self.target_precision})")
+            return self.threshold
+
+    def match(self, message):
+        """
+        가장 유사한 프로파일을 찾습니다.
+        반환값: (프로파일 또는 None, 유사도). 유사도가 threshold 미만이면 프로파일은 None.
+        """
+        if self.version_fn() != self.weights_version:
+            with self.lock:
+                # 여러 스레드가 동시에 변경을 감지해도 한 번만 재구성
+                if self.version_fn() != self.weights_version:
+                    self.rebuild()
+        with self.lock:
+            matrix, profiles, threshold = self.matrix, self.profiles, self.threshold
+        if matrix is None or not len(matrix):
+            return None, 0.0
+        query = np.asarray(self.embed_fn([message]), dtype=np.float32)[0]
+        scores = matrix @ query
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+        if score < threshold:
+            return None, score
+        return dict(profiles[best]), score
@@ -0,0 +1,88 @@
+import re
+
+
+class KeywordMatcher:
+    """
+    [Multi-Keyword Matcher]
+    여러 키워드의 등장 횟수를 텍스트 1회 스캔으로 세는 컴파일된 매처.
+    결과는 키워드별 `text.count(kw)`와 동일합니다.
+
+    동작 방식:
+    1. 긴 키워드 우선의 단일 정규식 alternation으로 텍스트를 한 번 훑습니다.
+    2. 정규식은 겹치는 매치를 건너뛰므로, 매치 구간 안에서 시작하는 다른 키워드
+       (예: '비트코인' 안의 '코인', '지원금리'의 '금리')는 빌드 시점에 계산한
+       후보 목록으로 그 위치만 추가 확인합니다.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = list(dict.fromkeys(kw for kw in keywords if kw))
+        if not self.keywords:
+            raise ValueError("키워드가 최소 1개 이상 필요합니다.")
+
+        ordered = sorted(self.keywords, key=len, reverse=True)
+        self.pattern = re.compile("|".join(re.escape(kw) for kw in ordered))
+
+        # 키워드 A의 매치 구간 안에서 시작할 수 있는 (offset, 키워드 B) 후보
+        self.inner_candidates = {}
+        for a in self.keywords:
+            candidates = []
+            for offset in range(len(a)):
+                tail = a[offset:]
+                for b in self.keywords:
+                    if offset == 0 and b == a:
+                        continue
+                    if tail.startswith(b) or b.startswith(tail):
+                        candidates.append((offset, b))
+            self.inner_candidates[a] = candidates
+
+        # 자기 자신과 겹칠 수 있는 키워드(예: 'aa')는 str.count처럼 비중첩으로 세야 함
+        self.self_overlapping = {
+            kw for kw in self.keywords
+            if any(kw[i:] == kw[:len(kw) - i] for i in range(1, len(kw)))
+        }
+
+    def count(self, text):
+        """
+        텍스트에서 각 키워드의 등장 횟수를 {키워드: 횟수}로 반환합니다.
+        등장하지 않은 키워드는 결과에 포함되지 않으므로 `.get(kw, 0)`으로 조회합니다.
+        """
+        counts = {}
+        positions = {}  # 자기 중첩 키워드의 시작 위치
+        inner_candidates = self.inner_candidates
+        self_overlapping = self.self_overlapping
+
+        for m in self.pattern.finditer(text):
+            found = [(m.group(), m.start())]
+            for offset, other in inner_candidates[found[0][0]]:
+                if text.startswith(other, found[0][1] + offset):
+                    found.append((other, found[0][1] + offset))
+
+            for kw, pos in found:
+                if kw in self_overlapping:
+                    positions.setdefault(kw, []).append(pos)
+                else:
+                    counts[kw] = counts.get(kw, 0) + 1
+
+        for kw, starts in positions.items():
+            # 왼쪽부터 겹치지 않게 선택 (str.count와 동일한 규칙)
+            n, last_end = 0, -1
+            for pos in sorted(starts):
+                if pos >= last_end:
+                    n += 1
+                    last_end = pos + len(kw)
+            counts[kw] = n
+        return counts
+
+    def count_joined(self, texts, sep=" "):
+        """
+        `sep.join(texts)`에 대해 count()를 한 것과 같은 결과를 반환합니다.
+        구분자 문자를 포함하는 키워드가 없으면 거대한 문자열을 만들지 않고 텍스트별 결과를 합산합니다.
+        """
+        if any(ch in kw for kw in self.keywords for ch in sep):
+            return self.count(sep.join(texts))
+
+        totals = {}
+        for text in texts:
+            for kw, n in self.count(text).items():
+                totals[kw] = totals.get(kw, 0) + n
+        return totals
@@ -0,0 +1,103 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(__file__), "../data/llm_cache.db")
+
+
+def make_cache_key(model, messages, **params):
+    """
+    모델, 프롬프트(메시지 목록), 응답에 영향을 주는 파라미터(응답 형식, 시나리오 뱅크 버전 등)로
+    캐시 키(SHA-256)를 만듭니다.
+    """
+    payload = json.dumps(
+        {"model": model, "messages": messages, "params": params},
+        ensure_ascii=False, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    [LLM Response Cache]
+    OpenAI 응답 본문을 디스크(SQLite)에 보관하는 캐시.
+    세션/프로세스가 재시작되어도 동일한 요청은 API를 다시 호출하지 않습니다.
+    - TTL: ttl_seconds가 지난 항목은 만료
+    - 크기 제한: max_entries를 넘으면 가장 오래 사용되지 않은 항목부터 삭제 (LRU)
+    """
+
+    def __init__(self, db_path=DEFAULT_CACHE_PATH, ttl_seconds=7 * 24 * 3600, max_entries=10000):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        # 여러 Streamlit 세션/프로세스가 함께 쓰므로 잠금 대기 시간을 둠
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT,
+                created_at REAL,
+                last_access REAL
+            )
+        ''')
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_last_access ON llm_responses (last_access)")
+        self.conn.commit()
+
+    def get(self, key):
+        """캐시된 응답 본문을 반환합니다. 없거나 만료되었으면 None."""
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT response, created_at FROM llm_responses WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row and now - row[1] <= self.ttl_seconds:
+                self.conn.execute("UPDATE llm_responses SET last_access = ? WHERE cache_key = ?", (now, key))
+                self.conn.commit()
+                self.stats["hits"] += 1
+                return row[0]
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key, model, response):
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (cache_key, model, response, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, now, now)
+            )
+            self._evict(now)
+            self.conn.commit()
+
+    def _evict(self, now):
+        # 1. 만료 항목 삭제
+        cur = self.conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        evicted = cur.rowcount
+        # 2. 크기 제한 초과분을 LRU 순으로 삭제
+        count = self.conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        if count > self.max_entries:
+            cur = self.conn.execute(
+                "DELETE FROM llm_responses WHERE cache_key IN "
+                "(SELECT cache_key FROM llm_responses ORDER BY last_access ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+            evicted += cur.rowcount
+        self.stats["evictions"] += max(evicted, 0)
+
+    def get_stats(self):
+        """적중률을 포함한 캐시 통계를 반환합니다."""
+        total = self.stats["hits"] + self.stats["misses"]
+        with self.lock:
+            size = self.conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        return {**self.stats, "hit_rate": self.stats["hits"] / total if total else 0.0, "entries": size}
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,182 @@
+import os
+import time
+import random
+import threading
+from types import SimpleNamespace
+
+from src.llm_cache import make_cache_key
+from src.utils import iter_jsonl, dumps
+
+DEFAULT_FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "../data/llm_fixtures")
+
+
+class FixtureNotFoundError(LookupError):
+    """Replay 모드에서 요청에 해당하는 녹화 응답이 없을 때 발생합니다."""
+
+
+class SimulatedLLMError(RuntimeError):
+    """Replay 모드에서 설정한 확률로 발생시키는 가상 API 오류입니다."""
+
+
+def _request_key(kwargs):
+    params = {k: v for k, v in kwargs.items() if k not in ("model", "messages")}
+    return make_cache_key(kwargs.get("model"), kwargs.get("messages"), **params)
+
+
+def _completion(content, model):
+    """openai ChatCompletion 응답과 같은 방식(choices[0].message.content)으로 접근 가능한 객체."""
+    message = SimpleNamespace(role="assistant", content=content)
+    return SimpleNamespace(model=model, choices=[SimpleNamespace(index=0, message=message, finish_reason="stop")])
+
+
+class FixtureStore:
+    """
+    [Fixture Store]
+    녹화된 LLM 응답을 보관하는 append-only JSONL 저장소.
+    한 줄에 {key, model, messages, params, content} 하나를 기록합니다.
+    """
+
+    FILE_NAME = "fixtures.jsonl"
+
+    def __init__(self, fixture_dir=DEFAULT_FIXTURE_DIR):
+        self.fixture_dir = fixture_dir
+        self.path = os.path.join(fixture_dir, self.FILE_NAME)
+        self.lock = threading.Lock()
+        self.fixtures = {}
+        self.by_model = {}
+
+        if os.path.exists(self.path):
+            for record in iter_jsonl(self.path):
+                self._index(record)
+
+    def _index(self, record):
+        self.fixtures[record["key"]] = record
+        self.by_model.setdefault(record["model"], []).append(record)
+
+    def get(self, key):
+        return self.fixtures.get(key)
+
+    def add(self, key, kwargs, content):
+        record = {
+            "key": key,
+            "model": kwargs.get("model"),
+            "messages": kwargs.get("messages"),
+            "params": {k: v for k, v in kwargs.items() if k not in ("model", "messages")},
+            "content": content
+        }
+        with self.lock:
+            os.makedirs(self.fixture_dir, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(dumps(record) + "\n")
+            self._index(record)
+
+
+class _Completions:
+    def __init__(self, handler):
+        self._handler = handler
+
+    def create(self, **kwargs):
+        return self._handler(kwargs)
+
+
+class RecordingClient:
+    """
+    [Record Mode]
+    실제 OpenAI 클라이언트로 요청을 보내고, 받은 응답을 FixtureStore에 녹화합니다.
+    """
+
+    def __init__(self, client, store):
+        self._client = client
+        self.store = store
+        self.chat = SimpleNamespace(completions=_Completions(self._create))
+
+    def _create(self, kwargs):
+        response = self._client.chat.completions.create(**kwargs)
+        self.store.add(_request_key(kwargs), kwargs, response.choices[0].message.content)
+        return response
+
+
+class ReplayClient:
+    """
+    [Replay Mode]
+    네트워크 없이 녹화된 응답을 돌려주는 LLM 대역(stand-in).
+    부하 테스트를 위해 응답 지연(latency_ms ± jitter_ms)과 오류율(error_rate)을 흉내냅니다.
+
+    on_miss:
+    - "error": 녹화되지 않은 요청이면 FixtureNotFoundError
+    - "same_model": 같은 모델의 녹화 응답 중 하나를 순환하여 반환 (매번 달라지는 입력으로 부하 테스트할 때)
+    """
+
+    def __init__(self, store, latency_ms=0, jitter_ms=0, error_rate=0.0, on_miss="error", seed=None):
+        if on_miss not in ("error", "same_model"):
+            raise ValueError(f"지원하지 않는 on_miss 옵션입니다: {on_miss}")
+        self.store = store
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.on_miss = on_miss
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counter = 0
+        self.stats = {"requests": 0, "hits": 0, "fallbacks": 0, "errors": 0}
+        self.chat = SimpleNamespace(completions=_Completions(self._create))
+
+    def _create(self, kwargs):
+        with self.lock:
+            self.stats["requests"] += 1
+            delay = max(0.0, self.latency_ms + self.rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            fail = self.rng.random() < self.error_rate
+            self.counter += 1
+            counter = self.counter
+
+        time.sleep(delay)
+        if fail:
+            with self.lock:
+                self.stats["errors"] += 1
+            raise SimulatedLLMError("Replay 모드 가상 오류 (error_rate 설정)")
+
+        record = self.store.get(_request_key(kwargs))
+        if record is not None:
+            with self.lock:
+                self.stats["hits"] += 1
+            return _completion(record["content"], record["model"])
+
+        candidates = self.store.by_model.get(kwargs.get("model"), [])
+        if self.on_miss == "same_model" and candidates:
+            with self.lock:
+                self.stats["fallbacks"] += 1
+            record = candidates[counter % len(candidates)]
+            return _completion(record["content"], record["model"])
+
+        raise FixtureNotFoundError(f"녹화된 응답이 없습니다 (model={kwargs.get('model')})")
+
+
+def build_llm_client(api_key=None, mode=None, fixture_dir=None):
+    """
+    [LLM 클라이언트 생성]
+    환경 변수 LLM_CLIENT_MODE에 따라 클라이언트를 선택합니다.
+    - live (기본값): openai.OpenAI
+    - record: 실제 호출 + 응답 녹화
+    - replay: 녹화 응답 재생 (LLM_REPLAY_LATENCY_MS, LLM_REPLAY_JITTER_MS,
+      LLM_REPLAY_ERROR_RATE, LLM_REPLAY_ON_MISS로 동작 조절)
+    """
+    mode = (mode or os.getenv("LLM_CLIENT_MODE", "live")).lower()
+    fixture_dir = fixture_dir or os.getenv("LLM_FIXTURE_DIR", DEFAULT_FIXTURE_DIR)
+
+    if mode == "replay":
+        return ReplayClient(
+            FixtureStore(fixture_dir),
+            latency_ms=float(os.getenv("LLM_REPLAY_LATENCY_MS", "0")),
+            jitter_ms=float(os.getenv("LLM_REPLAY_JITTER_MS", "0")),
+            error_rate=float(os.getenv("LLM_REPLAY_ERROR_RATE", "0")),
+            on_miss=os.getenv("LLM_REPLAY_ON_MISS", "error")
+        )
+
+    # live/record 모드에서만 openai를 불러옴 (replay는 네트워크/패키지 없이 동작)
+    import openai
+    client = openai.OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+    if mode == "record":
+        return RecordingClient(client, FixtureStore(fixture_dir))
+    if mode != "live":
+        raise ValueError(f"지원하지 않는 LLM_CLIENT_MODE입니다: {mode} (live/record/replay)")
+    return client
@@ -0,0 +1,268 @@
+import io
+import os
+import copy
+import threading
+from collections import deque
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from fpdf import FPDF
+from fontTools import ttLib
+
+# 폰트 재사용 경로는 fpdf2 내부 구현(TTFFont, SubsetMap 등)에 의존하므로 (2.8.x에서 검증)
+# 임포트나 자체 점검에 실패하면 공개 API(pdf.add_font)로 폰트를 등록합니다.
+try:
+    from fpdf.fonts import TTFFont, SubsetMap
+    FONT_REUSE_AVAILABLE = True
+except ImportError:
+    FONT_REUSE_AVAILABLE = False
+
+FONT_FAMILY = "NanumGothic"
+DEFAULT_FONT_PATH = "assets/fonts/NanumGothic.ttf"
+
+_FONT_CACHE = {}
+_FONT_LOCK = threading.Lock()
+
+
+class _ParsedFont:
+    """
+    한 번 파싱한 TTF 폰트 (프로세스당 1회).
+    문자 폭/cmap 등 파싱 결과와 글리프 순서, 원본 바이트를 보관합니다.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.data = f.read()
+        self.template = TTFFont(FPDF(), path, FONT_FAMILY.lower(), "")
+        self.glyph_order = self.template.ttfont.getGlyphOrder()
+        self._self_test()
+
+    def _self_test(self):
+        # 내부 구현이 바뀐 fpdf2 버전에서는 여기서 예외가 나므로 get_font()가 공개 API 경로로 전환
+        pdf = FPDF()
+        self.attach(pdf)
+        pdf.add_page()
+        pdf.set_font(FONT_FAMILY, '', 10)
+        pdf.cell(0, 10, '폰트 점검 AISDS')
+        pdf.output()
+
+    def attach(self, pdf):
+        """
+        문서에 폰트를 등록합니다. (pdf.add_font 대체)
+        출력 시 서브셋팅이 ttfont 객체를 직접 변경하므로 ttfont만 문서마다 새로 열고(지연 로딩),
+        글리프 순서를 미리 넣어 cmap 기반 글리프 이름 계산을 생략합니다.
+        """
+        font = copy.copy(self.template)
+        font.i = len(pdf.fonts) + 1
+        font.ttfont = ttLib.TTFont(io.BytesIO(self.data), recalcTimestamp=False, lazy=True)
+        font.ttfont.setGlyphOrder(list(self.glyph_order))
+        font.missing_glyphs = []
+        font.biggest_size_pt = 0
+        font._hbfont = None
+        font.subset = SubsetMap(font)  # 문서에서 사용한 글리프만 임베딩
+        pdf.fonts[font.fontkey] = font
+
+
+class _PublicFont:
+    """fpdf2 내부 구현을 쓸 수 없을 때의 폰트 등록 (문서마다 pdf.add_font로 다시 파싱)"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def attach(self, pdf):
+        pdf.add_font(FONT_FAMILY, '', self.path)
+
+
+def get_font(path=DEFAULT_FONT_PATH):
+    """프로세스 단위 폰트 캐시에서 파싱된 폰트를 가져옵니다."""
+    key = os.path.abspath(path)
+    with _FONT_LOCK:
+        if key not in _FONT_CACHE:
+            font = None
+            if FONT_REUSE_AVAILABLE:
+                try:
+                    font = _ParsedFont(path)
+                except (AttributeError, TypeError, KeyError, ValueError) as e:
+                    print(f"[!] 폰트 재사용 경로를 사용할 수 없어 add_font로 등록합니다: {e}")
+            _FONT_CACHE[key] = font or _PublicFont(path)
+        return _FONT_CACHE[key]
+
+
+class PDFReport(FPDF):
+    # 나눔고딕은 굵은 서체 파일이 따로 없으므로(기존에도 같은 파일을 'B'로 등록) 한 가지 스타일만 사용
+    def header(self):
+        # 헤더: 기관명 느낌의 로고 텍스트
+        self.set_font(FONT_FAMILY, '', 10)
+        self.set_text_color(100, 100, 100)
+        self.cell(0, 10, '자율 대응형 지능형 스미싱 방어 시스템 (AISDS) - 공식 보안 권고문', 0, 1, 'R')
+        self.ln(5)
+
+    def footer(self):
+        # 푸터: 페이지 번호
+        self.set_y(-15)
+        self.set_font(FONT_FAMILY, '', 8)
+        self.set_text_color(128)
+        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+
+
+class ReportTemplate:
+    """
+    [Report Template]
+    리포트마다 바뀌지 않는 정적 레이아웃(제목, 정보 박스, 경고문)을 한 번만 구성해 둔 템플릿.
+    발간일이 바뀔 때만 다시 만들어집니다.
+    """
+
+    TITLE = '긴급 사이버 위협 분석 리포트'
+    NOTICE = '※ 본 리포트는 AI 시뮬레이션 결과이며, 실제 발생한 사건과 다를 수 있습니다.'
+
+    _cached = None
+
+    def __init__(self, issued_on):
+        self.issued_on = issued_on
+        self.info_line = f' 발간일: {issued_on}   |   발신: 자율 대응형 방어 시스템 (AISDS)   |   수신: 대한민국 국민 전체'
+
+    @classmethod
+    def today(cls):
+        issued_on = datetime.now().strftime('%Y년 %m월 %d일')
+        cached = cls._cached
+        if cached is None or cached.issued_on != issued_on:
+            cached = cls._cached = cls(issued_on)
+        return cached
+
+    def draw_head(self, pdf):
+        # 1. 문서 제목
+        pdf.set_font(FONT_FAMILY, '', 24)
+        pdf.cell(0, 20, self.TITLE, align='C', new_x="LMARGIN", new_y="NEXT")
+        pdf.ln(5)
+
+        # 2. 문서 정보 박스
+        pdf.set_fill_color(240, 240, 240)
+        pdf.set_font(FONT_FAMILY, '', 10)
+        pdf.cell(0, 10, self.info_line, align='C', fill=True, new_x="LMARGIN", new_y="NEXT")
+        pdf.ln(10)
+
+    def draw_tail(self, pdf):
+        # 4. 하단 경고문
+        pdf.ln(10)
+        pdf.set_text_color(200, 50, 50)  # 붉은색
+        pdf.set_font(FONT_FAMILY, '', 10)
+        pdf.cell(0, 10, self.NOTICE, align='C', new_x="LMARGIN", new_y="NEXT")
+
+
+class ReportPDFEngine:
+    """
+    [Report PDF Engine]
+    보안 리포트 PDF 렌더링 엔진.
+    - 폰트는 프로세스당 한 번만 파싱하고, 문서에는 사용한 글리프만 서브셋으로 임베딩
+    - 정적 레이아웃은 ReportTemplate으로 재사용
+    - render_batch / render_stream: 여러 리포트를 프로세스 풀에서 동시에 렌더링
+    - render_combined: 여러 리포트를 섹션으로 묶은 PDF 한 부
+    """
+
+    # A4 너비 210 - 좌우 여백 30
+    EFFECTIVE_WIDTH = 180
+
+    def __init__(self, font_path=DEFAULT_FONT_PATH):
+        self.font_path = font_path
+
+    def _new_document(self):
+        pdf = PDFReport(orientation='P', unit='mm', format='A4')
+        pdf.set_auto_page_break(auto=True, margin=15)
+        pdf.set_margins(15, 15, 15)  # Left, Top, Right
+        get_font(self.font_path).attach(pdf)
+        return pdf
+
+    def _draw_report(self, pdf, content_text, template):
+        pdf.add_page()
+        template.draw_head(pdf)
+
+        # 3. 본문 파싱 및 출력
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_font(FONT_FAMILY, '', 11)
+        for line in content_text.split('\n'):
+            line = line.strip()
+            if not line:
+                pdf.ln(2)
+                continue
+
+            # 섹션 제목 감지 (대괄호로 감싸진 경우)
+            if line.startswith('[') and line.endswith(']'):
+                pdf.ln(5)
+                pdf.set_font(FONT_FAMILY, '', 14)
+                pdf.set_text_color(0, 51, 102)  # 남색 계열
+                pdf.cell(0, 10, line.replace('[', '').replace(']', ''), align='L', new_x="LMARGIN", new_y="NEXT")
+                pdf.set_text_color(0, 0, 0)
+                pdf.set_font(FONT_FAMILY, '', 11)
+            else:
+                pdf.multi_cell(self.EFFECTIVE_WIDTH, 6, line, new_x="LMARGIN", new_y="NEXT")
+
+        template.draw_tail(pdf)
+
+    def render(self, content_text):
+        """텍스트 내용을 바탕으로 PDF를 생성하고 바이트를 반환합니다."""
+        pdf = self._new_document()
+        self._draw_report(pdf, content_text, ReportTemplate.today())
+        return bytes(pdf.output())
+
+    def render_combined(self, contents):
+        """
+        여러 리포트를 섹션(새 페이지부터 시작)으로 이어 붙인 PDF 한 부를 만듭니다.
+        폰트는 문서 전체에서 한 번만 임베딩됩니다.
+        """
+        pdf = self._new_document()
+        template = ReportTemplate.today()
+        for content_text in contents:
+            self._draw_report(pdf, content_text, template)
+        return bytes(pdf.output())
+
+    def render_stream(self, contents, max_workers=None):
+        """
+        [스트리밍 렌더링]
+        입력(이터러블)을 프로세스 풀에서 렌더링하여 PDF 바이트를 입력 순서대로 하나씩 내보냅니다.
+        진행 중인 작업 수를 제한하므로 결과를 모두 메모리에 쌓지 않습니다.
+        """
+        workers = max_workers or os.cpu_count() or 1
+        if workers <= 1:
+            for content_text in contents:
+                yield self.render(content_text)
+            return
+
+        window = workers * 2
+        pending = deque()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self.font_path,)) as executor:
+            for content_text in contents:
+                pending.append(executor.submit(_render_in_worker, content_text))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def render_batch(self, contents, max_workers=None):
+        """
+        [일괄 렌더링]
+        여러 리포트를 프로세스 풀에서 렌더링하고 입력 순서대로 PDF 바이트 리스트를 반환합니다.
+        각 워커는 시작 시 폰트를 한 번 파싱해 두고 재사용합니다.
+        """
+        contents = list(contents)
+        workers = min(max_workers or os.cpu_count() or 1, len(contents))
+        if workers <= 1:
+            return [self.render(text) for text in contents]
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self.font_path,)) as executor:
+            return list(executor.map(_render_in_worker, contents,
+                                     chunksize=max(1, len(contents) // (workers * 4))))
+
+
+_WORKER_ENGINE = None
+
+
+def _init_worker(font_path):
+    global _WORKER_ENGINE
+    _WORKER_ENGINE = ReportPDFEngine(font_path)
+    get_font(font_path)
+
+
+def _render_in_worker(content_text):
+    return _WORKER_ENGINE.render(content_text)
@@ -0,0 +1,297 @@
+import os
+import json
+import time
+import pstats
+import io
+import cProfile
+import functools
+import threading
+import tracemalloc
+
+# torch는 선택적 의존성 (없으면 cProfile만 사용)
+try:
+    import torch
+    from torch.profiler import profile as torch_profile, ProfilerActivity
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+MODES = ("off", "cprofile", "torch", "both")
+
+# 동시에 하나의 세션만 프로파일링 (cProfile/tracemalloc은 프로세스 전역 상태이므로 겹치면 측정이 깨짐)
+_SESSION_LOCK = threading.Lock()
+
+
+def current_rss_bytes():
+    """현재 프로세스의 상주 메모리(RSS). torch CPU 텐서처럼 tracemalloc이 보지 못하는 할당도 포함됩니다."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return None
+
+
+class RssSampler:
+    """
+    [RSS Sampler]
+    구간 동안 백그라운드 스레드가 interval초마다 RSS를 읽어 최대치를 기록합니다.
+    ru_maxrss(프로세스 전체 수명의 최대치, 초기화 불가)와 달리 구간 시작 시점 대비 증가량을 잴 수 있습니다.
+    with RssSampler() as sampler: ... -> sampler.peak_delta_mb
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.baseline = None
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _poll(self):
+        while not self._stop.wait(self.interval):
+            rss = current_rss_bytes()
+            if rss is not None and rss > self.peak:
+                self.peak = rss
+
+    def __enter__(self):
+        self.baseline = self.peak = current_rss_bytes()
+        if self.baseline is not None:
+            self._thread = threading.Thread(target=self._poll, name="rss-sampler", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            rss = current_rss_bytes()
+            if rss is not None and rss > self.peak:
+                self.peak = rss
+        return False
+
+    @property
+    def peak_delta_mb(self):
+        """구간 시작 대비 최대 RSS 증가량(MB). RSS를 읽을 수 없는 환경에서는 None"""
+        if self.baseline is None:
+            return None
+        return (self.peak - self.baseline) / (1024 * 1024)
+
+
+class _NoopSection:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SECTION = _NoopSection()
+
+
+class _ProfileSession:
+    """
+    샘플링된 호출 하나의 프로파일링 (cProfile / torch.profiler / 최대 메모리)
+    _SESSION_LOCK을 잡은 상태로 만들어지며 __exit__에서 해제합니다.
+    프로파일러 시작에 실패하면 시작한 것만 정리하고 잠금을 풀며, 호출 자체는 프로파일링 없이 진행합니다.
+    """
+
+    def __init__(self, profiler, name, call_no):
+        self.profiler = profiler
+        self.name = name
+        self.call_no = call_no
+        self.mode = profiler.mode
+        self.cprofile = None
+        self.torch_prof = None
+        self.own_tracemalloc = False
+        self.rss = RssSampler()
+        self.active = False
+
+    def __enter__(self):
+        try:
+            self._start()
+            self.active = True
+        except Exception as e:
+            self._abort()
+            print(f"[!] 프로파일링 시작 실패 ({self.name} #{self.call_no}): {e}")
+        return self
+
+    def _abort(self):
+        """_start 도중 실패했을 때 이미 시작한 프로파일러를 멈추고 잠금을 해제합니다."""
+        try:
+            if self.cprofile:
+                self.cprofile.disable()
+            if self.torch_prof:
+                try:
+                    self.torch_prof.__exit__(None, None, None)
+                except Exception:
+                    pass
+            if self.own_tracemalloc:
+                tracemalloc.stop()
+            self.rss.__exit__(None, None, None)
+        finally:
+            _SESSION_LOCK.release()
+
+    def _start(self):
+        self.rss.__enter__()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.own_tracemalloc = True
+        tracemalloc.reset_peak()
+        if TORCH_AVAILABLE and torch.cuda.is_available():
+            torch.cuda.reset_peak_memory_stats()
+
+        if self.mode in ("torch", "both") and TORCH_AVAILABLE:
+            activities = [ProfilerActivity.CPU]
+            if torch.cuda.is_available():
+                activities.append(ProfilerActivity.CUDA)
+            self.torch_prof = torch_profile(activities=activities, record_shapes=True, profile_memory=True)
+            self.torch_prof.__enter__()
+        if self.mode in ("cprofile", "both"):
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        self.start = time.perf_counter()
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.active:
+            return False
+        try:
+            self._finish(exc_type, exc, tb)
+        finally:
+            _SESSION_LOCK.release()
+        return False
+
+    def _finish(self, exc_type, exc, tb):
+        wall_ms = (time.perf_counter() - self.start) * 1000
+        if self.cprofile:
+            self.cprofile.disable()
+        if self.torch_prof:
+            self.torch_prof.__exit__(exc_type, exc, tb)
+
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        if self.own_tracemalloc:
+            tracemalloc.stop()
+        self.rss.__exit__(exc_type, exc, tb)
+
+        record = {
+            "name": self.name,
+            "call_no": self.call_no,
+            "wall_ms": wall_ms,
+            "peak_python_kb": peak_bytes / 1024,
+            # 호출 시작 대비 RSS 증가량 (torch CPU 텐서 포함, 다른 스레드의 할당도 섞일 수 있음)
+            "peak_rss_delta_mb": self.rss.peak_delta_mb,
+            "artifacts": []
+        }
+        if TORCH_AVAILABLE and torch.cuda.is_available():
+            record["peak_cuda_mb"] = torch.cuda.max_memory_allocated() / (1024 * 1024)
+
+        stem = os.path.join(self.profiler.out_dir, f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}-{self.call_no}")
+        os.makedirs(self.profiler.out_dir, exist_ok=True)
+        if self.cprofile:
+            # snakeviz, gprof2dot 등으로 플레임 그래프 확인
+            self.cprofile.dump_stats(stem + ".pstats")
+            record["artifacts"].append(stem + ".pstats")
+        if self.torch_prof:
+            # chrome://tracing 또는 Perfetto에서 열람, 연산자별 요약은 .txt
+            self.torch_prof.export_chrome_trace(stem + ".trace.json")
+            with open(stem + ".ops.txt", "w", encoding="utf-8") as f:
+                f.write(self.torch_prof.key_averages().table(sort_by="self_cpu_time_total", row_limit=30))
+            record["artifacts"].extend([stem + ".trace.json", stem + ".ops.txt"])
+
+        self.profiler._record(record)
+
+
+class Profiler:
+    """
+    [On-demand Profiler]
+    탐지/학습 핫패스에 거는 전환형 프로파일링 훅.
+    - mode: off / cprofile / torch / both
+    - every_n: N번 호출 중 1번만 프로파일링 (샘플링)
+    - out_dir: .pstats / Chrome trace(.trace.json) / 연산자 요약(.ops.txt) 저장 위치
+    호출마다의 최대 메모리(RSS 증가량, Python tracemalloc, CUDA)와 산출물 경로는 out_dir/profile_index.jsonl에 기록됩니다.
+    mode가 off이면 section()은 공용 no-op 객체를 반환합니다.
+    프로파일링은 한 번에 한 호출만 수행하며, 다른 호출을 프로파일링하는 중에 뽑힌 표본은 건너뜁니다.
+    """
+
+    def __init__(self, mode="off", every_n=100, out_dir="profiles"):
+        self.lock = threading.Lock()
+        self.counts = {}
+        self.records = []
+        self.configure(mode, every_n, out_dir)
+
+    def configure(self, mode=None, every_n=None, out_dir=None):
+        """실행 중에 프로파일링 설정을 바꿉니다. (None인 항목은 유지)"""
+        if mode is not None:
+            mode = mode.lower()
+            if mode not in MODES:
+                raise ValueError(f"지원하지 않는 PROFILE_MODE입니다: {mode} ({'/'.join(MODES)})")
+            if mode in ("torch", "both") and not TORCH_AVAILABLE:
+                print("[!] torch가 없어 torch.profiler를 사용할 수 없습니다. cProfile만 사용합니다.")
+                mode = "cprofile"
+            self.mode = mode
+        if every_n is not None:
+            self.every_n = max(1, int(every_n))
+        if out_dir is not None:
+            self.out_dir = out_dir
+        return self
+
+    @property
+    def enabled(self):
+        return self.mode != "off"
+
+    def section(self, name):
+        """with PROFILER.section("trainer.step"): ... 샘플링된 호출만 프로파일링합니다."""
+        if self.mode == "off":
+            return _NOOP_SECTION
+        with self.lock:
+            call_no = self.counts.get(name, 0) + 1
+            self.counts[name] = call_no
+        if (call_no - 1) % self.every_n:
+            return _NOOP_SECTION
+        if not _SESSION_LOCK.acquire(blocking=False):
+            return _NOOP_SECTION
+        return _ProfileSession(self, name, call_no)
+
+    def _record(self, record):
+        with self.lock:
+            self.records.append(record)
+            with open(os.path.join(self.out_dir, "profile_index.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        rss = record.get("peak_rss_delta_mb")
+        print(f"[*] 프로파일 저장: {record['name']} #{record['call_no']} ({record['wall_ms']:.1f}ms, "
+              f"RSS 증가 {'-' if rss is None else f'{rss:.1f}MB'}, Python 최대 {record['peak_python_kb']:.0f}KB)")
+
+
+def _from_env():
+    return Profiler(
+        mode=os.getenv("PROFILE_MODE", "off"),
+        every_n=int(os.getenv("PROFILE_SAMPLE_EVERY", "100")),
+        out_dir=os.getenv("PROFILE_DIR", "profiles")
+    )
+
+
+# 환경 변수로 초기 설정, 실행 중에는 PROFILER.configure(...)로 변경
+PROFILER = _from_env()
+
+
+def profiled(name):
+    """함수 호출을 PROFILER 샘플링 대상으로 등록하는 데코레이터"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if PROFILER.mode == "off":
+                return fn(*args, **kwargs)
+            with PROFILER.section(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def summarize_pstats(path, limit=20):
+    """저장된 .pstats 파일의 누적 시간 상위 함수를 문자열로 반환합니다."""
+    stream = io.StringIO()
+    pstats.Stats(path, stream=stream).sort_stats("cumulative").print_stats(limit)
+    return stream.getvalue()
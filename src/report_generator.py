@@ -1,31 +1,25 @@
-import openai
 import os
 import requests
-from datetime import datetime
 from dotenv import load_dotenv
-from fpdf import FPDF
 
-load_dotenv(override=True)
-
-class PDFReport(FPDF):
-    def header(self):
-        # 헤더: 기관명 느낌의 로고 텍스트
-        self.set_font('NanumGothic', 'B', 10)
-        self.set_text_color(100, 100, 100)
-        self.cell(0, 10, '자율 대응형 지능형 스미싱 방어 시스템 (AISDS) - 공식 보안 권고문', 0, 1, 'R')
-        self.ln(5)
+from src.llm_cache import LLMResponseCache, make_cache_key
+from src.llm_client import build_llm_client
+from src.pdf_engine import ReportPDFEngine
+from src.tracing import traced
 
-    def footer(self):
-        # 푸터: 페이지 번호
-        self.set_y(-15)
-        self.set_font('NanumGothic', '', 8)
-        self.set_text_color(128)
-        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+load_dotenv(override=True)
 
 class SecurityReportGenerator:
-    def __init__(self, api_key=None):
-        self.client = openai.OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+    MODEL = "gpt-4o"
+
+    def __init__(self, api_key=None, cache=None, use_cache=True):
+        # LLM_CLIENT_MODE 환경 변수에 따라 실제 API / 녹화 / 재생 클라이언트 선택
+        self.client = build_llm_client(api_key)
+        # 디스크 응답 캐시 (동일한 입력의 리포트는 API를 다시 호출하지 않음)
+        self.cache = cache or (LLMResponseCache() if use_cache else None)
         self._ensure_font()
+        # 폰트 파싱/정적 레이아웃을 재사용하는 PDF 렌더링 엔진
+        self.pdf_engine = ReportPDFEngine(self.font_path)
 
     def _ensure_font(self):
         """한글 폰트(나눔고딕)가 없으면 다운로드합니다."""
@@ -42,6 +36,7 @@ class SecurityReportGenerator:
                 f.write(response.content)
             print("[*] 폰트 다운로드 완료.")
 
+    @traced("report.content")
     def generate_report_content(self, news_item, attack_info, analysis_result):
         """GPT-4o를 이용해 리포트 내용을 생성합니다."""
         news_title = news_item['context'].get('news_title', '제목 미상')
@@ -82,78 +77,39 @@ class SecurityReportGenerator:
         (섹션 제목 앞에는 '## ' 같은 마크다운 쓰지 말고, [개요], [상세 분석] 처럼 대괄호를 사용해 구분하세요.)
         """
 
+        messages = [
+            {"role": "system", "content": "당신은 정보보안 전문 분석가입니다. 공식적이고 전문적인 어조를 사용하십시오."},
+            {"role": "user", "content": prompt}
+        ]
+        cache_key = make_cache_key(self.MODEL, messages, temperature=0.7)
+        if self.cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
         try:
             response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "당신은 정보보안 전문 분석가입니다. 공식적이고 전문적인 어조를 사용하십시오."},
-                    {"role": "user", "content": prompt}
-                ],
+                model=self.MODEL,
+                messages=messages,
                 temperature=0.7
             )
-            return response.choices[0].message.content.strip()
+            content = response.choices[0].message.content.strip()
+            # 실패 메시지는 캐시하지 않음
+            if self.cache:
+                self.cache.put(cache_key, self.MODEL, content)
+            return content
         except Exception as e:
             return f"리포트 내용 생성 실패: {str(e)}"
 
+    @traced("report.pdf")
     def create_pdf_report(self, content_text):
         """텍스트 내용을 바탕으로 PDF 파일을 생성하고 바이트를 반환합니다."""
-        # A4: 210 x 297 mm
-        pdf = PDFReport(orientation='P', unit='mm', format='A4')
-        pdf.set_auto_page_break(auto=True, margin=15)
-        pdf.set_margins(15, 15, 15)  # Left, Top, Right
-        
-        # fpdf2에서는 uni=True가 default이거나 불필요할 수 있음
-        pdf.add_font('NanumGothic', '', self.font_path)
-        pdf.add_font('NanumGothic', 'B', self.font_path)
-        
-        pdf.add_page()
-        
-        # 1. 문서 제목
-        pdf.set_font('NanumGothic', 'B', 24)
-        pdf.cell(0, 20, '긴급 사이버 위협 분석 리포트', align='C', new_x="LMARGIN", new_y="NEXT")
-        pdf.ln(5)
-        
-        # 2. 문서 정보 박스
-        pdf.set_fill_color(240, 240, 240)
-        pdf.set_font('NanumGothic', '', 10)
-        today = datetime.now().strftime('%Y년 %m월 %d일')
-        pdf.cell(0, 10, f' 발간일: {today}   |   발신: 자율 대응형 방어 시스템 (AISDS)   |   수신: 대한민국 국민 전체', align='C', fill=True, new_x="LMARGIN", new_y="NEXT")
-        pdf.ln(10)
-        
-        # 3. 본문 파싱 및 출력
-        lines = content_text.split('\n')
-        pdf.set_font('NanumGothic', '', 11)
-        
-        # 유효 너비 계산 (A4 width 210 - margins 30 = 180)
-        effective_width = 180
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                pdf.ln(2)
-                continue
-            
-            # 섹션 제목 감지 (대괄호로 감싸진 경우)
-            if line.startswith('[') and line.endswith(']'):
-                pdf.ln(5)
-                pdf.set_font('NanumGothic', 'B', 14)
-                pdf.set_text_color(0, 51, 102) # 남색 계열
-                pdf.cell(0, 10, line.replace('[', '').replace(']', ''), align='L', new_x="LMARGIN", new_y="NEXT")
-                pdf.set_text_color(0, 0, 0)
-                pdf.set_font('NanumGothic', '', 11)
-            else:
-                # 일반 본문
-                # multi_cell 사용 시 너비 명시
-                pdf.multi_cell(effective_width, 6, line, new_x="LMARGIN", new_y="NEXT")
-        
-        # 4. 하단 경고문
-        pdf.ln(10)
-        pdf.set_text_color(200, 50, 50) # 붉은색
-        pdf.set_font('NanumGothic', 'B', 10)
-        pdf.cell(0, 10, '※ 본 리포트는 AI 시뮬레이션 결과이며, 실제 발생한 사건과 다를 수 있습니다.', align='C', new_x="LMARGIN", new_y="NEXT")
+        return self.pdf_engine.render(content_text)
 
-        # bytes로 반환
-        return bytes(pdf.output())
+    @traced("report.pdf_batch")
+    def create_pdf_reports(self, contents, max_workers=None):
+        """여러 리포트 내용을 프로세스 풀에서 PDF로 변환합니다. (입력 순서 유지)"""
+        return self.pdf_engine.render_batch(contents, max_workers=max_workers)
 
 if __name__ == "__main__":
     gen = SecurityReportGenerator()
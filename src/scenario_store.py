@@ -0,0 +1,156 @@
+import os
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+
+from src.utils import dumps, loads, load_json, save_json
+
+DEFAULT_BANK_JSON = os.path.join(os.path.dirname(__file__), "../data/scenario_bank.json")
+DEFAULT_BANK_DB = os.path.join(os.path.dirname(__file__), "../data/scenario_bank.db")
+
+
+def render_scenario(scenario):
+    """프롬프트에 넣을 뱅크 항목 한 줄 요약."""
+    return f"- {scenario['intent_id']}: {scenario['intent_name']} ({scenario['description']})"
+
+
+class ScenarioBankStore:
+    """
+    [Scenario Bank Store]
+    시나리오 뱅크를 SQLite에 보관하는 저장소.
+    - 신규 수법은 한 행씩 추가(append-only)되며 전체 파일을 다시 쓰지 않습니다.
+    - NEW-xx ID는 쓰기 잠금(BEGIN IMMEDIATE) 안에서 발급되어 여러 세션/프로세스가 동시에 등록해도 겹치지 않습니다.
+    - 변경 시마다 증가하는 version으로 목록/프롬프트 렌더링 캐시를 무효화합니다.
+    처음 생성될 때 기존 scenario_bank.json의 내용을 그대로 가져옵니다.
+    """
+
+    def __init__(self, db_path=DEFAULT_BANK_DB, seed_json_path=DEFAULT_BANK_JSON):
+        self.db_path = db_path
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        # isolation_level=None: 트랜잭션 경계를 직접 제어 (BEGIN IMMEDIATE)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")  # 읽기와 쓰기가 서로 막지 않도록
+        self.lock = threading.Lock()
+
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS scenarios (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                intent_id TEXT UNIQUE,
+                payload TEXT, -- 시나리오 항목 전체 (JSON 문자열)
+                registered_at TEXT
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS bank_meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER
+            )
+        ''')
+
+        self._cache_version = None
+        self._scenarios = []
+        self._prompt = ""
+        self._prompt_hash = ""
+
+        self._seed(seed_json_path)
+
+    def _seed(self, json_path):
+        """저장소가 비어 있으면 JSON 뱅크의 항목을 가져옵니다."""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                count = self.conn.execute("SELECT COUNT(*) FROM scenarios").fetchone()[0]
+                if count == 0 and json_path and os.path.exists(json_path):
+                    scenarios = load_json(json_path)["scenarios"]
+                    self.conn.executemany(
+                        "INSERT OR IGNORE INTO scenarios (intent_id, payload, registered_at) VALUES (?, ?, ?)",
+                        [(s["intent_id"], dumps(s), s.get("registered_at")) for s in scenarios]
+                    )
+                    self._bump_version()
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def _bump_version(self):
+        self.conn.execute(
+            "INSERT INTO bank_meta (key, value) VALUES ('version', 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + 1"
+        )
+
+    def version(self):
+        """변경 횟수. 다른 프로세스의 등록도 반영됩니다."""
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM bank_meta WHERE key = 'version'").fetchone()
+        return row[0] if row else 0
+
+    def _refresh(self):
+        # version이 바뀐 경우에만 다시 읽고 프롬프트를 렌더링
+        version = self.version()
+        if version == self._cache_version:
+            return
+        with self.lock:
+            rows = self.conn.execute("SELECT payload FROM scenarios ORDER BY seq").fetchall()
+        scenarios = [loads(r[0]) for r in rows]
+        prompt = "\n".join(render_scenario(s) for s in scenarios)
+
+        self._scenarios = scenarios
+        self._prompt = prompt
+        self._prompt_hash = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:12]
+        self._cache_version = version
+
+    def all(self):
+        """등록 순서대로 전체 시나리오 목록을 반환합니다."""
+        self._refresh()
+        return self._scenarios
+
+    def render_prompt(self):
+        """프롬프트에 넣을 뱅크 요약 문자열 (변경이 없으면 캐시된 값)."""
+        self._refresh()
+        return self._prompt
+
+    def prompt_hash(self):
+        """렌더링된 뱅크의 해시. 응답 캐시 키의 뱅크 버전으로 사용합니다."""
+        self._refresh()
+        return self._prompt_hash
+
+    def register_new(self, entry, prefix="NEW"):
+        """
+        [신규 수법 등록]
+        쓰기 잠금 안에서 다음 ID(NEW-xx)를 발급하고 한 행을 추가합니다.
+        entry의 intent_id는 무시되며, 발급된 ID가 채워진 항목을 반환합니다.
+        """
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                number = self.conn.execute("SELECT COUNT(*) FROM scenarios").fetchone()[0] + 1
+                while self.conn.execute(
+                    "SELECT 1 FROM scenarios WHERE intent_id = ?", (f"{prefix}-{number:02d}",)
+                ).fetchone():
+                    number += 1
+
+                new_entry = {"intent_id": f"{prefix}-{number:02d}", **{k: v for k, v in entry.items() if k != "intent_id"}}
+                new_entry.setdefault("registered_at", datetime.now().strftime("%Y-%m-%d"))
+                self.conn.execute(
+                    "INSERT INTO scenarios (intent_id, payload, registered_at) VALUES (?, ?, ?)",
+                    (new_entry["intent_id"], dumps(new_entry), new_entry["registered_at"])
+                )
+                self._bump_version()
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return new_entry
+
+    def export_json(self, json_path, compact=False):
+        """
+        JSON 스냅샷으로 내보냅니다. (기존 scenario_bank.json 형식)
+        compact=True이면 들여쓰기 없이 기록합니다. (백업/동기화 등 프로그램이 읽는 경우)
+        """
+        save_json({"scenarios": self.all()}, json_path, compact=compact)
+
+    def close(self):
+        self.conn.close()
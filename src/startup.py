@@ -0,0 +1,82 @@
+import time
+import threading
+from contextlib import contextmanager
+
+
+class StartupTimer:
+    """
+    [Startup Timer]
+    앱 시작 단계별 소요 시간(ms)을 기록합니다.
+    - phase(name): with 블록의 소요 시간
+    - mark(name): 시작 시점부터 현재까지의 경과 시간 (예: 첫 화면 렌더링 완료)
+    """
+
+    def __init__(self, started_at=None):
+        self.started_at = started_at or time.perf_counter()
+        self.lock = threading.Lock()
+        self.phases = {}
+        self.marks = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    def record(self, name, elapsed_ms):
+        with self.lock:
+            self.phases[name] = elapsed_ms
+
+    def mark(self, name):
+        """처음 호출된 시점만 기록합니다."""
+        with self.lock:
+            self.marks.setdefault(name, (time.perf_counter() - self.started_at) * 1000)
+
+    def report(self):
+        with self.lock:
+            return {"phases_ms": dict(self.phases), "marks_ms": dict(self.marks)}
+
+
+class BackgroundLoader:
+    """
+    [Background Loader]
+    무거운 객체(탐지 모델 등)를 백그라운드 스레드에서 미리 생성합니다.
+    result()는 생성이 끝날 때까지 기다렸다가 결과를 반환하며, 생성 중 발생한 예외는 그대로 다시 발생시킵니다.
+    """
+
+    def __init__(self, factory, name="warmup", timer=None):
+        self.name = name
+        self.timer = timer
+        self._factory = factory
+        self._done = threading.Event()
+        self._value = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        start = time.perf_counter()
+        try:
+            self._value = self._factory()
+        except Exception as e:
+            self._error = e
+            print(f"[!] {self.name} 로딩 실패: {e}")
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if self.timer:
+                self.timer.record(self.name, elapsed_ms)
+            self._done.set()
+        if self._error is None:
+            print(f"[*] {self.name} 백그라운드 로딩 완료 ({elapsed_ms / 1000:.1f}s)")
+
+    def ready(self):
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"{self.name} 로딩이 {timeout}초 안에 끝나지 않았습니다.")
+        if self._error is not None:
+            raise self._error
+        return self._value
@@ -0,0 +1,113 @@
+import re
+import hashlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# 기사 식별과 무관한 추적용 쿼리 파라미터
+TRACKING_PARAMS = {"fbclid", "gclid", "ref", "from", "cmpid"}
+
+SIMHASH_BITS = 64
+
+
+def normalize_url(url):
+    """
+    같은 기사를 가리키는 URL이 같은 문자열이 되도록 정규화합니다.
+    (스킴/호스트 소문자화, 기본 포트·fragment·추적 파라미터 제거, 쿼리 정렬, 끝 '/' 제거)
+    """
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "http").lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    # http/https는 같은 기사로 취급
+    return urlunsplit(("https" if scheme in ("http", "https") else scheme, host, path, urlencode(query), ""))
+
+
+def article_id(url, prefix="CTX-API"):
+    """정규화된 URL의 해시로 재현 가능한 기사 ID를 만듭니다."""
+    digest = hashlib.sha1(normalize_url(url).encode("utf-8")).hexdigest()[:16]
+    return f"{prefix}-{digest}"
+
+
+def _shingles(text, n=3):
+    # 공백/특수문자를 제거한 문자 n-gram (한국어는 형태소 분석 없이도 안정적)
+    clean = re.sub(r"[^가-힣a-zA-Z0-9]", "", text.lower())
+    if len(clean) <= n:
+        return [clean] if clean else []
+    return [clean[i:i + n] for i in range(len(clean) - n + 1)]
+
+
+def simhash(text, n=3):
+    """
+    문자 n-gram 기반 64비트 SimHash 지문을 계산합니다. 내용이 비슷할수록 해밍 거리가 작습니다.
+    글자가 없는 텍스트는 None을 반환합니다. (0을 반환하면 빈 텍스트끼리 모두 같은 기사로 병합됨)
+    """
+    grams = _shingles(text, n)
+    if not grams:
+        return None
+
+    # 각 n-gram 해시를 64자리 이진 문자열로 펼친 뒤 자리(열)별로 1의 개수를 셈
+    # (비트마다 파이썬 루프를 도는 것보다 훨씬 빠름)
+    rows = [
+        format(int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "big"), "064b")
+        for g in grams
+    ]
+    fingerprint = 0
+    for column in zip(*rows):
+        fingerprint <<= 1
+        # 1이 과반이면 해당 비트를 1로 설정
+        if column.count("1") * 2 > len(rows):
+            fingerprint |= 1
+    return fingerprint
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+def simhash_bands(fingerprint, bands=4):
+    """지문을 bands개의 구간으로 나눈 (구간 번호, 값) 목록. 색인 조회 키로 사용합니다."""
+    width = SIMHASH_BITS // bands
+    mask = (1 << width) - 1
+    return [(i, (fingerprint >> (i * width)) & mask) for i in range(bands)]
+
+
+class SimHashIndex:
+    """
+    [SimHash Index]
+    해밍 거리 max_distance 이내의 지문을 찾는 메모리 색인.
+    bands > max_distance이면 비둘기집 원리에 따라 가까운 지문은 최소 한 구간이 일치하므로
+    구간 값 조회만으로 후보를 찾을 수 있습니다.
+    """
+
+    def __init__(self, max_distance=3, bands=4):
+        if bands <= max_distance:
+            raise ValueError("bands는 max_distance보다 커야 합니다.")
+        self.max_distance = max_distance
+        self.bands = bands
+        self.buckets = {}
+
+    def find(self, fingerprint):
+        """가까운 지문에 연결된 키를 반환합니다. 없으면 None. (지문이 None이면 비교하지 않음)"""
+        if fingerprint is None:
+            return None
+        for band in simhash_bands(fingerprint, self.bands):
+            for other, key in self.buckets.get(band, ()):
+                if hamming_distance(fingerprint, other) <= self.max_distance:
+                    return key
+        return None
+
+    def add(self, fingerprint, key):
+        if fingerprint is None:
+            return
+        for band in simhash_bands(fingerprint, self.bands):
+            self.buckets.setdefault(band, []).append((fingerprint, key))
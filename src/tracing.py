@@ -0,0 +1,357 @@
+import os
+import time
+import uuid
+import bisect
+import threading
+import functools
+import contextvars
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.utils import dumps
+
+# 스팬 지속 시간 히스토그램 구간(ms)
+DEFAULT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class _NoopSpan:
+    """추적이 꺼져 있을 때 돌려주는 공용 스팬 (할당/시간 측정 없음)"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.parent = None
+        self.trace_id = None
+        self.span_id = uuid.uuid4().hex[:16]
+        self.start = 0.0
+        self._token = None
+
+    def set(self, **attrs):
+        """스팬에 속성(예: 매칭 경로, 건수)을 추가합니다."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.parent = _current_span.get()
+        self.trace_id = self.parent.trace_id if self.parent else uuid.uuid4().hex[:16]
+        self._token = _current_span.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration_ms = (time.perf_counter() - self.start) * 1000
+        _current_span.reset(self._token)
+        self.tracer._finish(self, duration_ms, exc)
+        return False
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS_MS, reservoir=1000):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 마지막 칸: +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=reservoir)  # 백분위 계산용 최근 값
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.recent.append(value)
+
+    def summary(self):
+        ordered = sorted(self.recent)
+        if not ordered:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean_ms": self.sum / self.count,
+            "p50_ms": ordered[len(ordered) // 2],
+            "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            "max_ms": self.max
+        }
+
+
+class InMemoryExporter:
+    """최근 스팬을 메모리에 보관합니다. (진단 패널용)"""
+
+    def __init__(self, max_spans=1000):
+        self.spans = deque(maxlen=max_spans)
+
+    def export(self, record):
+        self.spans.append(record)
+
+    def close(self):
+        pass
+
+
+class JsonLinesExporter:
+    """끝난 스팬을 한 줄에 하나씩 JSON으로 기록합니다."""
+
+    def __init__(self, path="logs/trace.jsonl"):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, "a", encoding="utf-8", buffering=1)
+
+    def export(self, record):
+        line = dumps(record)
+        with self.lock:
+            self.file.write(line + "\n")
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+
+class PrometheusExporter:
+    """
+    로컬 HTTP 엔드포인트(/metrics)에서 카운터와 히스토그램을 Prometheus 텍스트 형식으로 제공합니다.
+    스팬 자체는 보관하지 않습니다.
+    """
+
+    def __init__(self, tracer, host="127.0.0.1", port=9464):
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = exporter.tracer.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # 요청마다 콘솔 로그를 남기지 않음
+
+        self.tracer = tracer
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, name="metrics-endpoint", daemon=True)
+        self.thread.start()
+        print(f"[*] 메트릭 엔드포인트: http://{host}:{self.server.server_address[1]}/metrics")
+
+    def export(self, record):
+        pass
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class Tracer:
+    """
+    [Tracer]
+    파이프라인 단계별 소요 시간을 측정하는 경량 계측 계층.
+    - span(name): 중첩 가능한 시간 측정 구간 (스레드/컨텍스트별로 부모-자식 관계 유지)
+    - incr(name): 카운터, observe(name, value): 히스토그램
+    - 스팬 지속 시간은 이름별 히스토그램에 자동 집계되고, 끝난 스팬은 exporter로 전달됩니다.
+    enabled=False이면 span()은 공용 no-op 객체를 반환하여 오버헤드가 거의 없습니다.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.exporter = None
+        self.exporter_name = "none"
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+            self.counters = {}
+
+    def configure(self, exporter="memory", **options):
+        """
+        exporter: "none" | "memory" | "jsonl" | "prometheus"
+        options: jsonl -> path, prometheus -> host/port, memory -> max_spans
+        """
+        exporter = (exporter or "none").lower()
+        if exporter == self.exporter_name:
+            return self
+        if self.exporter:
+            self.exporter.close()
+
+        if exporter == "none":
+            self.exporter, self.enabled = None, False
+        elif exporter == "memory":
+            self.exporter = InMemoryExporter(**options)
+        elif exporter == "jsonl":
+            self.exporter = JsonLinesExporter(**options)
+        elif exporter == "prometheus":
+            self.exporter = PrometheusExporter(self, **options)
+        else:
+            raise ValueError(f"지원하지 않는 TRACE_EXPORTER입니다: {exporter} (none/memory/jsonl/prometheus)")
+
+        self.exporter_name = exporter
+        self.enabled = exporter != "none"
+        return self
+
+    def span(self, name, **attrs):
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, attrs)
+
+    def _finish(self, span, duration_ms, exc):
+        self.observe("span_duration_ms", duration_ms, span=span.name)
+        if exc is not None:
+            self.incr("span_errors", span=span.name)
+        exporter = self.exporter
+        if exporter is not None:
+            exporter.export({
+                "trace_id": span.trace_id,
+                "span_id": span.span_id,
+                "parent_id": span.parent.span_id if span.parent else None,
+                "name": span.name,
+                "duration_ms": duration_ms,
+                "error": repr(exc) if exc is not None else None,
+                "attrs": span.attrs,
+                "ts": time.time()
+            })
+
+    @staticmethod
+    def _key(name, labels):
+        return (name, tuple(sorted(labels.items())))
+
+    def incr(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def stage_summary(self):
+        """스팬 이름별 지연 시간 요약 {name: {count, mean_ms, p50_ms, p95_ms, max_ms}}"""
+        with self.lock:
+            return {
+                dict(labels)["span"]: histogram.summary()
+                for (name, labels), histogram in sorted(self.histograms.items())
+                if name == "span_duration_ms"
+            }
+
+    def counter_summary(self):
+        with self.lock:
+            return {
+                name + ("{" + ",".join(f"{k}={v}" for k, v in labels) + "}" if labels else ""): value
+                for (name, labels), value in sorted(self.counters.items())
+            }
+
+    def recent_spans(self):
+        return list(self.exporter.spans) if isinstance(self.exporter, InMemoryExporter) else []
+
+    def render_prometheus(self, prefix="smishing"):
+        """
+        Prometheus 텍스트 형식. 같은 이름의 계열은 한데 모아 # TYPE을 한 번만 쓰고,
+        카운터 이름에는 _total을 붙입니다. (예: smishing_campaign_verdicts_total)
+        """
+        def escape(value):
+            return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+        def label_text(labels, extra=None):
+            items = list(labels) + ([extra] if extra else [])
+            return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in items) + "}" if items else ""
+
+        lines = []
+        with self.lock:
+            # (이름, 레이블) 순으로 정렬되어 있으므로 같은 계열은 연속해서 나옴
+            family = None
+            for (name, labels), value in sorted(self.counters.items()):
+                metric = f"{prefix}_{name}".replace(".", "_")
+                if not metric.endswith("_total"):
+                    metric += "_total"
+                if metric != family:
+                    lines.append(f"# TYPE {metric} counter")
+                    family = metric
+                lines.append(f"{metric}{label_text(labels)} {value}")
+            family = None
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                metric = f"{prefix}_{name}".replace(".", "_")
+                if metric != family:
+                    lines.append(f"# TYPE {metric} histogram")
+                    family = metric
+                cumulative = 0
+                for bound, count in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+                    cumulative += count
+                    lines.append(f"{metric}_bucket{label_text(labels, ('le', bound))} {cumulative}")
+                lines.append(f"{metric}_sum{label_text(labels)} {histogram.sum}")
+                lines.append(f"{metric}_count{label_text(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+TRACER = Tracer()
+
+
+def span(name, **attrs):
+    """with span("detector.predict"): ... 형태로 사용하는 전역 추적기 스팬"""
+    if not TRACER.enabled:
+        return _NOOP_SPAN
+    return Span(TRACER, name, attrs)
+
+
+def incr(name, value=1, **labels):
+    TRACER.incr(name, value, **labels)
+
+
+def observe(name, value, **labels):
+    TRACER.observe(name, value, **labels)
+
+
+def traced(name):
+    """함수 전체를 스팬으로 감싸는 데코레이터. 추적이 꺼져 있으면 원래 함수를 바로 호출합니다."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return fn(*args, **kwargs)
+            with Span(TRACER, name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def configure_from_env(default="none"):
+    """
+    환경 변수로 추적 설정을 적용합니다.
+    - TRACE_EXPORTER: none / memory / jsonl / prometheus
+    - TRACE_JSONL_PATH: jsonl 출력 경로 (기본값 logs/trace.jsonl)
+    - TRACE_PROMETHEUS_PORT: /metrics 포트 (기본값 9464)
+    """
+    exporter = os.getenv("TRACE_EXPORTER", default).lower()
+    options = {}
+    if exporter == "jsonl":
+        options["path"] = os.getenv("TRACE_JSONL_PATH", "logs/trace.jsonl")
+    elif exporter == "prometheus":
+        options["port"] = int(os.getenv("TRACE_PROMETHEUS_PORT", "9464"))
+    return TRACER.configure(exporter, **options)
@@ -1,18 +1,155 @@
 # trainer.py
 import torch
+import torch.nn.functional as F
 from torch.optim import AdamW
 from src.detector import SmishingDetector
+from src.tracing import traced, span
+from src.profiling import PROFILER, RssSampler
 import json
 import os
+import time
+import contextlib
+
+
+def bf16_supported(device):
+    """bf16 autocast를 하드웨어가 지원하는지 확인합니다. (CPU: AVX512-BF16/AMX, GPU: Ampere 이상)"""
+    try:
+        if device.type == "cuda":
+            return torch.cuda.is_bf16_supported()
+        return torch.backends.mkldnn.is_available() and torch.ops.mkldnn._is_mkldnn_bf16_supported()
+    except (AttributeError, RuntimeError):
+        return False
+
+
+class TrainingMemory:
+    """
+    [Training Memory]
+    학습 구간 동안의 최대 메모리 증가량(MB)을 잽니다. (with 블록 종료 후 peak_mb)
+    - GPU: 구간 시작 시 최대치 통계를 초기화하고 (최대 할당량 - 시작 시 할당량)
+    - CPU: RssSampler로 RSS를 주기적으로 읽어 (최대 RSS - 시작 시 RSS)
+    ru_maxrss는 프로세스 전체 수명의 최대치라 모델 로딩 등 이전 단계의 사용량이 섞이므로 쓰지 않습니다.
+    """
+
+    def __init__(self, device):
+        self.device = device
+        self.peak_mb = None
+        self.baseline = 0
+        self.sampler = None
+
+    def __enter__(self):
+        if self.device.type == "cuda":
+            torch.cuda.reset_peak_memory_stats(self.device)
+            self.baseline = torch.cuda.memory_allocated(self.device)
+        else:
+            self.sampler = RssSampler(interval=0.05).__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        if self.sampler is not None:
+            self.sampler.__exit__(*exc)
+            self.peak_mb = self.sampler.peak_delta_mb
+        else:
+            self.peak_mb = (torch.cuda.max_memory_allocated(self.device) - self.baseline) / (1024 * 1024)
+        return False
+
 
 class SmishingTrainer:
-    def __init__(self, detector):
+    """
+    mode="full": 모델 전체 가중치를 학습하고 전체 state dict를 저장 (기존 방식)
+    mode="adapter": 원본 가중치는 고정하고 LoRA 어댑터와 분류 헤드만 학습하여 models/adapters/<adapter_name>.pt로 저장
+    mode="fast": 하위 인코더 층(frozen_layers개)을 고정하고 그 출력을 디스크에 캐시하여 상위 층과 분류 헤드만 학습
+
+    메모리 설정 (None이면 환경 변수 사용):
+    - precision: "fp32" (기본) / "bf16" / "auto" (지원 시 bf16) (TRAIN_PRECISION)
+      bf16은 명시적으로 선택할 때만 사용. 목표 신뢰도 도달 여부는 정밀도와 관계없이 서비스와 같은 fp32/eval로 확인
+    - accumulation_steps: 몇 스텝의 기울기를 모아 한 번에 업데이트할지 (TRAIN_ACCUMULATION_STEPS)
+    - micro_batch_size: 정상 데이터를 한 번에 forward/backward하는 개수, 작을수록 활성값 메모리 감소 (TRAIN_MICRO_BATCH)
+    - gradient_checkpointing: 활성값을 저장하지 않고 역전파 때 다시 계산 (TRAIN_GRAD_CHECKPOINTING)
+    """
+
+    def __init__(self, detector, mode="full", adapter_name="evolved", lora_rank=8, frozen_layers=8,
+                 precision=None, accumulation_steps=None, micro_batch_size=None, gradient_checkpointing=None):
         self.detector = detector
         self.model = detector.model
         self.tokenizer = detector.tokenizer
-        self.optimizer = AdamW(self.model.parameters(), lr=2e-5)
+        self.mode = mode
+        self.adapter_name = adapter_name
+        self.split = None
+
+        precision = (precision or os.getenv("TRAIN_PRECISION", "fp32")).lower()
+        if precision == "auto":
+            precision = "bf16" if bf16_supported(detector.device) else "fp32"
+        if precision not in ("bf16", "fp32"):
+            raise ValueError(f"지원하지 않는 학습 정밀도입니다: {precision} (auto/bf16/fp32)")
+        self.precision = precision
+        self.accumulation_steps = max(1, accumulation_steps or int(os.getenv("TRAIN_ACCUMULATION_STEPS", "1")))
+        self.micro_batch_size = max(1, micro_batch_size or int(os.getenv("TRAIN_MICRO_BATCH", "4")))
+        if gradient_checkpointing is None:
+            gradient_checkpointing = os.getenv("TRAIN_GRAD_CHECKPOINTING", "0") == "1"
+        self.gradient_checkpointing = gradient_checkpointing
+        self.last_report = None
+
+        if mode == "adapter":
+            # 옵티마이저 상태도 어댑터 파라미터만큼만 보관
+            adapters = detector.enable_adapters(r=lora_rank)
+            adapters.unmerge()
+            self.optimizer = AdamW(adapters.trainable_parameters(), lr=2e-4)
+        elif mode in ("full", "fast"):
+            if detector.adapters is not None:
+                raise ValueError("어댑터가 연결된 모델은 adapter 모드로 학습해야 합니다.")
+            if mode == "fast":
+                from src.feature_cache import SplitEncoder
+                self.split = SplitEncoder(detector, frozen_layers=frozen_layers)
+                # 상위 층만 학습하므로 전체 학습보다 큰 학습률 사용
+                self.optimizer = AdamW(self.split.upper_parameters(), lr=5e-5)
+            else:
+                self.optimizer = AdamW(self.model.parameters(), lr=2e-5)
+        else:
+            raise ValueError(f"지원하지 않는 학습 모드입니다: {mode} (full/adapter/fast)")
+
+        if self.gradient_checkpointing:
+            self._enable_gradient_checkpointing()
+
+    def _enable_gradient_checkpointing(self):
+        if self.split is not None:
+            # 상위 층을 직접 호출하므로 SplitEncoder에서 층 단위로 재계산
+            self.split.checkpointing = True
+            return
+        try:
+            # 비재진입 방식은 입력(임베딩)이 고정되어 있어도 동작
+            self.model.gradient_checkpointing_enable(gradient_checkpointing_kwargs={"use_reentrant": False})
+        except TypeError:
+            # transformers 4.35 미만
+            self.model.gradient_checkpointing_enable()
+            self.model.enable_input_require_grads()
+
+    def _autocast(self):
+        if self.precision == "bf16":
+            return torch.autocast(device_type=self.detector.device.type, dtype=torch.bfloat16)
+        return contextlib.nullcontext()
+
+    def _logits(self, texts):
+        if isinstance(texts, str):
+            texts = [texts]
+        if self.split is not None:
+            # 하위 층 출력은 캐시에서 읽고 상위 층만 계산
+            return torch.cat([self.split.logits(text) for text in texts])
+        inputs = self.tokenizer(texts, return_tensors="pt", truncation=True, padding=True).to(self.detector.device)
+        return self.model(**inputs).logits
+
+    def _loss(self, texts, label):
+        with self._autocast():
+            logits = self._logits(texts)
+        target = torch.full((len(texts),), label, dtype=torch.long, device=logits.device)
+        # 손실은 fp32로 계산
+        return F.cross_entropy(logits.float(), target)
 
-    def train_on_vulnerabilities(self, data_path="data/vulnerabilities.json"):
+    def _optimizer_step(self):
+        self.optimizer.step()
+        self.optimizer.zero_grad(set_to_none=True)
+
+    @traced("trainer.train_on_vulnerabilities")
+    def train_on_vulnerabilities(self, data_path="data/vulnerabilities.json", save=True):
         """
         Detector를 통과해버린(공격 성공) 데이터셋만 골라 학습하여 방어력을 강화합니다.
         (Normalization: 정상 데이터를 함께 학습하여 과적합/망각 방지)
@@ -38,6 +175,10 @@ class SmishingTrainer:
         if not vulnerabilities:
             return
 
+        if self.split is not None and ham_samples:
+            computed = self.split.warm(ham_samples)
+            print(f"[*] 리플레이 특징 캐시: 신규 계산 {computed}건 / 전체 {len(ham_samples)}건 (버전 {self.split.cache.version})")
+
         print(f"[*] 총 {len(vulnerabilities)}개의 취약점 학습 시작 (with Regularization)...")
         
         self.model.train()
@@ -48,52 +189,89 @@ class SmishingTrainer:
         
         import random
 
-        for item in vulnerabilities:
-            text = item.get('generated_message', item.get('attack_message', ""))
-            clean_text = self.detector.preprocess(text)
-            
-            print(f"[*] '{text[:20]}...' 집중 학습 중...")
+        accum = self.accumulation_steps
+        samples, optimizer_steps = 0, 0
+        started_at = time.perf_counter()
+        self.optimizer.zero_grad(set_to_none=True)
+
+        with TrainingMemory(self.detector.device) as memory:
+            for item in vulnerabilities:
+                text = item.get('generated_message', item.get('attack_message', ""))
+                clean_text = self.detector.preprocess(text)
             
-            for step in range(MAX_STEPS):
-                # 1. 취약점(Spam) 학습
-                inputs = self.tokenizer(clean_text, return_tensors="pt", truncation=True, padding=True).to(self.detector.device)
-                label = torch.tensor([1]).to(self.detector.device)
-
-                self.optimizer.zero_grad()
-                outputs = self.model(**inputs, labels=label)
-                loss_spam = outputs.loss
+                print(f"[*] '{text[:20]}...' 집중 학습 중...")
+
+                pending = 0  # 기울기만 누적하고 아직 업데이트하지 않은 스텝 수
+                for step in range(MAX_STEPS):
+                    with span("trainer.step", step=step), PROFILER.section("trainer.step"):
+                        # 1. 취약점(Spam) 학습
+                        # 손실마다 바로 backward하여 계산 그래프를 하나씩만 유지 (기울기는 합산되므로 결과는 동일)
+                        loss_spam = self._loss([clean_text], 1)
+                        (loss_spam / accum).backward()
+                        samples += 1
                 
-                # 2. [강화된 Regularization] 정상 데이터(Ham) 4배수 학습 (Overfitting 강력 억제)
-                loss_ham = 0
-                if ham_samples:
-                    # 안정성을 위해 정상 데이터를 4개 뽑아서 평균 Loss를 구함
-                    ham_batch = random.sample(ham_samples, k=min(len(ham_samples), 4))
-                    for h_text in ham_batch:
-                        h_inputs = self.tokenizer(h_text, return_tensors="pt", truncation=True, padding=True).to(self.detector.device)
-                        h_label = torch.tensor([0]).to(self.detector.device) # Target: Ham(0)
-                        
-                        h_outputs = self.model(**h_inputs, labels=h_label)
-                        loss_ham += h_outputs.loss
-                    
-                    # 4개분 Loss를 평균내거나 합산 (여기서는 합산하여 정상 데이터 비중을 높임)
-                    loss_ham = loss_ham / len(ham_batch) 
-
-                # Total Loss = Spam Loss + (Ham Loss * 2.0) : 정상 데이터 가중치 2배 부여
-                total_loss = loss_spam + (loss_ham * 2.0)
-                total_loss.backward()
-                self.optimizer.step()
-
-                # 확률 체크 (Spam에 대해서만)
-                probs = torch.softmax(self.model(**inputs).logits, dim=1)
-                smishing_prob = probs[0][1].item()
+                        # 2. [강화된 Regularization] 정상 데이터(Ham) 4배수 학습 (Overfitting 강력 억제)
+                        if ham_samples:
+                            # 안정성을 위해 정상 데이터를 4개 뽑아서 평균 Loss를 구함
+                            ham_batch = random.sample(ham_samples, k=min(len(ham_samples), 4))
+                            for start in range(0, len(ham_batch), self.micro_batch_size):
+                                chunk = ham_batch[start:start + self.micro_batch_size]
+                                # Total Loss = Spam Loss + (Ham 평균 Loss * 2.0) : 정상 데이터 가중치 2배 부여
+                                loss_ham = self._loss(chunk, 0) * (len(chunk) / len(ham_batch)) * 2.0
+                                (loss_ham / accum).backward()
+                                samples += len(chunk)
+
+                        pending += 1
+                        if pending < accum:
+                            continue
+                        self._optimizer_step()
+                        optimizer_steps += 1
+                        pending = 0
+
+                        # 확률 체크 (Spam에 대해서만) - SmishingDetector.predict와 같은 조건(eval, fp32)에서 판정
+                        self.model.eval()
+                        with torch.no_grad():
+                            probs = torch.softmax(self._logits(clean_text).float(), dim=1)
+                        self.model.train()
+                        smishing_prob = probs[0][1].item()
                 
-                if smishing_prob >= TARGET_CONFIDENCE:
-                    print(f"    -> [Success] Step {step}: 확률 {smishing_prob:.4f} 도달!")
-                    break
+                        if smishing_prob >= TARGET_CONFIDENCE:
+                            print(f"    -> [Success] Step {step}: 확률 {smishing_prob:.4f} 도달!")
+                            break
+
+                if pending:
+                    # 누적 단위를 채우지 못한 나머지 기울기 반영
+                    self._optimizer_step()
+                    optimizer_steps += 1
 
-        self.save_model()
+        elapsed = time.perf_counter() - started_at
+        self.last_report = {
+            "mode": self.mode,
+            "precision": self.precision,
+            "accumulation_steps": accum,
+            "micro_batch_size": self.micro_batch_size,
+            "gradient_checkpointing": self.gradient_checkpointing,
+            "samples": samples,
+            "optimizer_steps": optimizer_steps,
+            "elapsed_sec": elapsed,
+            "samples_per_sec": samples / elapsed if elapsed else 0.0,
+            # 학습 시작 시점 대비 최대 증가량
+            "peak_memory_mb": memory.peak_mb
+        }
+        print(f"[*] 학습 통계: {self.last_report}")
+
+        self.model.eval()
+        self.detector.weights_version += 1
+        if save:
+            self.save_model()
+        return self.last_report
 
     def save_model(self):
+        if self.mode == "adapter":
+            # 어댑터 가중치만 저장 (전체 모델 대비 수백 분의 1 크기)
+            self.detector.adapters.save(self.adapter_name)
+            return
+
         # trainer.py는 독립 실행보다는 앱 내부에서 호출되므로, 
         # detector가 로드하는 경로("models/smishing_detector_model.pth")에 저장해야 함.
         save_path = "models/smishing_detector_model.pth"
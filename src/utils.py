@@ -1,27 +1,133 @@
 import json
 import os
+import threading
 
-def load_jsonl(file_path):
+# orjson은 선택적 의존성 (없으면 표준 json으로 동작)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# 파일 쓰기 버퍼 크기 (대용량 JSONL 기록 시 write 시스템 호출 횟수 감소)
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+
+def loads(data):
+    """str/bytes JSON을 파싱합니다. (orjson이 있으면 orjson 사용)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_bytes(obj):
     """
-    JSONL 파일을 읽어서 딕셔너리 리스트로 반환합니다.
+    한 줄짜리(들여쓰기 없는) UTF-8 JSON bytes를 반환합니다.
+    orjson이 처리하지 못하는 값(64비트 초과 정수 등)은 표준 json으로 다시 직렬화합니다.
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(obj):
+    """한 줄짜리 JSON 문자열 (DB 컬럼, 캐시 키 등)"""
+    return dumps_bytes(obj).decode("utf-8")
+
+
+def iter_jsonl(file_path):
+    """
+    JSONL 파일을 한 줄씩 파싱하여 내보냅니다. (전체를 메모리에 올리지 않음)
+    깨진 줄은 건너뜁니다.
     """
-    data = []
     if not os.path.exists(file_path):
         print(f"[!] 파일을 찾을 수 없습니다: {file_path}")
-        return data
+        return
 
-    with open(file_path, 'r', encoding='utf-8') as f:
+    with open(file_path, 'rb') as f:
         for line in f:
             if line.strip():
                 try:
-                    data.append(json.loads(line))
+                    yield loads(line)
                 except json.JSONDecodeError:
                     continue
-    return data
 
-def save_json(data, file_path):
+
+def load_jsonl(file_path):
+    """
+    JSONL 파일을 읽어서 딕셔너리 리스트로 반환합니다.
+    """
+    return list(iter_jsonl(file_path))
+
+
+def load_json(file_path):
+    """JSON 파일 전체를 읽어 파싱합니다."""
+    with open(file_path, 'rb') as f:
+        return loads(f.read())
+
+
+def save_json(data, file_path, compact=False):
     """
     데이터를 JSON 형식으로 저장합니다.
+    compact=True: 들여쓰기 없이 기록 (프로그램이 읽는 스냅샷/원본 덤프용, 크기와 시간 절약)
+    compact=False: 사람이 읽기 쉬운 indent=4 형식 (기존 형식)
     """
+    if compact:
+        with open(file_path, 'wb') as f:
+            f.write(dumps_bytes(data))
+        return
     with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
\ No newline at end of file
+        json.dump(data, f, ensure_ascii=False, indent=4)
+
+
+class JsonlWriter:
+    """
+    [JSONL Writer]
+    레코드를 한 줄씩 파일 끝에 추가하는 스트리밍 기록기.
+    with JsonlWriter(path) as w: w.write(record) 형태로 사용하며, 스레드 간에 공유해도 안전합니다.
+    append=False이면 파일을 새로 씁니다.
+    """
+
+    def __init__(self, file_path, append=True):
+        if os.path.dirname(file_path):
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        self.path = file_path
+        self.count = 0
+        self.lock = threading.Lock()
+        self.file = open(file_path, 'ab' if append else 'wb', buffering=WRITE_BUFFER_SIZE)
+
+    def write(self, record):
+        line = dumps_bytes(record) + b"\n"
+        with self.lock:
+            self.file.write(line)
+            self.count += 1
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        with self.lock:
+            self.file.flush()
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def append_jsonl(file_path, records):
+    """레코드 목록을 JSONL 파일 끝에 추가하고 기록한 건수를 반환합니다."""
+    with JsonlWriter(file_path) as writer:
+        writer.write_many(records)
+        return writer.count
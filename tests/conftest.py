@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 저장소 루트에서 "from src.x import ..." 형태로 불러올 수 있도록 경로 추가
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
@@ -0,0 +1,88 @@
+import pytest
+
+from src.burst_detector import BurstDetector, synthetic_feed, replay
+
+BURST_START = 2400
+
+
+def small_detector(**overrides):
+    """1초 구간, 10초 창, 30초 이전 기간의 작은 탐지기 (시각을 직접 지정하여 사용)"""
+    config = {"window_sec": 10, "slot_sec": 1, "history_sec": 30, "min_count": 5, "ratio": 3.0, "width": 1 << 10}
+    config.update(overrides)
+    return BurstDetector(**config)
+
+
+def background(detector, start, end, per_sec=3):
+    """서로 다른 문구의 배경 트래픽 (어떤 키도 반복되지 않음)"""
+    for second in range(start, end):
+        detector.observe_many([f"일정 안내 {'가나다라마바사'[i % 7]}{second}번 {i}" for i in range(per_sec)], second)
+
+
+@pytest.fixture(scope="module")
+def synthetic_alerts():
+    alerts, _ = replay(synthetic_feed(), BurstDetector())
+    return alerts
+
+
+def test_synthetic_burst_alerts_template_and_domains(synthetic_alerts):
+    burst = [a for a in synthetic_alerts if "parcel" in a["example_msg"]]
+    assert any(a["key_type"] == "template" for a in burst)
+    domains = {a["key_value"] for a in burst if a["key_type"] == "domain"}
+    assert domains and all(d.startswith("parcel-check") for d in domains)
+    assert all(a["detected_at"] >= BURST_START for a in burst)
+
+
+def test_synthetic_feed_has_no_false_alerts(synthetic_alerts):
+    assert [a for a in synthetic_alerts if "parcel" not in a["example_msg"]] == []
+
+
+def test_counts_expire_after_window():
+    detector = small_detector()
+    detector.observe_many(["택배 보관 안내 1234"] * 8, 100)
+    assert detector.count("택배 보관 안내 1234") == 8
+    detector.observe("다른 문자", timestamp=109)
+    assert detector.count("택배 보관 안내 1234") == 8
+    detector.observe("다른 문자", timestamp=110)
+    assert detector.count("택배 보관 안내 1234") == 0
+
+
+def test_cold_start_suppresses_alerts_until_history_fills():
+    detector = small_detector()
+    detector.observe_many(["택배 보관 안내 1234"] * 20, 0)
+    assert detector.observe_many(["택배 보관 안내 1234"] * 20, 5) == []
+
+    eager = small_detector(cold_start=True)
+    assert eager.observe_many(["택배 보관 안내 1234"] * 20, 0)
+
+
+def test_steady_template_does_not_alert_after_warmup():
+    detector = small_detector()
+    alerts = []
+    for second in range(120):
+        alerts += detector.observe_many(["[공지] 정기 점검 안내 1234"] * 2, second)
+    assert alerts == []
+
+
+def test_cooldown_is_respected():
+    detector = small_detector(cooldown_sec=10)
+    background(detector, 0, 30)
+    first = detector.observe_many(["택배 보관 안내 1234"] * 10, 30)
+    assert [a["key_type"] for a in first] == ["template"]
+    for second in range(31, 40):
+        assert detector.observe_many(["택배 보관 안내 1234"] * 10, second) == []
+    assert [a["key_type"] for a in detector.observe_many(["택배 보관 안내 1234"] * 10, 40)] == ["template"]
+
+
+def test_out_of_order_timestamps():
+    detector = small_detector()
+    background(detector, 0, 30)
+    detector.observe_many(["택배 보관 안내 1234"] * 3, 35)
+    # 창 안의 이전 구간으로 늦게 도착한 문자는 원래 구간에 반영
+    late = detector.observe_many(["택배 보관 안내 1234"] * 3, 32)
+    assert detector.count("택배 보관 안내 1234") == 6
+    assert detector.current_slot == 35
+    assert [a["key_type"] for a in late] == ["template"]
+    # 링 버퍼보다 오래된 문자는 버림
+    assert detector.observe_many(["택배 보관 안내 1234"] * 50, 1) == []
+    assert detector.count("택배 보관 안내 1234") == 6
+    assert detector.get_report()["late_dropped"] == 50
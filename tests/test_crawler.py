@@ -0,0 +1,139 @@
+import json
+import threading
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import pytest
+
+from src.crawler import NaverApiCrawler
+
+NOW = datetime(2026, 1, 1, 12, 0, tzinfo=timezone(timedelta(hours=9)))
+
+
+def make_articles(count):
+    """최신순 기사 목록 (1분 간격)"""
+    return [{
+        "title": f"택배 문자 사기 주의 {i}",
+        "originallink": f"https://news.example.com/{i}",
+        "link": f"https://news.example.com/{i}",
+        "description": f"스미싱 피해 사례 {i}",
+        "pubDate": format_datetime(NOW - timedelta(minutes=i))
+    } for i in range(count)]
+
+
+class MockNewsAPI:
+    """
+    로컬 뉴스 검색 API. responses에 넣은 (상태코드, 헤더) 응답을 먼저 순서대로 돌려준 뒤
+    articles를 start/display로 잘라 반환합니다. (include_total=False이면 total 항목 없음)
+    """
+
+    def __init__(self, articles, include_total=True):
+        self.articles = articles
+        self.include_total = include_total
+        self.responses = []
+        self.requests = []
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                params = {k: v[0] for k, v in parse_qs(urlsplit(self.path).query).items()}
+                api.requests.append(params)
+                if api.responses:
+                    status, headers = api.responses.pop(0)
+                    self.send_response(status)
+                    for key, value in headers.items():
+                        self.send_header(key, value)
+                    self.end_headers()
+                    return
+                start, display = int(params["start"]), int(params["display"])
+                body = {"items": api.articles[start - 1:start - 1 + display]}
+                if api.include_total:
+                    body["total"] = len(api.articles)
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1/search/news.json"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def api():
+    server = MockNewsAPI(make_articles(250))
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def crawler(api, monkeypatch, tmp_path):
+    monkeypatch.setenv("NAVER_CLIENT_ID", "test-id")
+    monkeypatch.setenv("NAVER_CLIENT_SECRET", "test-secret")
+    return NaverApiCrawler(base_url=api.url, rate_per_sec=1000, max_retries=2,
+                            index_path=str(tmp_path / "crawl_index.db"))
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """백오프 대기 시간을 기록만 하고 실제로 기다리지 않음"""
+    recorded = []
+    monkeypatch.setattr("src.crawler.time.sleep", recorded.append)
+    return recorded
+
+
+@pytest.mark.parametrize("include_total", [True, False])
+def test_pages_with_start_until_max_items(api, crawler, include_total):
+    api.include_total = include_total
+    items = crawler.fetch_news("택배", display=100, max_items=250)
+    assert [it["link"] for it in items] == [a["link"] for a in api.articles]
+    assert [int(r["start"]) for r in api.requests] == [1, 101, 201]
+
+
+def test_stops_on_short_page_without_total(api, crawler):
+    api.include_total = False
+    api.articles = api.articles[:130]
+    items, complete = crawler._fetch_pages("택배", display=100, max_items=500)
+    assert len(items) == 130 and complete
+    assert len(api.requests) == 2
+
+
+def test_retries_429_with_retry_after(api, crawler, sleeps):
+    api.responses = [(429, {"Retry-After": "7"})]
+    items = crawler.fetch_news("택배", display=10, max_items=10)
+    assert len(items) == 10
+    assert len(api.requests) == 2
+    assert 7 <= sleeps[0] < 7.2
+
+
+def test_retries_5xx_with_backoff(api, crawler, sleeps):
+    api.responses = [(503, {}), (502, {})]
+    items = crawler.fetch_news("택배", display=10, max_items=10)
+    assert len(items) == 10
+    assert len(api.requests) == 3
+    assert sleeps[0] < sleeps[1]
+
+
+def test_gives_up_after_max_retries(api, crawler, sleeps):
+    api.responses = [(500, {})] * 3
+    items, complete = crawler._fetch_pages("택배", display=10, max_items=10)
+    assert items == [] and not complete
+    assert len(api.requests) == 3
+
+
+def test_incremental_pages_until_watermark(api, crawler):
+    since_ts = (NOW - timedelta(minutes=149, seconds=30)).timestamp()
+    items, complete = crawler._fetch_pages("택배", display=100, since_ts=since_ts)
+    assert len(items) == 150 and complete
+    assert [int(r["start"]) for r in api.requests] == [1, 101]